@@ -0,0 +1,178 @@
+"""Token budgeting for extraction prompts."""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .chunking import split_sections
+
+# Sections dropped first when a paper does not fit, in this order
+LOW_VALUE_SECTIONS = [
+    re.compile(r"^(references?|bibliography|literature cited|works cited)\b", re.I),
+    re.compile(r"^(supporting|supplementary|supplemental) (information|materials?|data)\b", re.I),
+    re.compile(
+        r"^(acknowledge?ments?|funding|author (information|contributions?)|"
+        r"(conflicts?|declarations?) of interests?|competing interests?|"
+        r"data (and code )?availability|associated content|notes?|abbreviations|orcid)\b",
+        re.I,
+    ),
+]
+
+# Chat formatting overhead (OpenAI's accounting): per message, plus reply priming
+_TOKENS_PER_MESSAGE = 4
+_TOKENS_PER_REPLY = 3
+
+
+@dataclass
+class TruncationStats:
+    """How much of a paper was cut to fit the prompt budget."""
+
+    original_tokens: int = 0
+    final_tokens: int = 0
+    budget_tokens: int = 0
+    dropped_sections: list[str] = field(default_factory=list)
+    trimmed_sections: list[str] = field(default_factory=list)
+
+    @property
+    def truncated(self) -> bool:
+        return self.final_tokens < self.original_tokens
+
+    def __add__(self, other: "TruncationStats") -> "TruncationStats":
+        return TruncationStats(
+            original_tokens=self.original_tokens + other.original_tokens,
+            final_tokens=self.final_tokens + other.final_tokens,
+            budget_tokens=max(self.budget_tokens, other.budget_tokens),
+            dropped_sections=self.dropped_sections + other.dropped_sections,
+            trimmed_sections=self.trimmed_sections + other.trimmed_sections,
+        )
+
+    def describe(self) -> str:
+        """One-line summary for logs."""
+        parts = [f"{self.original_tokens:,} -> {self.final_tokens:,} tokens"]
+        if self.dropped_sections:
+            parts.append("dropped " + ", ".join(self.dropped_sections))
+        if self.trimmed_sections:
+            parts.append("shortened " + ", ".join(self.trimmed_sections))
+        return "; ".join(parts)
+
+    def to_dict(self) -> dict:
+        return {
+            "original_tokens": self.original_tokens,
+            "final_tokens": self.final_tokens,
+            "budget_tokens": self.budget_tokens,
+            "dropped_sections": self.dropped_sections,
+            "trimmed_sections": self.trimmed_sections,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TruncationStats":
+        return cls(
+            original_tokens=data.get("original_tokens", 0),
+            final_tokens=data.get("final_tokens", 0),
+            budget_tokens=data.get("budget_tokens", 0),
+            dropped_sections=data.get("dropped_sections", []),
+            trimmed_sections=data.get("trimmed_sections", []),
+        )
+
+
+def _section_priority(heading: str) -> Optional[int]:
+    """Rank of a low-value section (lower is dropped first), or None to keep."""
+    heading = re.sub(r"^[\d.\sIVX]+(?=[A-Za-z])", "", heading).strip(" *_:")
+    for rank, pattern in enumerate(LOW_VALUE_SECTIONS):
+        if pattern.match(heading):
+            return rank
+    return None
+
+
+class PromptBudget:
+    """Fit paper content into the model's context window.
+
+    The budget is context_window minus the completion reservation
+    (max_tokens, capped at half the window) minus the exact token cost of
+    the prompt around the paper. Papers over budget first lose low-value
+    sections (references, supporting information, acknowledgements, ...),
+    then the largest remaining sections are shortened from their end.
+    """
+
+    def __init__(
+        self,
+        context_window: int,
+        max_tokens: int,
+        count_tokens: Callable[[str], int],
+    ):
+        self.context_window = context_window
+        self.reserved = min(max_tokens, context_window // 2)
+        self.count_tokens = count_tokens
+
+    def count_messages(self, messages: list[dict[str, str]]) -> int:
+        """Token cost of a chat prompt including per-message overhead."""
+        return _TOKENS_PER_REPLY + sum(
+            _TOKENS_PER_MESSAGE + self.count_tokens(m.get("content", "")) for m in messages
+        )
+
+    def available(self, build_messages: Callable[[str], list[dict[str, str]]]) -> int:
+        """Tokens left for the paper once the prompt template is accounted for."""
+        overhead = self.count_messages(build_messages(""))
+        return max(0, self.context_window - self.reserved - overhead)
+
+    def fit(
+        self,
+        content: str,
+        build_messages: Callable[[str], list[dict[str, str]]],
+    ) -> tuple[str, TruncationStats]:
+        """Trim content so build_messages(content) fits the context window."""
+        budget = self.available(build_messages)
+        original = self.count_tokens(content)
+        stats = TruncationStats(original_tokens=original, final_tokens=original, budget_tokens=budget)
+        if original <= budget:
+            return content, stats
+
+        sections = [[s.heading, s.text, self.count_tokens(s.text)] for s in split_sections(content)]
+
+        def total() -> int:
+            # Sections are re-joined with a blank line
+            return sum(s[2] for s in sections) + 2 * max(0, len(sections) - 1)
+
+        # Drop low-value sections, lowest rank first and last sections first
+        droppable = [
+            (rank, -index, section)
+            for index, section in enumerate(sections)
+            if (rank := _section_priority(section[0])) is not None
+        ]
+        for _, _, section in sorted(droppable, key=lambda d: (d[0], d[1])):
+            if total() <= budget:
+                break
+            sections.remove(section)
+            stats.dropped_sections.append(section[0])
+
+        # Shorten the largest remaining sections from the end
+        while total() > budget and sections:
+            section = max(sections, key=lambda s: s[2])
+            excess = total() - budget
+            if section[2] <= excess:
+                sections.remove(section)
+                stats.dropped_sections.append(section[0] or "(untitled)")
+                continue
+            keep_chars = len(section[1]) * (section[2] - excess) // section[2]
+            # Character cuts are approximate; step back until the tokens agree
+            while True:
+                text = section[1][:keep_chars].rstrip()
+                tokens = self.count_tokens(text)
+                if tokens <= section[2] - excess or keep_chars == 0:
+                    break
+                keep_chars = max(0, keep_chars - max(1, keep_chars // 50))
+            section[1], section[2] = text, tokens
+            label = section[0] or "(untitled)"
+            if label not in stats.trimmed_sections:
+                stats.trimmed_sections.append(label)
+
+        trimmed = "\n\n".join(s[1] for s in sections)
+        stats.final_tokens = self.count_tokens(trimmed)
+
+        # Token counts of joined text can differ slightly from the per-section sum
+        while stats.final_tokens > budget and trimmed:
+            excess = stats.final_tokens - budget
+            cut = max(1, len(trimmed) * excess // stats.final_tokens)
+            trimmed = trimmed[:-cut].rstrip()
+            stats.final_tokens = self.count_tokens(trimmed)
+        return trimmed, stats
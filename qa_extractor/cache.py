@@ -0,0 +1,141 @@
+"""Content-addressed on-disk cache for LLM responses."""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from .config import Config
+from .storage import atomic_write
+
+
+class ResponseCache:
+    """Persistent LLM response cache with size-bounded LRU eviction.
+
+    Entries are keyed by a hash of everything that determines the
+    completion (model, messages, temperature, max_tokens) and stored as
+    one JSON file each under a two-character fan-out directory. File
+    modification times record recency, so LRU order survives restarts.
+    """
+
+    def __init__(self, cache_dir: str | Path, max_size_mb: int = 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self._lock = threading.Lock()
+
+        # key -> size in bytes, least recently used first
+        self._index: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._load_index()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: list[dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+        """Hash the request fields that determine the response."""
+        material = json.dumps(
+            {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _load_index(self) -> None:
+        """Scan existing entries, oldest access first."""
+        if not self.cache_dir.exists():
+            return
+
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a cached response, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        # Mark as recently used, both in memory and on disk
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            if key in self._index:
+                self._index.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        """Store a response, evicting least recently used entries if needed."""
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+        # Atomic so readers never see partial entries; a lost entry is only a
+        # cache miss, so it is not worth an fsync
+        atomic_write(self._path(key), data, durable=False)
+
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        """Drop an entry (e.g. a response that turned out to be unusable)."""
+        with self._lock:
+            self._total_bytes -= self._index.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under the size bound."""
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of cached entries."""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def create_response_cache(config: Config) -> Optional[ResponseCache]:
+    """Build the response cache described by config, or None if disabled."""
+    if not config.cache.enabled:
+        return None
+    cache_dir = config.cache.cache_dir or str(Path(config.pipeline.output_dir) / ".cache")
+    return ResponseCache(cache_dir, max_size_mb=config.cache.max_size_mb)
@@ -4,7 +4,9 @@ import json
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+
+from . import storage
 
 
 @dataclass
@@ -47,40 +49,136 @@ class Checkpoint:
 
 
 class CheckpointManager:
-    """Manage pipeline checkpoints for resume functionality."""
+    """Manage pipeline checkpoints for resume functionality.
+
+    Updates are appended to a JSON-lines journal instead of rewriting the
+    whole checkpoint. They are group-committed every commit_interval
+    updates (and on every stage change), and the journal is folded back
+    into the .checkpoint.json snapshot every compact_interval entries, so
+    each processed paper costs O(1). A crash loses at most the last
+    uncommitted group, which is simply re-processed on resume. Journal
+    fsyncs happen in the background (see storage), so after a power loss
+    the last second of commits may be re-processed as well.
+
+    Journal entries carry token stats without the latency histograms,
+    which would make every line several times larger; a snapshot takes
+    the full stats from stats_source, when given.
+    """
 
     CHECKPOINT_FILE = ".checkpoint.json"
+    JOURNAL_FILE = ".checkpoint.journal.jsonl"
 
-    def __init__(self, output_dir: Path):
+    def __init__(
+        self,
+        output_dir: Path,
+        commit_interval: int = 1,
+        compact_interval: int = 1000,
+        stats_source: Optional[Callable[[], dict]] = None,
+    ):
         self.output_dir = Path(output_dir)
         self.checkpoint_path = self.output_dir / self.CHECKPOINT_FILE
+        self.journal_path = self.output_dir / self.JOURNAL_FILE
+        self.commit_interval = max(1, commit_interval)
+        self.compact_interval = max(1, compact_interval)
+        self.stats_source = stats_source
         self._checkpoint: Optional[Checkpoint] = None
+        self._processed: set[str] = set()
+        self._pending: list[dict] = []
+        self._journal_entries = 0
 
     def exists(self) -> bool:
         """Check if a checkpoint exists."""
-        return self.checkpoint_path.exists()
+        return self.checkpoint_path.exists() or self.journal_path.exists()
 
     def load(self) -> Optional[Checkpoint]:
-        """Load checkpoint from file."""
+        """Load the snapshot and replay the journal on top of it."""
         if not self.exists():
             return None
 
-        try:
-            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self._checkpoint = Checkpoint.from_dict(data)
-            return self._checkpoint
-        except (json.JSONDecodeError, IOError):
-            return None
+        checkpoint = Checkpoint()
+        if self.checkpoint_path.exists():
+            try:
+                with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                    checkpoint = Checkpoint.from_dict(json.load(f))
+            except (json.JSONDecodeError, IOError):
+                return None
+
+        self._checkpoint = checkpoint
+        self._processed = set(checkpoint.processed_files)
+        self._pending = []
+        self._journal_entries = 0
+
+        torn = False
+        if self.journal_path.exists():
+            try:
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        # Torn write from a crash: everything before it is intact.
+                        # A last line missing its newline is torn even if it parses.
+                        try:
+                            event = json.loads(line) if line.endswith("\n") else None
+                        except json.JSONDecodeError:
+                            event = None
+                        if event is None:
+                            torn = True
+                            break
+                        self._apply(event)
+                        self._journal_entries += 1
+            except IOError:
+                pass
+
+        if torn:
+            # Fold the intact prefix into the snapshot now; appending after the
+            # torn line would hide every later entry from the next replay
+            self.save(self._checkpoint)
+
+        return self._checkpoint
 
     def save(self, checkpoint: Checkpoint) -> None:
-        """Save checkpoint to file."""
+        """Write a full snapshot and start a fresh journal."""
         checkpoint.timestamp = time.strftime("%Y-%m-%dT%H:%M:%S")
         self._checkpoint = checkpoint
+        self._processed = set(checkpoint.processed_files)
+        self._pending = []
 
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-        with open(self.checkpoint_path, "w", encoding="utf-8") as f:
-            json.dump(checkpoint.to_dict(), f, indent=2, ensure_ascii=False)
+        # Atomic, so a crash never leaves a torn snapshot
+        storage.write_json(self.checkpoint_path, checkpoint.to_dict())
+
+        if self.journal_path.exists():
+            # The snapshot must be on disk before the journal it replaces goes
+            storage.flush()
+            self.journal_path.unlink()
+        self._journal_entries = 0
+
+    def _apply(self, event: dict) -> None:
+        """Apply one journal event to the in-memory checkpoint."""
+        checkpoint = self._checkpoint
+
+        if "stage" in event:
+            checkpoint.stage = event["stage"]
+
+        if "processed_file" in event:
+            processed_file = event["processed_file"]
+            if processed_file not in self._processed:
+                self._processed.add(processed_file)
+                checkpoint.processed_files.append(processed_file)
+            checkpoint.last_file = processed_file
+
+        if "token_stats" in event:
+            # Keep the snapshot's histograms when the event has none
+            checkpoint.token_stats = {**checkpoint.token_stats, **event["token_stats"]}
+
+        if "knowledge_count" in event:
+            checkpoint.knowledge_count = event["knowledge_count"]
+
+        if "qa_count" in event:
+            checkpoint.qa_count = event["qa_count"]
+
+        if "error" in event:
+            checkpoint.errors.append(event["error"])
+
+        if "timestamp" in event:
+            checkpoint.timestamp = event["timestamp"]
 
     def update(
         self,
@@ -93,43 +191,83 @@ class CheckpointManager:
     ) -> None:
         """Update checkpoint with new information."""
         if self._checkpoint is None:
-            self._checkpoint = Checkpoint()
+            # Updating without load() starts a fresh checkpoint (--no-resume)
+            self.save(Checkpoint())
 
-        if stage is not None:
-            self._checkpoint.stage = stage
+        event = {
+            key: value
+            for key, value in (
+                ("stage", stage),
+                ("processed_file", processed_file),
+                ("token_stats", token_stats),
+                ("knowledge_count", knowledge_count),
+                ("qa_count", qa_count),
+                ("error", error),
+            )
+            if value is not None
+        }
+        event["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
 
-        if processed_file is not None:
-            if processed_file not in self._checkpoint.processed_files:
-                self._checkpoint.processed_files.append(processed_file)
-            self._checkpoint.last_file = processed_file
+        # The final update of a run is committed at once, even when a
+        # re-run finds the checkpoint already complete
+        stage_changed = stage is not None and (stage != self._checkpoint.stage or stage == "complete")
+        self._apply(event)
+        self._pending.append(event)
 
-        if token_stats is not None:
-            self._checkpoint.token_stats = token_stats
+        if stage_changed or len(self._pending) >= self.commit_interval:
+            self.flush()
 
-        if knowledge_count is not None:
-            self._checkpoint.knowledge_count = knowledge_count
+    def flush(self) -> None:
+        """Group-commit pending updates to the journal, compacting when it is long."""
+        if not self._pending:
+            return
 
-        if qa_count is not None:
-            self._checkpoint.qa_count = qa_count
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        lines = "".join(
+            json.dumps(event, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for event in self._pending
+        )
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+        storage.sync(self.journal_path)
+        self._journal_entries += len(self._pending)
+        self._pending = []
 
-        if error is not None:
-            self._checkpoint.errors.append(error)
+        if self._journal_entries >= self.compact_interval or self._checkpoint.stage == "complete":
+            self.compact()
 
-        self.save(self._checkpoint)
+    def compact(self) -> None:
+        """Fold the journal into the snapshot."""
+        if self._checkpoint is not None:
+            if self.stats_source is not None:
+                self._checkpoint.token_stats = self.stats_source()
+            self.save(self._checkpoint)
+
+    def close(self) -> None:
+        """Commit anything still pending and wait for it to reach the disk."""
+        self.flush()
+        storage.flush()
+
+    def is_processed(self, file_path: str) -> bool:
+        """O(1) check whether a file has been recorded as processed."""
+        return file_path in self._processed
 
     def get_unprocessed_files(self, all_files: list[str]) -> list[str]:
         """Get list of files that haven't been processed yet."""
         if self._checkpoint is None:
             return all_files
 
-        processed_set = set(self._checkpoint.processed_files)
-        return [f for f in all_files if f not in processed_set]
+        return [f for f in all_files if f not in self._processed]
 
     def clear(self) -> None:
         """Clear the checkpoint."""
-        if self.checkpoint_path.exists():
-            self.checkpoint_path.unlink()
+        for path in (self.checkpoint_path, self.journal_path):
+            if path.exists():
+                path.unlink()
         self._checkpoint = None
+        self._processed = set()
+        self._pending = []
+        self._journal_entries = 0
 
     def get_current(self) -> Checkpoint:
         """Get current checkpoint or create new one."""
@@ -0,0 +1,128 @@
+"""Section-aware chunking of markdown papers."""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable
+
+# Only top-level headings split a paper; deeper ones stay with their section
+_HEADING = re.compile(r"^(#{1,2})\s+(.+?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+
+@dataclass
+class Section:
+    """A heading and the text up to the next #/## heading."""
+
+    heading: str
+    text: str
+
+
+@dataclass
+class Chunk:
+    """A token-budgeted run of consecutive sections."""
+
+    index: int
+    text: str
+    headings: list[str] = field(default_factory=list)
+    tokens: int = 0
+
+
+def split_sections(markdown: str) -> list[Section]:
+    """Split markdown on # and ## headings, ignoring headings in code fences."""
+    sections: list[Section] = []
+    heading = ""
+    lines: list[str] = []
+    in_fence = False
+
+    for line in markdown.split("\n"):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else _HEADING.match(line)
+        if match:
+            if lines and "".join(lines).strip():
+                sections.append(Section(heading, "\n".join(lines).strip()))
+            heading = match.group(2)
+            lines = [line]
+        else:
+            lines.append(line)
+
+    if lines and "".join(lines).strip():
+        sections.append(Section(heading, "\n".join(lines).strip()))
+    return sections
+
+
+def _split_oversized(text: str, max_tokens: int, count_tokens: Callable[[str], int]) -> list[str]:
+    """Split one section that exceeds the budget on paragraph, then line, boundaries."""
+    for separator in ("\n\n", "\n"):
+        pieces = text.split(separator)
+        if len(pieces) > 1:
+            break
+    else:
+        # A single enormous line: cut by characters proportionally to tokens
+        tokens = max(1, count_tokens(text))
+        step = max(1, len(text) * max_tokens // tokens)
+        return [text[i:i + step] for i in range(0, len(text), step)]
+
+    parts: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece)
+        if piece_tokens > max_tokens:
+            if current:
+                parts.append(separator.join(current))
+                current, current_tokens = [], 0
+            parts.extend(_split_oversized(piece, max_tokens, count_tokens))
+            continue
+        if current and current_tokens + piece_tokens > max_tokens:
+            parts.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += piece_tokens
+    if current:
+        parts.append(separator.join(current))
+    return parts
+
+
+def chunk_markdown(
+    markdown: str,
+    max_tokens: int,
+    count_tokens: Callable[[str], int],
+) -> list[Chunk]:
+    """Pack consecutive sections into chunks of at most max_tokens each.
+
+    Sections are never reordered and are only split when a single section
+    is larger than the budget. A paper that fits the budget comes back as
+    a single chunk identical to the input.
+    """
+    total = count_tokens(markdown)
+    if total <= max_tokens:
+        return [Chunk(index=0, text=markdown, headings=[], tokens=total)]
+
+    # Break sections that are too large on their own into pieces
+    pieces: list[tuple[str, str, int]] = []
+    for section in split_sections(markdown):
+        tokens = count_tokens(section.text)
+        if tokens <= max_tokens:
+            pieces.append((section.heading, section.text, tokens))
+            continue
+        for part in _split_oversized(section.text, max_tokens, count_tokens):
+            pieces.append((section.heading, part, count_tokens(part)))
+
+    chunks: list[Chunk] = []
+    current = Chunk(index=0, text="")
+    parts: list[str] = []
+    for heading, text, tokens in pieces:
+        if parts and current.tokens + tokens > max_tokens:
+            current.text = "\n\n".join(parts)
+            chunks.append(current)
+            current = Chunk(index=len(chunks), text="")
+            parts = []
+        parts.append(text)
+        current.tokens += tokens
+        if heading and heading not in current.headings:
+            current.headings.append(heading)
+    if parts:
+        current.text = "\n\n".join(parts)
+        chunks.append(current)
+    return chunks
@@ -6,10 +6,14 @@ from pathlib import Path
 import click
 from rich.console import Console
 
+from .columnar import COMPRESSIONS
 from .config import Config, load_config
 from .exporter import QAExporter
+from .sharding import parse_shard
 from .ui.banner import print_banner, print_error_banner
+from .ui.events import EventWriter
 from .ui.themes import get_theme, Icons
+from .commands.merge import merge_command
 from .commands.run import run_command
 from .commands.stats import stats_command
 from .commands.status import status_command
@@ -20,6 +24,17 @@ console = Console()
 theme = get_theme()
 
 
+def _validate_shard(ctx, param, value):
+    """Check a --shard i/N value."""
+    if value is None:
+        return None
+    try:
+        parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return value
+
+
 @click.group()
 @click.version_option(version="0.2.0", prog_name="qa-extractor")
 def cli():
@@ -33,7 +48,8 @@ def cli():
       stats     Show detailed statistics
       status    Show pipeline status and checkpoint
       validate  Check output quality and errors
-      export    Export QA pairs to file
+      merge     Merge shard output directories
+      export    Export QA pairs or knowledge points
       init      Generate sample configuration
       clear     Clear checkpoint to start fresh
     """
@@ -61,8 +77,69 @@ def cli():
     is_flag=True,
     help="Start fresh, ignoring any existing checkpoint",
 )
-def run(config, input, output, no_resume):
+@click.option(
+    "--concurrency", "-j",
+    type=click.IntRange(min=1),
+    help="Number of LLM requests kept in flight (overrides config)",
+)
+@click.option(
+    "--pipelined",
+    is_flag=True,
+    help="Start QA generation for each paper as soon as it is extracted",
+)
+@click.option(
+    "--shard",
+    callback=_validate_shard,
+    help="Process only shard i of N (e.g. 3/16) into <output>/shard-i-of-N",
+)
+@click.option(
+    "--distributed",
+    is_flag=True,
+    help="Share the output directory with other workers, leasing papers",
+)
+@click.option(
+    "--worker-id",
+    help="Name of this worker in distributed mode (default: <hostname>-<pid>)",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Disable the on-disk LLM response cache",
+)
+@click.option(
+    "--cache-dir",
+    type=click.Path(),
+    help="Directory for the LLM response cache (default: <output>/.cache)",
+)
+@click.option(
+    "--no-tui",
+    is_flag=True,
+    help="No live dashboard; print JSON-lines progress events instead",
+)
+@click.option(
+    "--events",
+    type=click.Path(dir_okay=False),
+    help="Append JSON-lines progress events to this file (implies --no-tui)",
+)
+@click.option(
+    "--metrics-port",
+    type=click.IntRange(min=1, max=65535),
+    help="Serve Prometheus metrics at monitoring.metrics_host:PORT/metrics",
+)
+@click.option(
+    "--metrics-textfile",
+    type=click.Path(dir_okay=False),
+    help="Rewrite Prometheus metrics to this file (node-exporter textfile collector)",
+)
+@click.option(
+    "--trace",
+    type=click.Path(dir_okay=False),
+    help="Write a Chrome trace of per-paper spans to this file (open in Perfetto)",
+)
+def run(config, input, output, no_resume, concurrency, pipelined, shard, distributed, worker_id, no_cache, cache_dir, no_tui, events, metrics_port, metrics_textfile, trace):
     """Run the full QA extraction pipeline with live dashboard."""
+    out = console
+    event_writer = None
     try:
         # Load configuration
         cfg = load_config(config)
@@ -72,27 +149,61 @@ def run(config, input, output, no_resume):
             cfg.pipeline.input_dir = input
         if output:
             cfg.pipeline.output_dir = output
+        if concurrency:
+            cfg.pipeline.concurrency = concurrency
+        if pipelined:
+            cfg.pipeline.pipelined = True
+        if shard:
+            cfg.pipeline.shard = shard
+        if distributed or worker_id:
+            cfg.pipeline.distributed = True
+        if worker_id:
+            cfg.pipeline.worker_id = worker_id
+        if no_cache:
+            cfg.cache.enabled = False
+        if cache_dir:
+            cfg.cache.cache_dir = cache_dir
+        if no_tui or events:
+            cfg.monitoring.tui = False
+        if events:
+            cfg.monitoring.events_file = events
+        if metrics_port:
+            cfg.monitoring.metrics_port = metrics_port
+        if metrics_textfile:
+            cfg.monitoring.metrics_textfile = metrics_textfile
+        if trace:
+            cfg.monitoring.trace_file = trace
+
+        # Headless: events may be on stdout, so messages go to stderr
+        if not cfg.monitoring.tui:
+            out = Console(stderr=True)
 
         # Validate API key
         if not cfg.llm.api_key:
             print_error_banner(
-                console,
+                out,
                 "API key not set. Please set api_key in config.yaml file.",
             )
             raise click.Abort()
 
+        if not cfg.monitoring.tui:
+            event_writer = EventWriter.open(cfg.monitoring.events_file)
+
         # Run pipeline with new dashboard
-        results = run_command(cfg, console, resume=not no_resume)
+        results = run_command(cfg, out, resume=not no_resume, events=event_writer)
 
     except FileNotFoundError as e:
-        print_error_banner(console, str(e))
+        print_error_banner(out, str(e))
         raise click.Abort()
     except KeyboardInterrupt:
-        console.print(f"\n[{theme.warning}]{Icons.WARNING} Interrupted by user[/]")
+        out.print(f"\n[{theme.warning}]{Icons.WARNING} Interrupted by user[/]")
         raise click.Abort()
     except Exception as e:
-        print_error_banner(console, str(e))
+        print_error_banner(out, str(e))
         raise click.Abort()
+    finally:
+        if event_writer:
+            event_writer.close()
 
 
 @cli.command()
@@ -177,7 +288,7 @@ def generate(config, input, output):
     """Run Stage 2: Generate QA pairs from knowledge points."""
     try:
         from .pipeline import Pipeline
-        from .stage1_extractor import ExtractionResult
+        from .stage1_extractor import load_extraction_results
         from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn, TimeElapsedColumn
 
         cfg = load_config(config)
@@ -189,9 +300,7 @@ def generate(config, input, output):
 
         # Load extraction results
         knowledge_dir = Path(input)
-        extraction_results = []
-        for json_file in knowledge_dir.glob("*.json"):
-            extraction_results.append(ExtractionResult.load(json_file))
+        extraction_results = load_extraction_results(knowledge_dir)
 
         if not extraction_results:
             print_error_banner(console, f"No knowledge files found in {input}")
@@ -239,10 +348,15 @@ def generate(config, input, output):
     is_flag=True,
     help="Show detailed per-paper breakdown",
 )
-def stats(output, detailed):
+@click.option(
+    "--rebuild",
+    is_flag=True,
+    help="Re-index the result files into the state database first",
+)
+def stats(output, detailed, rebuild):
     """Show detailed statistics about generated QA pairs."""
     try:
-        stats_command(output, console, detailed=detailed)
+        stats_command(output, console, detailed=detailed, rebuild=rebuild)
     except Exception as e:
         print_error_banner(console, str(e))
         raise click.Abort()
@@ -255,10 +369,36 @@ def stats(output, detailed):
     required=True,
     help="Output directory to check status for",
 )
-def status(output):
+@click.option(
+    "--rebuild",
+    is_flag=True,
+    help="Re-index the result files into the state database first",
+)
+def status(output, rebuild):
     """Show current pipeline status and checkpoint information."""
     try:
-        status_command(output, console)
+        status_command(output, console, rebuild=rebuild)
+    except Exception as e:
+        print_error_banner(console, str(e))
+        raise click.Abort()
+
+
+@cli.command()
+@click.argument("shard_dirs", nargs=-1, required=True, type=click.Path(exists=True, file_okay=False))
+@click.option(
+    "--output", "-o",
+    type=click.Path(),
+    required=True,
+    help="Output directory for the merged results",
+)
+def merge(shard_dirs, output):
+    """Merge shard output directories (from run --shard) into one.
+
+    SHARD_DIRS are shard output directories, or directories containing
+    shard-*-of-* subdirectories.
+    """
+    try:
+        merge_command(list(shard_dirs), output, console)
     except Exception as e:
         print_error_banner(console, str(e))
         raise click.Abort()
@@ -290,45 +430,74 @@ def validate(output, fix):
     "--input", "-i",
     type=click.Path(exists=True),
     required=True,
-    help="Input directory containing QA results",
+    help="Input directory containing QA (or, with --knowledge, extraction) results",
 )
 @click.option(
     "--output", "-o",
     type=click.Path(),
     required=True,
-    help="Output file path (JSON)",
+    help="Output file path",
 )
 @click.option(
     "--format", "-f",
-    type=click.Choice(["json", "jsonl"]),
+    type=click.Choice(list(QAExporter.FORMATS)),
     default="json",
-    help="Output format",
+    help="Output format (parquet and arrow need pyarrow)",
 )
 @click.option(
     "--by-category",
     is_flag=True,
     help="Also export separate files by category",
 )
-def export(input, output, format, by_category):
-    """Export QA pairs to a single file."""
+@click.option(
+    "--knowledge",
+    is_flag=True,
+    help="Export Stage 1 knowledge points instead of QA pairs",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(list(COMPRESSIONS)),
+    default="zstd",
+    show_default=True,
+    help="Compression codec for parquet/arrow",
+)
+@click.option(
+    "--row-group-size",
+    type=click.IntRange(min=1),
+    default=65536,
+    show_default=True,
+    help="Rows per parquet row group / arrow record batch",
+)
+def export(input, output, format, by_category, knowledge, compression, row_group_size):
+    """Export QA pairs (or knowledge points) to a single file."""
     try:
         cfg = Config()
-        exporter = QAExporter(cfg)
+        exporter = QAExporter(cfg, compression=compression, row_group_size=row_group_size)
 
         input_dir = Path(input)
-        qa_dir = input_dir / "qa_pairs" if (input_dir / "qa_pairs").exists() else input_dir
-
-        result = exporter.export_all(
-            qa_dir=qa_dir,
-            output_path=Path(output),
-            format=format,
-            split_by_category=by_category,
-        )
-
-        console.print(f"\n[{theme.success}]{Icons.SUCCESS}[/] Exported {result['total_qa_pairs']} QA pairs to {output}")
+        subdir = "knowledge" if knowledge else "qa_pairs"
+        results_dir = input_dir / subdir if (input_dir / subdir).exists() else input_dir
+
+        if knowledge:
+            result = exporter.export_knowledge(
+                knowledge_dir=results_dir,
+                output_path=Path(output),
+                format=format,
+                split_by_category=by_category,
+            )
+            console.print(f"\n[{theme.success}]{Icons.SUCCESS}[/] Exported {result['total_knowledge_points']} knowledge points to {output}")
+        else:
+            result = exporter.export_all(
+                qa_dir=results_dir,
+                output_path=Path(output),
+                format=format,
+                split_by_category=by_category,
+            )
+            console.print(f"\n[{theme.success}]{Icons.SUCCESS}[/] Exported {result['total_qa_pairs']} QA pairs to {output}")
 
         if by_category:
-            console.print(f"[{theme.success}]{Icons.SUCCESS}[/] Category files saved to {Path(output).parent / 'qa_by_category'}")
+            category_dir = "knowledge_by_category" if knowledge else "qa_by_category"
+            console.print(f"[{theme.success}]{Icons.SUCCESS}[/] Category files saved to {Path(output).parent / category_dir}")
 
     except Exception as e:
         print_error_banner(console, str(e))
@@ -347,9 +516,18 @@ def clear(output):
     """Clear the checkpoint to start fresh."""
     try:
         from .checkpoint import CheckpointManager
-
-        checkpoint_manager = CheckpointManager(Path(output))
-        checkpoint_manager.clear()
+        from .state_store import StateStore
+
+        # The root checkpoint, and distributed workers' own ones
+        output_dir = Path(output)
+        for state_dir in [output_dir, *sorted(output_dir.glob("workers/*/"))]:
+            CheckpointManager(state_dir).clear()
+
+        # Forget per-paper state too (every existing database), so the next run starts over
+        for path in StateStore.databases(output_dir):
+            state_store = StateStore(path)
+            state_store.clear()
+            state_store.close()
 
         console.print(f"[{theme.success}]{Icons.SUCCESS}[/] Checkpoint cleared")
 
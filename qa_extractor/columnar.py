@@ -0,0 +1,140 @@
+"""Columnar (Parquet / Arrow IPC) export writers, with pyarrow loaded on first use."""
+
+from typing import IO, Optional
+
+COLUMNAR_FORMATS = ("parquet", "arrow")
+COMPRESSIONS = ("zstd", "lz4", "snappy", "none")
+
+# Column name -> kind. "category" columns are dictionary-encoded (categorical
+# when loaded with pandas/polars), "list" columns are lists of strings.
+QA_COLUMNS = {
+    "id": "string",
+    "question": "string",
+    "answer": "string",
+    "category": "category",
+    "source_title": "category",
+    "difficulty": "category",
+    "reasoning_type": "category",
+}
+
+KNOWLEDGE_COLUMNS = {
+    "id": "string",
+    "paper_id": "category",
+    "paper_title": "category",
+    "source_file": "category",
+    "category": "category",
+    "content": "string",
+    "evidence": "string",
+    "complexity": "category",
+    "keywords": "list",
+}
+
+
+def _import_pyarrow():
+    """Import pyarrow, which only columnar export needs."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError(
+            "Parquet/Arrow export needs pyarrow, which is not installed (pip install pyarrow)"
+        ) from None
+    return pyarrow
+
+
+class ColumnarWriter:
+    """Write rows to a Parquet or Arrow IPC file, one row group at a time.
+
+    Rows are buffered in columns and written every row_group_size rows, so
+    memory stays bounded. Category columns keep one dictionary per file
+    that only grows, so every batch's dictionary extends the previous one
+    (written as a delta in Arrow IPC files) and codes stay stable.
+    """
+
+    def __init__(
+        self,
+        f: IO[bytes],
+        columns: dict[str, str],
+        format: str = "parquet",
+        compression: str = "zstd",
+        row_group_size: int = 65536,
+    ):
+        if format not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unknown columnar format: {format}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression: {compression} (expected one of {', '.join(COMPRESSIONS)})")
+        if format == "arrow" and compression == "snappy":
+            raise ValueError("Arrow IPC files support zstd or lz4 compression, not snappy")
+
+        pa = _import_pyarrow()
+        self._pa = pa
+        self.columns = columns
+        self.row_group_size = max(1, row_group_size)
+        self.count = 0
+
+        types = {
+            "string": pa.string(),
+            "category": pa.dictionary(pa.int32(), pa.string()),
+            "list": pa.list_(pa.string()),
+        }
+        self.schema = pa.schema([(name, types[kind]) for name, kind in columns.items()])
+
+        codec: Optional[str] = None if compression == "none" else compression
+        if format == "parquet":
+            self._writer = pa.parquet.ParquetWriter(f, self.schema, compression=codec or "none")
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=codec, emit_dictionary_deltas=True)
+            self._writer = pa.ipc.new_file(f, self.schema, options=options)
+
+        self._buffer: dict[str, list] = {name: [] for name in columns}
+        # Per category column: value -> code, and the values in code order
+        self._codes: dict[str, dict[str, int]] = {
+            name: {} for name, kind in columns.items() if kind == "category"
+        }
+        self._dictionaries: dict[str, list[str]] = {name: [] for name in self._codes}
+
+    def _encode(self, name: str, value) -> Optional[int]:
+        if value is None:
+            return None
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(codes)
+            self._dictionaries[name].append(value)
+        return code
+
+    def write_item(self, item: dict) -> None:
+        """Buffer one row, writing a row group once enough are buffered."""
+        for name, kind in self.columns.items():
+            value = item.get(name)
+            if kind == "category":
+                value = self._encode(name, None if value is None else str(value))
+            elif kind == "list":
+                value = [str(v) for v in value] if value else []
+            self._buffer[name].append(value)
+        self.count += 1
+        if len(self._buffer["id"]) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        pa = self._pa
+        if not self._buffer["id"]:
+            return
+        arrays = []
+        for name, kind in self.columns.items():
+            values = self._buffer[name]
+            if kind == "category":
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(values, pa.int32()),
+                    pa.array(self._dictionaries[name], pa.string()),
+                ))
+            else:
+                arrays.append(pa.array(values, self.schema.field(name).type))
+        self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self._buffer = {name: [] for name in self.columns}
+
+    def write_tail(self) -> None:
+        """Write the last row group and the file footer."""
+        self._flush()
+        self._writer.close()
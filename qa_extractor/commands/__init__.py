@@ -1,11 +1,13 @@
 """Command handlers for QA Extractor CLI."""
 
+from .merge import merge_command
 from .run import run_command
 from .stats import stats_command
 from .status import status_command
 from .validate import validate_command
 
 __all__ = [
+    "merge_command",
     "run_command",
     "stats_command",
     "status_command",
@@ -0,0 +1,73 @@
+"""Merge command - fold shard output directories into one."""
+
+from pathlib import Path
+
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+
+from ..sharding import find_shard_dirs, merge_shards
+from ..ui.themes import get_theme, Icons
+
+
+def merge_command(shard_dirs: list[str], output_dir: str, console: Console) -> None:
+    """Merge the outputs of `run --shard i/N` jobs."""
+    theme = get_theme()
+    output_path = Path(output_dir)
+
+    shards = [
+        path for path in find_shard_dirs([Path(d) for d in shard_dirs])
+        if path.resolve() != output_path.resolve()
+    ]
+    if not shards:
+        console.print(f"[{theme.warning}]{Icons.WARNING} No shard directories found[/]")
+        return
+
+    summary = merge_shards(shards, output_path)
+
+    table = Table.grid(padding=(0, 4))
+    table.add_column()
+    table.add_column(justify="right")
+    table.add_column()
+    table.add_column(justify="right")
+
+    usage = summary.token_stats.get("usage", {})
+    table.add_row(
+        f"[{theme.text}]Shards[/]",
+        f"[{theme.primary}]{summary.shards}[/]",
+        f"[{theme.text}]Knowledge Files[/]",
+        f"[{theme.primary}]{summary.knowledge_files}[/]",
+    )
+    table.add_row(
+        f"[{theme.text}]QA Files[/]",
+        f"[{theme.primary}]{summary.qa_files}[/]",
+        f"[{theme.text}]Cross-Doc QA[/]",
+        f"[{theme.primary}]{summary.cross_doc_qa}[/]",
+    )
+    table.add_row(
+        f"[{theme.text}]Total Tokens[/]",
+        f"[{theme.primary}]{usage.get('total_tokens', 0):,}[/]",
+        f"[{theme.text}]Est. Cost[/]",
+        f"[{theme.success}]${summary.token_stats.get('estimated_cost_usd', 0):.2f}[/]",
+    )
+
+    console.print()
+    console.print(Panel(
+        table,
+        title=f"[{theme.title}]Merged into {output_path}[/]",
+        border_style=theme.border,
+        padding=(0, 1),
+    ))
+
+    if summary.duplicates:
+        console.print()
+        console.print(
+            f"[{theme.warning}]{Icons.WARNING} {len(summary.duplicates)} paper ID(s) appeared in "
+            f"more than one shard; kept the best result of each:[/]"
+        )
+        for name in summary.duplicates[:20]:
+            console.print(f"  [{theme.text_dim}]{name}[/]")
+        if len(summary.duplicates) > 20:
+            console.print(f"  [{theme.text_dim}]... and {len(summary.duplicates) - 20} more[/]")
+
+    console.print()
@@ -9,43 +9,112 @@ from rich.console import Console
 
 from ..config import Config
 from ..llm_client import LLMClient
+from ..budget import TruncationStats
+from ..cache import create_response_cache
 from ..checkpoint import CheckpointManager
+from ..concurrency import AdaptiveConcurrency, run_concurrently, run_pipelined
+from ..leasing import LeaseManager, default_worker_id
+from ..loader import iter_loaded
+from ..manifest import breakdown
+from ..metrics import MetricsExporter, render_metrics
+from ..sharding import parse_shard, select_shard, shard_dir_name
+from ..state_store import StateStore, SUCCESS, classify
+from ..storage import check_codec, find_result
 from ..stage1_extractor import KnowledgeExtractor, ExtractionResult
 from ..stage2_generator import QAGenerator, GenerationResult
+from ..tracing import Tracer, span
 from ..ui.dashboard import Dashboard, print_results_summary
-from ..ui.themes import get_theme
+from ..ui.events import EventDashboard, EventWriter
+from ..ui.themes import get_theme, Icons
 
 
 def run_command(
     config: Config,
     console: Console,
     resume: bool = True,
+    events: Optional[EventWriter] = None,
 ) -> dict:
-    """Run the full pipeline with live dashboard."""
+    """Run the full pipeline with live dashboard.
+
+    With an EventWriter the dashboard is replaced by JSON-lines events:
+    one per paper entering and finishing each stage, plus stage changes,
+    log messages and a final run_end summary.
+    """
     theme = get_theme()
     start_time = time.time()
 
+    # Static sharding: a stable slice of the corpus, written to its own subdirectory
+    shard = parse_shard(config.pipeline.shard) if config.pipeline.shard else None
+    if shard:
+        config = config.model_copy(deep=True)
+        config.pipeline.output_dir = str(Path(config.pipeline.output_dir) / shard_dir_name(*shard))
+
     # Setup paths
     input_dir = Path(config.pipeline.input_dir)
     output_dir = Path(config.pipeline.output_dir)
     knowledge_dir = output_dir / "knowledge"
     qa_dir = output_dir / "qa_pairs"
+    codec = config.pipeline.storage_codec
+    check_codec(codec)
 
     # Ensure directories exist
     config.ensure_directories()
 
     # Get file list
     md_files = sorted(input_dir.rglob("*.md"))
+    corpus_size = len(md_files)
+    if shard:
+        md_files = select_shard(md_files, input_dir, *shard)
+    concurrency = config.pipeline.concurrency
+
+    # Workers sharing output_dir lease papers and keep their own checkpoint and state
+    distributed = config.pipeline.distributed
+    leases = None
+    state_dir = output_dir
+    if distributed:
+        worker_id = config.pipeline.worker_id or default_worker_id()
+        leases = LeaseManager(output_dir / ".leases", worker_id, ttl=config.pipeline.lease_ttl)
+        state_dir = output_dir / "workers" / worker_id
 
     # Initialize components
-    llm_client = LLMClient(config.llm)
+    llm_client = LLMClient(config.llm, cache=create_response_cache(config))
     extractor = KnowledgeExtractor(config, llm_client)
     generator = QAGenerator(config, llm_client)
-    checkpoint_manager = CheckpointManager(output_dir)
-
-    # Load checkpoint
-    checkpoint = checkpoint_manager.load() if resume else None
-    processed_files = set(checkpoint.processed_files) if checkpoint else set()
+    checkpoint_manager = CheckpointManager(
+        state_dir,
+        commit_interval=config.pipeline.checkpoint_interval,
+        stats_source=lambda: llm_client.get_stats().to_dict(),
+    )
+    state_store = StateStore.for_output(state_dir)
+
+    # Adaptive concurrency grows/shrinks the in-flight window from request outcomes
+    controller = None
+    if config.pipeline.adaptive_concurrency:
+        controller = AdaptiveConcurrency(
+            initial=concurrency,
+            maximum=config.pipeline.max_concurrency,
+        )
+        llm_client.add_listener(controller.on_request)
+
+    def target_concurrency() -> int:
+        return controller.limit if controller else concurrency
+
+    # Chunk requests count against the same in-flight target as papers
+    llm_client.limit_concurrency(target_concurrency)
+
+    # Load checkpoint and per-paper state
+    if resume:
+        checkpoint_manager.load()
+        if state_store.is_empty() and not distributed:
+            # Output directories from before the state store: index them once
+            state_store.import_results(output_dir)
+    else:
+        state_store.clear()
+    extracted = state_store.finished("extract")
+    generated = state_store.finished("generate")
+
+    # Submission times, for per-paper latency
+    started: dict[str, float] = {}
 
     # Dashboard config
     dashboard_config = {
@@ -54,147 +123,333 @@ def run_command(
         "output": str(output_dir),
         "resume": resume,
         "file_count": len(md_files),
+        "concurrency": concurrency,
+        "adaptive_concurrency": controller is not None,
+        "pipelined": config.pipeline.pipelined,
     }
 
     extraction_results = []
     generation_results = []
     cross_doc_result = None
 
+    # Opt-in Prometheus metrics, collected on the exporter's own threads
+    monitoring = config.monitoring
+    metrics = MetricsExporter(
+        lambda: render_metrics(
+            llm_client.get_stats(),
+            state_store.manifest(),
+            concurrency_target=target_concurrency(),
+            start_time=start_time,
+        ),
+        port=monitoring.metrics_port,
+        host=monitoring.metrics_host,
+        textfile=monitoring.metrics_textfile,
+        interval=monitoring.metrics_interval,
+    )
+
+    # Opt-in span timeline; worker threads record into it through tracing.span()
+    tracer = Tracer().start() if monitoring.trace_file else None
+
+    def extract(file_path: Path) -> ExtractionResult:
+        with span("extract", file=file_path.name):
+            return extractor.extract_from_file(file_path)
+
+    def generate(extraction_result: ExtractionResult) -> GenerationResult:
+        with span("generate", paper=extraction_result.paper_id):
+            return generator.generate_from_extraction(extraction_result)
+
+    if events is not None:
+        dashboard = EventDashboard(events, dashboard_config)
+        state_store.add_listener(events.paper)
+    else:
+        dashboard = Dashboard(console, theme, dashboard_config)
+
     try:
-        with Dashboard(console, theme, dashboard_config) as dashboard:
+        if metrics.enabled:
+            metrics.start()
+        with dashboard:
             # Set totals
             dashboard.set_stage_total("extract", len(md_files))
             dashboard.set_stage_total("generate", len(md_files))
 
+            # Distributed workers meet at each stage boundary, so stages run in turn
+            pipelined = config.pipeline.pipelined and not distributed
+            if leases:
+                run_id = leases.join_run()
+                dashboard.log(f"Distributed worker {leases.worker_id}, run {run_id[:8]}", "info")
+            if shard:
+                dashboard.log(f"Shard {shard[0]}/{shard[1]}: {len(md_files)} of {corpus_size} papers", "info")
+            # Both stages are active at once in pipelined mode
+            extract_stage = "generate" if pipelined else "extract"
+
             # === Stage 1: Knowledge Extraction ===
             dashboard.log("Starting Stage 1: Knowledge Extraction", "info")
             dashboard.update_progress("extract", 0, len(md_files), "in_progress")
 
-            for i, file_path in enumerate(md_files):
-                file_key = str(file_path)
-                paper_id = extractor._generate_paper_id(file_path)
-                result_path = knowledge_dir / f"{paper_id}.json"
+            # Load what earlier runs already processed successfully
+            extracted_paths = _finished_paths(extracted)
+            finished_extractions = dict(iter_loaded(extracted_paths.values(), ExtractionResult.load))
+            finished_generations = dict(iter_loaded(_finished_paths(generated).values(), GenerationResult.load))
+
+            pending_files = []
+            for file_path in md_files:
+                result = finished_extractions.get(extracted_paths.get(extractor._generate_paper_id(file_path)))
+                if result is not None:
+                    extraction_results.append(result)
+                    continue
+
+                pending_files.append(file_path)
+
+            progress = {"extract": len(extraction_results), "generate": 0}
+            dashboard.update_progress("extract", progress["extract"], len(md_files), "in_progress")
+
+            def needs_generation(extraction_result: ExtractionResult) -> bool:
+                """Record finished or skipped Stage 2 work; True if QA must be generated."""
+                # Skip if already generated
+                state = generated.get(extraction_result.paper_id)
+                result = finished_generations.pop(Path(state.output_path), None) if state else None
+                if result is not None:
+                    generation_results.append(result)
+                    progress["generate"] += 1
+                    return False
+
+                # Skip if no knowledge points
+                if not extraction_result.knowledge_points:
+                    result = GenerationResult(
+                        paper_id=extraction_result.paper_id,
+                        paper_title=extraction_result.paper_title,
+                        qa_pairs=[],
+                        token_usage={"skipped": "no knowledge points"},
+                    )
+                    generation_results.append(result)
+                    state_store.record(
+                        paper_id=result.paper_id,
+                        stage="generate",
+                        token_usage=result.token_usage,
+                        item_count=0,
+                        source_file=extraction_result.source_file,
+                    )
+                    progress["generate"] += 1
+                    return False
 
-                # Check if already processed successfully
-                if file_key in processed_files and result_path.exists():
-                    result = ExtractionResult.load(result_path)
-                    if "error" not in result.token_usage and len(result.knowledge_points) > 0:
-                        extraction_results.append(result)
-                        dashboard.update_progress("extract", i + 1, len(md_files), "in_progress")
-                        continue
+                return True
 
-                # Process file
+            def extracted_elsewhere(file_path: Path) -> bool:
+                """Take over a paper another worker already extracted."""
+                paper_id = extractor._generate_paper_id(file_path)
+                result = _load_shared(
+                    find_result(knowledge_dir, paper_id, codec),
+                    ExtractionResult.load,
+                    lambda r: len(r.knowledge_points),
+                    this_run=leases.finished(f"extract/{paper_id}"),
+                    resume=resume,
+                )
+                if result is None:
+                    return False
+                extraction_results.append(result)
+                progress["extract"] += 1
+                dashboard.update_progress("extract", progress["extract"], len(md_files), "in_progress")
+                return True
+
+            def generated_elsewhere(extraction_result: ExtractionResult) -> bool:
+                """Take over QA pairs another worker already generated."""
+                result = _load_shared(
+                    find_result(qa_dir, extraction_result.paper_id, codec),
+                    GenerationResult.load,
+                    lambda r: len(r.qa_pairs),
+                    this_run=leases.finished(f"generate/{extraction_result.paper_id}"),
+                    resume=resume,
+                )
+                if result is None:
+                    return False
+                generation_results.append(result)
+                progress["generate"] += 1
+                dashboard.update_progress("generate", progress["generate"], generate_total, "in_progress")
+                return True
+
+            def on_extract_submit(file_path: Path) -> None:
+                started[str(file_path)] = time.monotonic()
+                state_store.mark_started(extractor._generate_paper_id(file_path), "extract", str(file_path))
                 dashboard.update_task(
                     filename=file_path.name,
                     title="",
                     status="calling_api",
-                    status_message="Calling LLM API...",
+                    status_message=_calling_message("Calling LLM API...", target_concurrency()),
                 )
 
-                result = extractor.extract_from_file(file_path)
-                result.save(knowledge_dir)
+            def on_generate_submit(extraction_result: ExtractionResult) -> None:
+                started[extraction_result.paper_id] = time.monotonic()
+                state_store.mark_started(extraction_result.paper_id, "generate", extraction_result.source_file)
+                dashboard.update_task(
+                    filename=extraction_result.paper_title[:50],
+                    title="",
+                    status="calling_api",
+                    status_message=_calling_message("Generating QA pairs...", target_concurrency()),
+                )
+
+            def record_extraction(file_path: Path, result: ExtractionResult) -> None:
+                with span("save", stage="extract"):
+                    result_path = result.save(knowledge_dir, codec)
                 extraction_results.append(result)
 
+                with span("record_state", stage="extract"):
+                    state_store.record(
+                        paper_id=result.paper_id,
+                        stage="extract",
+                        token_usage=result.token_usage,
+                        item_count=len(result.knowledge_points),
+                        source_file=str(file_path),
+                        output_path=str(result_path),
+                        latency=_elapsed(started, str(file_path)),
+                        breakdown=breakdown(result.paper_title, result.knowledge_points),
+                    )
+                if leases:
+                    leases.finish(f"extract/{result.paper_id}")
+
                 # Update checkpoint
-                checkpoint_manager.update(
-                    stage="extract",
-                    processed_file=file_key,
-                    token_stats=llm_client.get_stats().to_dict(),
-                    knowledge_count=sum(len(r.knowledge_points) for r in extraction_results),
-                )
+                with span("checkpoint", stage="extract"):
+                    checkpoint_manager.update(
+                        stage=extract_stage,
+                        processed_file=str(file_path),
+                        token_stats=llm_client.get_stats().to_dict(histograms=False),
+                        knowledge_count=sum(len(r.knowledge_points) for r in extraction_results),
+                    )
 
                 # Update dashboard
-                stats = llm_client.get_stats()
-                dashboard.update_tokens(
-                    prompt_tokens=stats.total_usage.prompt_tokens,
-                    completion_tokens=stats.total_usage.completion_tokens,
-                    total_tokens=stats.total_usage.total_tokens,
-                    estimated_cost=stats.estimate_cost(),
-                    request_count=stats.request_count,
-                )
+                _update_token_panel(dashboard, llm_client, target_concurrency())
 
                 if "error" in result.token_usage:
                     dashboard.log(f"Error extracting: {file_path.name}", "error")
                 else:
                     dashboard.log(f"Extracted {len(result.knowledge_points)} points: {file_path.name[:30]}", "success")
+                if result.truncation:
+                    stats = TruncationStats.from_dict(result.truncation)
+                    dashboard.log(f"Trimmed {file_path.name[:30]}: {stats.describe()}", "warning")
 
-                dashboard.update_progress("extract", i + 1, len(md_files), "in_progress")
+                progress["extract"] += 1
+                dashboard.update_progress("extract", progress["extract"], len(md_files), "in_progress")
 
-            dashboard.update_progress("extract", len(md_files), len(md_files), "complete")
-            dashboard.log(f"Stage 1 complete: {len(extraction_results)} papers", "success")
-
-            # === Stage 2: QA Generation ===
-            dashboard.log("Starting Stage 2: QA Generation", "info")
-            dashboard.update_progress("generate", 0, len(extraction_results), "in_progress")
-
-            # Get already generated papers
-            generated_set = set()
-            if checkpoint and checkpoint.stage in ["generate", "cross_doc", "complete"]:
-                for qa_file in qa_dir.glob("*.json"):
-                    if qa_file.stem != "cross_doc":
-                        generated_set.add(qa_file.stem)
-
-            for i, extraction_result in enumerate(extraction_results):
-                # Skip if already generated
-                result_path = qa_dir / f"{extraction_result.paper_id}.json"
-                if extraction_result.paper_id in generated_set and result_path.exists():
-                    try:
-                        result = GenerationResult.load(result_path)
-                        if "error" not in result.token_usage and len(result.qa_pairs) > 0:
-                            generation_results.append(result)
-                            dashboard.update_progress("generate", i + 1, len(extraction_results), "in_progress")
-                            continue
-                    except Exception:
-                        pass
-
-                # Skip if no knowledge points
-                if not extraction_result.knowledge_points:
-                    generation_results.append(GenerationResult(
-                        paper_id=extraction_result.paper_id,
-                        paper_title=extraction_result.paper_title,
-                        qa_pairs=[],
-                        token_usage={"skipped": "no knowledge points"},
-                    ))
-                    dashboard.update_progress("generate", i + 1, len(extraction_results), "in_progress")
-                    continue
-
-                # Generate QA pairs
-                dashboard.update_task(
-                    filename=extraction_result.paper_title[:50],
-                    title="",
-                    status="calling_api",
-                    status_message="Generating QA pairs...",
-                )
-
-                result = generator.generate_from_extraction(extraction_result)
-                result.save(qa_dir)
+            def record_generation(extraction_result: ExtractionResult, result: GenerationResult) -> None:
+                with span("save", stage="generate"):
+                    result_path = result.save(qa_dir, codec)
                 generation_results.append(result)
 
+                with span("record_state", stage="generate"):
+                    state_store.record(
+                        paper_id=result.paper_id,
+                        stage="generate",
+                        token_usage=result.token_usage,
+                        item_count=len(result.qa_pairs),
+                        source_file=extraction_result.source_file,
+                        output_path=str(result_path),
+                        latency=_elapsed(started, extraction_result.paper_id),
+                        breakdown=breakdown(result.paper_title, result.qa_pairs),
+                    )
+                if leases:
+                    leases.finish(f"generate/{result.paper_id}")
+
                 # Update checkpoint
-                checkpoint_manager.update(
-                    stage="generate",
-                    token_stats=llm_client.get_stats().to_dict(),
-                    qa_count=sum(len(r.qa_pairs) for r in generation_results),
-                )
+                with span("checkpoint", stage="generate"):
+                    checkpoint_manager.update(
+                        stage="generate",
+                        token_stats=llm_client.get_stats().to_dict(histograms=False),
+                        qa_count=sum(len(r.qa_pairs) for r in generation_results),
+                    )
 
                 # Update dashboard
-                stats = llm_client.get_stats()
-                dashboard.update_tokens(
-                    prompt_tokens=stats.total_usage.prompt_tokens,
-                    completion_tokens=stats.total_usage.completion_tokens,
-                    total_tokens=stats.total_usage.total_tokens,
-                    estimated_cost=stats.estimate_cost(),
-                    request_count=stats.request_count,
-                )
+                _update_token_panel(dashboard, llm_client, target_concurrency())
 
                 if "error" in result.token_usage:
                     dashboard.log(f"Error generating QA: {extraction_result.paper_id[:30]}", "error")
                 else:
                     dashboard.log(f"Generated {len(result.qa_pairs)} QA pairs", "success")
 
-                dashboard.update_progress("generate", i + 1, len(extraction_results), "in_progress")
+                progress["generate"] += 1
+                dashboard.update_progress("generate", progress["generate"], generate_total, "in_progress")
+
+            if pipelined:
+                # === Stages 1+2 pipelined: each paper moves to QA generation as soon as it is extracted ===
+                dashboard.log("Starting Stage 2: QA Generation (pipelined)", "info")
+                generate_total = len(md_files)
+                ready = [r for r in extraction_results if needs_generation(r)]
+                dashboard.update_progress("generate", progress["generate"], generate_total, "in_progress")
+
+                def on_submit(stage: str, item) -> None:
+                    if stage == "first":
+                        on_extract_submit(item)
+                    else:
+                        on_generate_submit(item)
+
+                for stage, item, result in run_pipelined(
+                    extract,
+                    generate,
+                    pending_files,
+                    ready=ready,
+                    forward=needs_generation,
+                    max_workers=concurrency,
+                    on_submit=on_submit,
+                    controller=controller,
+                ):
+                    if stage == "first":
+                        record_extraction(item, result)
+                    else:
+                        record_generation(item, result)
+            else:
+                rounds = [pending_files]
+                if leases:
+                    # Claim papers one at a time as slots free up
+                    rounds = leases.claim_rounds(
+                        pending_files,
+                        key=lambda path: f"extract/{extractor._generate_paper_id(path)}",
+                        done=extracted_elsewhere,
+                    )
+                for files in rounds:
+                    for file_path, result in run_concurrently(
+                        extract,
+                        files,
+                        max_workers=concurrency,
+                        on_submit=on_extract_submit,
+                        controller=controller,
+                    ):
+                        record_extraction(file_path, result)
+
+            # Keep input order regardless of completion order
+            file_order = {str(path): index for index, path in enumerate(md_files)}
+            extraction_results.sort(key=lambda r: file_order.get(r.source_file, len(file_order)))
+
+            dashboard.update_progress("extract", len(md_files), len(md_files), "complete")
+            dashboard.log(f"Stage 1 complete: {len(extraction_results)} papers", "success")
 
-            dashboard.update_progress("generate", len(extraction_results), len(extraction_results), "complete")
+            if not pipelined:
+                # === Stage 2: QA Generation ===
+                dashboard.log("Starting Stage 2: QA Generation", "info")
+                generate_total = len(extraction_results)
+                dashboard.update_progress("generate", 0, generate_total, "in_progress")
+
+                to_generate = [r for r in extraction_results if needs_generation(r)]
+                dashboard.update_progress("generate", progress["generate"], generate_total, "in_progress")
+                rounds = [to_generate]
+                if leases:
+                    rounds = leases.claim_rounds(
+                        to_generate,
+                        key=lambda r: f"generate/{r.paper_id}",
+                        done=generated_elsewhere,
+                    )
+
+                for papers in rounds:
+                    for extraction_result, result in run_concurrently(
+                        generate,
+                        papers,
+                        max_workers=concurrency,
+                        on_submit=on_generate_submit,
+                        controller=controller,
+                    ):
+                        record_generation(extraction_result, result)
+
+            paper_order = {r.paper_id: index for index, r in enumerate(extraction_results)}
+            generation_results.sort(key=lambda r: paper_order.get(r.paper_id, len(paper_order)))
+
+            dashboard.update_progress("generate", generate_total, generate_total, "complete")
             dashboard.log(f"Stage 2 complete: {sum(len(r.qa_pairs) for r in generation_results)} QA pairs", "success")
 
             # === Stage 3: Cross-Document QA ===
@@ -202,10 +457,12 @@ def run_command(
                 dashboard.log("Starting Cross-Document QA Generation", "info")
                 dashboard.update_progress("cross_doc", 0, 1, "in_progress")
 
-                cross_doc_path = qa_dir / "cross_doc.json"
+                cross_doc_path = find_result(qa_dir, "cross_doc", codec)
                 if cross_doc_path.exists():
                     cross_doc_result = GenerationResult.load(cross_doc_path)
                     dashboard.log("Cross-doc QA already exists, skipping", "info")
+                elif leases and not leases.claim("cross_doc/cross_doc"):
+                    dashboard.log("Cross-doc QA is being generated by another worker, skipping", "info")
                 else:
                     dashboard.update_task(
                         filename="Cross-Document",
@@ -214,8 +471,18 @@ def run_command(
                         status_message="Analyzing multiple papers...",
                     )
 
-                    cross_doc_result = generator.generate_cross_doc_qa(extraction_results)
-                    cross_doc_result.save(qa_dir)
+                    cross_doc_start = time.monotonic()
+                    with span("cross_doc", papers=len(extraction_results)):
+                        cross_doc_result = generator.generate_cross_doc_qa(extraction_results)
+                    state_store.record(
+                        paper_id=cross_doc_result.paper_id,
+                        stage="cross_doc",
+                        token_usage=cross_doc_result.token_usage,
+                        item_count=len(cross_doc_result.qa_pairs),
+                        output_path=str(cross_doc_result.save(qa_dir, codec)),
+                        latency=time.monotonic() - cross_doc_start,
+                        breakdown=breakdown(cross_doc_result.paper_title, cross_doc_result.qa_pairs),
+                    )
 
                     dashboard.log(f"Generated {len(cross_doc_result.qa_pairs)} cross-doc QA pairs", "success")
 
@@ -227,13 +494,24 @@ def run_command(
             dashboard.update_task(status="success", status_message="Complete!")
 
             # Small delay to show final state
-            time.sleep(0.5)
+            if events is None:
+                time.sleep(0.5)
+
+        # Mark complete, before the checkpoint is closed so it reaches the disk
+        checkpoint_manager.update(stage="complete", token_stats=llm_client.get_stats().to_dict())
 
     finally:
+        if metrics.enabled:
+            metrics.stop()
+        if tracer:
+            tracer.stop()
+            trace_path = tracer.save(monitoring.trace_file)
+        extractor.close()
         llm_client.close()
-
-    # Mark complete
-    checkpoint_manager.update(stage="complete")
+        checkpoint_manager.close()
+        state_store.close()
+        if leases:
+            leases.close()
 
     # Calculate final stats
     duration = time.time() - start_time
@@ -242,6 +520,9 @@ def run_command(
     cross_doc_qa = len(cross_doc_result.qa_pairs) if cross_doc_result else 0
 
     stats = llm_client.get_stats()
+    latency = stats.latency_summary()
+    if stats.ttft.count:
+        latency["ttft"] = stats.ttft.summary()
 
     # Category distribution
     category_counts = Counter()
@@ -252,19 +533,47 @@ def run_command(
         for qa in cross_doc_result.qa_pairs:
             category_counts[qa.category] += 1
 
-    # Print results summary
-    print_results_summary(
-        console=console,
-        papers=len(extraction_results),
-        knowledge=total_knowledge,
-        qa_pairs=total_qa,
-        cross_doc=cross_doc_qa,
-        tokens=stats.total_usage.total_tokens,
-        cost=stats.estimate_cost(),
-        duration=duration,
-        category_data=dict(category_counts) if category_counts else None,
-        theme=theme,
-    )
+    if events is not None:
+        events.emit(
+            "run_end",
+            papers=len(extraction_results),
+            knowledge_points=total_knowledge,
+            qa_pairs=total_qa,
+            cross_doc_qa_pairs=cross_doc_qa,
+            tokens=stats.total_usage.total_tokens,
+            cost=round(stats.estimate_cost(), 6),
+            duration=round(duration, 3),
+            categories=dict(category_counts),
+            latency=latency,
+            retries=stats.retries,
+            retry_errors=stats.retry_errors,
+            retry_seconds=round(stats.retry_seconds, 3),
+            **({"trace_file": str(trace_path)} if tracer else {}),
+        )
+    else:
+        # Print results summary
+        print_results_summary(
+            console=console,
+            papers=len(extraction_results),
+            knowledge=total_knowledge,
+            qa_pairs=total_qa,
+            cross_doc=cross_doc_qa,
+            tokens=stats.total_usage.total_tokens,
+            cost=stats.estimate_cost(),
+            duration=duration,
+            category_data=dict(category_counts) if category_counts else None,
+            theme=theme,
+            latency=latency,
+            retries=stats.retries,
+            retry_seconds=stats.retry_seconds,
+            retry_errors=stats.retry_errors,
+        )
+
+    if tracer and events is None:
+        console.print(
+            f"[{theme.success}]{Icons.SUCCESS}[/] Trace of {tracer.event_count} events written to "
+            f"[{theme.primary}]{trace_path}[/] (open in https://ui.perfetto.dev)"
+        )
 
     return {
         "papers_processed": len(extraction_results),
@@ -273,3 +582,62 @@ def run_command(
         "token_usage": stats.to_dict(),
         "duration": duration,
     }
+
+
+def _update_token_panel(dashboard: Dashboard, llm_client: LLMClient, concurrency: int) -> None:
+    """Push the client's token, cache and concurrency stats to the dashboard."""
+    stats = llm_client.get_stats()
+    dashboard.update_tokens(
+        prompt_tokens=stats.total_usage.prompt_tokens,
+        completion_tokens=stats.total_usage.completion_tokens,
+        total_tokens=stats.total_usage.total_tokens,
+        estimated_cost=stats.estimate_cost(),
+        request_count=stats.request_count,
+        cache_hits=stats.cache_hits,
+        cache_misses=stats.cache_misses,
+        latency=stats.latency_summary()["all"],
+        retries=stats.retries,
+        retry_seconds=stats.retry_seconds,
+    )
+    dashboard.update_concurrency(in_flight=stats.in_flight, target=concurrency)
+
+
+def _load_shared(path: Path, load, count, this_run: bool, resume: bool):
+    """A result saved by any worker, if it counts as done.
+
+    Anything finished in this run (by any worker, see LeaseManager.finish)
+    counts, failures included, so workers don't retry each other's failures
+    within a run. Older results count when resuming and successful.
+    """
+    if not this_run and not resume:
+        return None
+    try:
+        result = load(path)
+    except Exception:
+        return None
+    if this_run:
+        return result
+    status, _ = classify(result.token_usage, count(result))
+    return result if resume and status == SUCCESS else None
+
+
+def _finished_paths(finished: dict) -> dict[str, Path]:
+    """Result files of papers a stage finished successfully, by paper ID."""
+    return {
+        paper_id: Path(state.output_path)
+        for paper_id, state in finished.items()
+        if state.status == SUCCESS and state.output_path and Path(state.output_path).exists()
+    }
+
+
+def _elapsed(started: dict[str, float], key: str) -> Optional[float]:
+    """Seconds since a paper was submitted, if it was."""
+    start = started.pop(key, None)
+    return time.monotonic() - start if start is not None else None
+
+
+def _calling_message(message: str, concurrency: int) -> str:
+    """Status message for the task panel, noting parallel requests."""
+    if concurrency > 1:
+        return f"{message} (up to {concurrency} in flight)"
+    return message
@@ -8,69 +8,38 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
-from ..stage1_extractor import ExtractionResult
-from ..stage2_generator import GenerationResult
+from ..state_store import StateStore, ERROR, RUNNING, SUCCESS
 from ..ui.themes import get_theme, Icons
 from ..ui.panels import CategoryChart, ResultsSummary
 
 
-def stats_command(output_dir: str, console: Console, detailed: bool = False) -> None:
+def stats_command(output_dir: str, console: Console, detailed: bool = False, rebuild: bool = False) -> None:
     """Show detailed statistics about generated QA pairs."""
     theme = get_theme()
     output_path = Path(output_dir)
 
     qa_dir = output_path / "qa_pairs"
-    knowledge_dir = output_path / "knowledge"
 
     if not qa_dir.exists():
         console.print(f"[{theme.error}]{Icons.ERROR} No QA pairs found in {output_dir}[/]")
         return
 
-    # Load all results
-    qa_results = []
-    for json_file in qa_dir.glob("*.json"):
-        try:
-            qa_results.append(GenerationResult.load(json_file))
-        except Exception:
-            pass
-
-    knowledge_results = []
-    if knowledge_dir.exists():
-        for json_file in knowledge_dir.glob("*.json"):
-            try:
-                knowledge_results.append(ExtractionResult.load(json_file))
-            except Exception:
-                pass
-
-    if not qa_results:
+    # Everything below comes from the manifest; no result file is opened
+    manifest = StateStore.load_manifest(output_path, rebuild=rebuild, papers=detailed)
+    generate = manifest.stage("generate")
+    cross_doc_qa = manifest.stage("cross_doc").items
+
+    if generate.items == 0 and cross_doc_qa == 0:
         console.print(f"[{theme.warning}]{Icons.WARNING} No QA pairs found[/]")
         return
 
-    # Calculate statistics
-    total_qa = sum(len(r.qa_pairs) for r in qa_results)
-    total_knowledge = sum(len(r.knowledge_points) for r in knowledge_results)
-    cross_doc_qa = 0
-
-    # Separate cross-doc results
-    regular_results = []
-    for r in qa_results:
-        if r.paper_id == "cross_doc":
-            cross_doc_qa = len(r.qa_pairs)
-        else:
-            regular_results.append(r)
+    total_knowledge = manifest.stage("extract").items
+    papers_with_qa = generate.count(SUCCESS)
 
     # Distributions
-    category_counts = Counter()
-    difficulty_counts = Counter()
-    reasoning_counts = Counter()
-    qa_per_paper = []
-
-    for result in regular_results:
-        qa_per_paper.append(len(result.qa_pairs))
-        for qa in result.qa_pairs:
-            category_counts[qa.category] += 1
-            difficulty_counts[qa.difficulty] += 1
-            reasoning_counts[qa.reasoning_type] += 1
+    category_counts = generate.categories
+    difficulty_counts = generate.difficulties
+    reasoning_counts = generate.reasoning_types
 
     # === Header ===
     console.print()
@@ -79,19 +48,19 @@ def stats_command(output_dir: str, console: Console, detailed: bool = False) ->
 
     # === Summary Panel ===
     summary = ResultsSummary(
-        papers_processed=len(regular_results),
+        papers_processed=generate.papers - generate.count(RUNNING),
         knowledge_points=total_knowledge,
-        qa_pairs=total_qa - cross_doc_qa,
+        qa_pairs=generate.items,
         cross_doc_qa=cross_doc_qa,
     )
     console.print(summary)
     console.print()
 
     # === Per-Paper Stats ===
-    if qa_per_paper:
-        avg_qa = sum(qa_per_paper) / len(qa_per_paper)
-        min_qa = min(qa_per_paper)
-        max_qa = max(qa_per_paper)
+    if papers_with_qa:
+        avg_qa = generate.items / papers_with_qa
+        min_qa = generate.min_items
+        max_qa = generate.max_items
 
         stats_table = Table.grid(padding=(0, 4))
         stats_table.add_column()
@@ -105,6 +74,12 @@ def stats_command(output_dir: str, console: Console, detailed: bool = False) ->
             f"[{theme.text_dim}]Min/Max[/]",
             f"[{theme.primary}]{min_qa}/{max_qa}[/]",
         )
+        stats_table.add_row(
+            f"[{theme.text_dim}]Total Tokens[/]",
+            f"[{theme.primary}]{manifest.total_tokens:,}[/]",
+            f"[{theme.text_dim}]Errors[/]",
+            f"[{theme.primary}]{generate.count(ERROR)}[/]",
+        )
 
         console.print(Panel(
             stats_table,
@@ -116,24 +91,24 @@ def stats_command(output_dir: str, console: Console, detailed: bool = False) ->
 
     # === Category Distribution ===
     if category_counts:
-        chart = CategoryChart(dict(category_counts), "Category Distribution")
+        chart = CategoryChart(category_counts, "Category Distribution")
         console.print(chart)
         console.print()
 
     # === Difficulty Distribution ===
     if difficulty_counts:
-        chart = CategoryChart(dict(difficulty_counts), "Difficulty Distribution")
+        chart = CategoryChart(difficulty_counts, "Difficulty Distribution")
         console.print(chart)
         console.print()
 
     # === Reasoning Type Distribution ===
     if reasoning_counts:
-        chart = CategoryChart(dict(reasoning_counts), "Reasoning Type Distribution")
+        chart = CategoryChart(reasoning_counts, "Reasoning Type Distribution")
         console.print(chart)
         console.print()
 
     # === Detailed Per-Paper Table ===
-    if detailed and regular_results:
+    if detailed and generate.sizes:
         paper_table = Table(
             title="Per-Paper Breakdown",
             title_style=theme.title,
@@ -146,23 +121,25 @@ def stats_command(output_dir: str, console: Console, detailed: bool = False) ->
         paper_table.add_column("QA", justify="right", style=theme.primary)
         paper_table.add_column("Categories", style=theme.text_dim)
 
-        for i, result in enumerate(regular_results[:20], 1):
-            cats = Counter(qa.category for qa in result.qa_pairs)
+        paper_ids = list(generate.sizes)
+        for i, paper_id in enumerate(paper_ids[:20], 1):
+            cats = Counter(generate.paper_categories.get(paper_id, {}))
             top_cats = ", ".join(c[:15] for c, _ in cats.most_common(2))
 
-            title = result.paper_title[:38] if len(result.paper_title) > 38 else result.paper_title
-            if len(result.paper_title) > 38:
+            paper_title = generate.titles.get(paper_id) or paper_id
+            title = paper_title[:38] if len(paper_title) > 38 else paper_title
+            if len(paper_title) > 38:
                 title += "..."
 
             paper_table.add_row(
                 str(i),
                 title,
-                str(len(result.qa_pairs)),
+                str(generate.sizes[paper_id]),
                 top_cats,
             )
 
-        if len(regular_results) > 20:
-            paper_table.add_row("...", f"({len(regular_results) - 20} more papers)", "", "")
+        if len(paper_ids) > 20:
+            paper_table.add_row("...", f"({len(paper_ids) - 20} more papers)", "", "")
 
         console.print(paper_table)
         console.print()
@@ -9,62 +9,27 @@ from rich.table import Table
 from rich.text import Text
 
 from ..checkpoint import CheckpointManager
-from ..stage1_extractor import ExtractionResult
-from ..stage2_generator import GenerationResult
+from ..histogram import Histogram
+from ..manifest import StageManifest
+from ..state_store import StateStore, ERROR, RUNNING, SKIPPED
 from ..ui.themes import get_theme, Icons
 
 
-def status_command(output_dir: str, console: Console) -> None:
+def status_command(output_dir: str, console: Console, rebuild: bool = False) -> None:
     """Show current pipeline status and checkpoint information."""
     theme = get_theme()
     output_path = Path(output_dir)
 
-    # Check directories
-    knowledge_dir = output_path / "knowledge"
-    qa_dir = output_path / "qa_pairs"
-
     # Load checkpoint
     checkpoint_manager = CheckpointManager(output_path)
     checkpoint = checkpoint_manager.load()
 
-    # Count files and results
-    knowledge_files = list(knowledge_dir.glob("*.json")) if knowledge_dir.exists() else []
-    qa_files = [f for f in qa_dir.glob("*.json") if f.stem != "cross_doc"] if qa_dir.exists() else []
-    cross_doc_file = qa_dir / "cross_doc.json" if qa_dir.exists() else None
-
-    # Load and analyze results
-    total_knowledge = 0
-    total_qa = 0
-    errors_knowledge = 0
-    errors_qa = 0
-
-    for f in knowledge_files:
-        try:
-            result = ExtractionResult.load(f)
-            if "error" in result.token_usage:
-                errors_knowledge += 1
-            else:
-                total_knowledge += len(result.knowledge_points)
-        except Exception:
-            errors_knowledge += 1
-
-    for f in qa_files:
-        try:
-            result = GenerationResult.load(f)
-            if "error" in result.token_usage:
-                errors_qa += 1
-            else:
-                total_qa += len(result.qa_pairs)
-        except Exception:
-            errors_qa += 1
-
-    cross_doc_qa = 0
-    if cross_doc_file and cross_doc_file.exists():
-        try:
-            result = GenerationResult.load(cross_doc_file)
-            cross_doc_qa = len(result.qa_pairs)
-        except Exception:
-            pass
+    # Count results from the manifest, without opening any result file
+    indexed = StateStore.exists_for(output_path)
+    manifest = StateStore.load_manifest(output_path, rebuild=rebuild)
+    knowledge_count, total_knowledge, errors_knowledge = _counts(manifest.stage("extract"))
+    qa_count, total_qa, errors_qa = _counts(manifest.stage("generate"))
+    cross_doc_qa = manifest.stage("cross_doc").items
 
     # Build status table
     table = Table.grid(padding=(0, 2))
@@ -85,21 +50,21 @@ def status_command(output_dir: str, console: Console) -> None:
     table.add_row("─" * 15, "─" * 12, "─" * 8, "─" * 12, "─" * 8)
 
     # Stage 1: Extract
-    extract_status = _get_stage_status("extract", checkpoint, len(knowledge_files), errors_knowledge)
+    extract_status = _get_stage_status("extract", checkpoint, knowledge_count, errors_knowledge)
     table.add_row(
         "Extract",
         extract_status,
-        f"{len(knowledge_files)}",
+        f"{knowledge_count}",
         f"{total_knowledge} points",
         f"[{theme.error}]{errors_knowledge}[/]" if errors_knowledge > 0 else f"[{theme.success}]0[/]",
     )
 
     # Stage 2: Generate
-    generate_status = _get_stage_status("generate", checkpoint, len(qa_files), errors_qa)
+    generate_status = _get_stage_status("generate", checkpoint, qa_count, errors_qa)
     table.add_row(
         "Generate",
         generate_status,
-        f"{len(qa_files)}",
+        f"{qa_count}",
         f"{total_qa} pairs",
         f"[{theme.error}]{errors_qa}[/]" if errors_qa > 0 else f"[{theme.success}]0[/]",
     )
@@ -136,6 +101,19 @@ def status_command(output_dir: str, console: Console) -> None:
             info_lines.append(f"[{theme.text_dim}]Tokens Used:[/] [{theme.primary}]{tokens:,}[/]")
             info_lines.append(f"[{theme.text_dim}]Est. Cost:[/]   [{theme.success}]${cost:.2f}[/]")
 
+            # Request latency over every stage's histogram
+            latency = Histogram()
+            for data in checkpoint.token_stats.get("latency", {}).values():
+                latency.merge(Histogram.from_dict(data))
+            if latency.count:
+                info_lines.append(
+                    f"[{theme.text_dim}]Latency:[/]     [{theme.text}]p50 {latency.percentile(50):.1f}s / "
+                    f"p95 {latency.percentile(95):.1f}s / p99 {latency.percentile(99):.1f}s[/]"
+                )
+            retries = checkpoint.token_stats.get("retries", 0)
+            if retries:
+                info_lines.append(f"[{theme.text_dim}]Retries:[/]     [{theme.warning}]{retries:,}[/]")
+
         console.print()
         console.print(Panel(
             "\n".join(info_lines),
@@ -144,6 +122,13 @@ def status_command(output_dir: str, console: Console) -> None:
             padding=(0, 1),
         ))
 
+    if not indexed and not rebuild:
+        console.print()
+        console.print(
+            f"[{theme.text_dim}]{Icons.INFO} No state database yet; counted from the result files. "
+            f"Run with --rebuild to index them once.[/]"
+        )
+
     # Warnings
     if errors_knowledge > 0 or errors_qa > 0:
         console.print()
@@ -152,6 +137,13 @@ def status_command(output_dir: str, console: Console) -> None:
     console.print()
 
 
+def _counts(stage: StageManifest) -> tuple[int, int, int]:
+    """A stage's (files, items, errors)."""
+    # Running and skipped papers have no result file
+    files = stage.papers - stage.count(RUNNING) - stage.count(SKIPPED)
+    return files, stage.items, stage.count(ERROR)
+
+
 def _get_stage_status(stage: str, checkpoint, file_count: int, error_count: int) -> str:
     """Get status display for a stage."""
     theme = get_theme()
@@ -8,8 +8,9 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
-from ..stage1_extractor import ExtractionResult
-from ..stage2_generator import GenerationResult
+from ..loader import load_records, result_files
+from ..state_store import StateStore
+from ..storage import result_name
 from ..ui.themes import get_theme, Icons
 from ..ui.panels import CategoryChart
 
@@ -30,29 +31,21 @@ def validate_command(output_dir: str, console: Console, fix: bool = False) -> No
     knowledge_errors = []
 
     if knowledge_dir.exists():
-        for f in sorted(knowledge_dir.glob("*.json")):
-            try:
-                result = ExtractionResult.load(f)
-                if "error" in result.token_usage:
-                    knowledge_errors.append({
-                        "file": f.name,
-                        "error": result.token_usage.get("error", "Unknown error"),
-                        "path": f,
-                    })
-                elif len(result.knowledge_points) == 0:
-                    knowledge_errors.append({
-                        "file": f.name,
-                        "error": "No knowledge points extracted",
-                        "path": f,
-                    })
-                else:
-                    knowledge_results.append(result)
-            except Exception as e:
+        for result in load_records(result_files(knowledge_dir), "knowledge_points"):
+            if result.error:
+                knowledge_errors.append({
+                    "file": result.path.name,
+                    "error": result.error,
+                    "path": result.path,
+                })
+            elif result.item_count == 0:
                 knowledge_errors.append({
-                    "file": f.name,
-                    "error": f"Failed to load: {str(e)[:50]}",
-                    "path": f,
+                    "file": result.path.name,
+                    "error": "No knowledge points extracted",
+                    "path": result.path,
                 })
+            else:
+                knowledge_results.append(result)
     else:
         issues.append("Knowledge directory not found")
 
@@ -61,31 +54,21 @@ def validate_command(output_dir: str, console: Console, fix: bool = False) -> No
     qa_errors = []
 
     if qa_dir.exists():
-        for f in sorted(qa_dir.glob("*.json")):
-            if f.stem == "cross_doc":
-                continue
-            try:
-                result = GenerationResult.load(f)
-                if "error" in result.token_usage:
-                    qa_errors.append({
-                        "file": f.name,
-                        "error": result.token_usage.get("error", "Unknown error"),
-                        "path": f,
-                    })
-                elif len(result.qa_pairs) == 0:
-                    qa_errors.append({
-                        "file": f.name,
-                        "error": "No QA pairs generated",
-                        "path": f,
-                    })
-                else:
-                    qa_results.append(result)
-            except Exception as e:
+        for result in load_records(result_files(qa_dir, include_cross_doc=False), "qa_pairs"):
+            if result.error:
                 qa_errors.append({
-                    "file": f.name,
-                    "error": f"Failed to load: {str(e)[:50]}",
-                    "path": f,
+                    "file": result.path.name,
+                    "error": result.error,
+                    "path": result.path,
                 })
+            elif result.item_count == 0:
+                qa_errors.append({
+                    "file": result.path.name,
+                    "error": "No QA pairs generated",
+                    "path": result.path,
+                })
+            else:
+                qa_results.append(result)
 
     # === Summary Panel ===
     console.print()
@@ -109,8 +92,8 @@ def validate_command(output_dir: str, console: Console, fix: bool = False) -> No
         f"[{theme.error}]{len(qa_errors)}[/]" if qa_errors else f"[{theme.success}]0[/]",
     )
 
-    total_knowledge = sum(len(r.knowledge_points) for r in knowledge_results)
-    total_qa = sum(len(r.qa_pairs) for r in qa_results)
+    total_knowledge = sum(r.item_count for r in knowledge_results)
+    total_qa = sum(r.item_count for r in qa_results)
 
     summary_table.add_row(
         f"[{theme.text}]Total Knowledge[/]",
@@ -170,8 +153,7 @@ def validate_command(output_dir: str, console: Console, fix: bool = False) -> No
 
         category_counts = Counter()
         for result in knowledge_results:
-            for kp in result.knowledge_points:
-                category_counts[kp.category] += 1
+            category_counts.update(result.categories)
 
         # Check for missing or underrepresented categories
         expected_categories = [
@@ -200,9 +182,8 @@ def validate_command(output_dir: str, console: Console, fix: bool = False) -> No
         reasoning_counts = Counter()
 
         for result in qa_results:
-            for qa in result.qa_pairs:
-                difficulty_counts[qa.difficulty] += 1
-                reasoning_counts[qa.reasoning_type] += 1
+            difficulty_counts.update(result.difficulties)
+            reasoning_counts.update(result.reasoning_types)
 
         diff_chart = CategoryChart(dict(difficulty_counts), "Difficulty Distribution")
         console.print(diff_chart)
@@ -222,19 +203,24 @@ def validate_command(output_dir: str, console: Console, fix: bool = False) -> No
         console.print()
         console.print(f"[{theme.info}]{Icons.INFO} Removing {len(knowledge_errors) + len(qa_errors)} error files for re-processing...[/]")
 
-        for err in knowledge_errors:
-            try:
-                err["path"].unlink()
-                console.print(f"  [{theme.text_dim}]Removed:[/] {err['file']}")
-            except Exception:
-                pass
-
-        for err in qa_errors:
+        removed = []
+        for stage, errors in (("extract", knowledge_errors), ("generate", qa_errors)):
+            for err in errors:
+                try:
+                    err["path"].unlink()
+                    console.print(f"  [{theme.text_dim}]Removed:[/] {err['file']}")
+                    removed.append((result_name(err["path"]), stage))
+                except Exception:
+                    pass
+
+        # Forget their state rows too, so status/stats stop counting them
+        for path in StateStore.databases(output_path):
+            state_store = StateStore(path)
             try:
-                err["path"].unlink()
-                console.print(f"  [{theme.text_dim}]Removed:[/] {err['file']}")
-            except Exception:
-                pass
+                for paper_id, stage in removed:
+                    state_store.delete(paper_id, stage)
+            finally:
+                state_store.close()
 
         console.print()
         console.print(f"[{theme.success}]{Icons.SUCCESS} Run the pipeline again to re-process these files.[/]")
@@ -0,0 +1,212 @@
+"""Bounded concurrent execution for pipeline stages."""
+
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+R = TypeVar("R")
+S = TypeVar("S")
+
+
+class AdaptiveConcurrency:
+    """AIMD controller for the number of requests kept in flight.
+
+    Register on_request as an LLM client listener. Every successful request
+    adds 1/limit to the target, i.e. roughly +1 per round of requests, as
+    long as the p95 latency of the recent window stays within
+    latency_tolerance of the best p95 seen. A 429, timeout or 5xx cuts the
+    target by decrease_factor and restarts the latency window.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int = 1,
+        maximum: int = 32,
+        window: int = 20,
+        latency_tolerance: float = 1.5,
+        decrease_factor: float = 0.5,
+    ):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self._limit = float(min(max(initial, minimum), self.maximum))
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._baseline_p95: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        """Current target for in-flight requests."""
+        return int(self._limit)
+
+    @staticmethod
+    def is_congestion(error: BaseException) -> bool:
+        """Whether an error signals that the provider is overloaded."""
+        if isinstance(error, httpx.TimeoutException):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status == 429 or status >= 500
+        return False
+
+    def on_request(self, latency: float, error: Optional[BaseException] = None) -> None:
+        """Feed one request outcome into the controller."""
+        with self._lock:
+            if error is not None:
+                if self.is_congestion(error):
+                    self._limit = max(float(self.minimum), self._limit * self.decrease_factor)
+                    self._latencies.clear()
+                # Other errors (bad JSON, auth) say nothing about capacity
+                return
+
+            self._latencies.append(latency)
+            if len(self._latencies) < self._latencies.maxlen:
+                return
+
+            ordered = sorted(self._latencies)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+            # Let the baseline drift up slowly so it re-learns after the
+            # gateway's capacity changes
+            if self._baseline_p95 is None:
+                self._baseline_p95 = p95
+            else:
+                self._baseline_p95 = min(p95, self._baseline_p95 * 1.01)
+
+            if p95 <= self._baseline_p95 * self.latency_tolerance:
+                self._limit = min(float(self.maximum), self._limit + 1.0 / self._limit)
+
+
+def run_concurrently(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int = 1,
+    on_submit: Optional[Callable[[T], None]] = None,
+    controller: Optional[AdaptiveConcurrency] = None,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Iterator[tuple[T, R]]:
+    """Run func over items keeping at most max_workers calls in flight.
+
+    Yields (item, result) pairs in completion order. Items are submitted
+    lazily, so only max_workers calls are ever queued, and on_submit is
+    invoked from the calling thread right before each item is started.
+    Results are consumed on the calling thread, which keeps checkpoint and
+    dashboard updates single-threaded. With a controller, the in-flight
+    window follows controller.limit instead of max_workers. Calls run on
+    a pool of their own unless a shared executor is given.
+    """
+    if controller is None and max_workers <= 1:
+        for item in items:
+            if on_submit:
+                on_submit(item)
+            yield item, func(item)
+        return
+
+    pool_size = controller.maximum if controller else max_workers
+    iterator = iter(items)
+    pending: dict[Future, T] = {}
+    owned = executor is None
+    if owned:
+        executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="qa-worker")
+
+    try:
+        exhausted = False
+        while True:
+            # Top up the in-flight window
+            window = controller.limit if controller else max_workers
+            while not exhausted and len(pending) < window:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                if on_submit:
+                    on_submit(item)
+                pending[executor.submit(func, item)] = item
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                yield item, future.result()
+    finally:
+        # Drop queued work if the consumer stops early (error or Ctrl+C)
+        if owned:
+            executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            for future in pending:
+                future.cancel()
+            wait(pending)
+
+
+def run_pipelined(
+    first: Callable[[T], R],
+    second: Callable[[R], S],
+    items: Iterable[T],
+    ready: Iterable[R] = (),
+    forward: Optional[Callable[[R], bool]] = None,
+    max_workers: int = 1,
+    on_submit: Optional[Callable[[str, Any], None]] = None,
+    controller: Optional[AdaptiveConcurrency] = None,
+) -> Iterator[tuple[str, Any, Any]]:
+    """Run two dependent stages as a producer/consumer pipeline.
+
+    Yields ("first", item, result) and ("second", input, result) events in
+    completion order on the calling thread. Once the caller has handled a
+    "first" event (e.g. saved the result), the result is queued for the
+    second stage unless forward() rejects it; items in ready are queued up
+    front. Both stages share one in-flight window and queued second-stage
+    work always takes the next free slot, so the hand-off queue never
+    outgrows the window and each item finishes roughly two requests after
+    it starts, instead of waiting for the whole first stage.
+    """
+    pool_size = controller.maximum if controller else max_workers
+    iterator = iter(items)
+    handoff: deque = deque(ready)
+    pending: dict[Future, tuple[str, Any]] = {}
+    executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="qa-worker")
+
+    def submit(stage: str, func: Callable, item: Any) -> None:
+        if on_submit:
+            on_submit(stage, item)
+        pending[executor.submit(func, item)] = (stage, item)
+
+    try:
+        exhausted = False
+        while True:
+            # Top up the in-flight window, downstream work first
+            window = controller.limit if controller else max_workers
+            while len(pending) < window:
+                if handoff:
+                    submit("second", second, handoff.popleft())
+                    continue
+                if exhausted:
+                    break
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                submit("first", first, item)
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, item = pending.pop(future)
+                result = future.result()
+                yield stage, item, result
+                if stage == "first" and (forward is None or forward(result)):
+                    handoff.append(result)
+    finally:
+        # Drop queued work if the consumer stops early (error or Ctrl+C)
+        executor.shutdown(wait=True, cancel_futures=True)
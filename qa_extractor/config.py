@@ -16,10 +16,30 @@ class LLMConfig(BaseModel):
     model: str = Field(default="gpt-4o")
     temperature: float = Field(default=0.7, ge=0, le=2)
     max_tokens: int = Field(default=4096, gt=0)
+    context_window: int = Field(default=128000, gt=0)  # prompt + completion limit
     timeout: int = Field(default=120, gt=0)
     retry_attempts: int = Field(default=3, ge=0)
     retry_delay: int = Field(default=5, ge=0)
 
+    # Token counting: "auto" (tiktoken, approximate if it can't load),
+    # "tiktoken" or "estimate"; BPE files are read from tokenizer_cache_dir
+    tokenizer: str = Field(default="auto", pattern="^(auto|tiktoken|estimate)$")
+    tokenizer_cache_dir: str = Field(default="")
+
+    # Connection pool
+    max_connections: int = Field(default=20, gt=0)
+    max_keepalive_connections: int = Field(default=10, ge=0)
+    keepalive_expiry: float = Field(default=30.0, ge=0)
+    http2: bool = Field(default=False)
+
+    # Streaming (SSE) completions
+    stream: bool = Field(default=False)
+    stream_max_invalid_items: int = Field(default=5, gt=0)
+
+    # Client-side rate limits (0 = unlimited)
+    requests_per_minute: int = Field(default=0, ge=0)
+    tokens_per_minute: int = Field(default=0, ge=0)
+
 
 class PipelineConfig(BaseModel):
     """Pipeline configuration."""
@@ -28,6 +48,22 @@ class PipelineConfig(BaseModel):
     output_dir: str = Field(default="./output")
     batch_size: int = Field(default=10, gt=0)
     checkpoint_interval: int = Field(default=5, gt=0)
+    concurrency: int = Field(default=1, gt=0)
+    adaptive_concurrency: bool = Field(default=False)
+    max_concurrency: int = Field(default=32, gt=0)
+    pipelined: bool = Field(default=False)
+
+    # Several workers sharing output_dir, coordinated by per-paper leases
+    distributed: bool = Field(default=False)
+    worker_id: str = Field(default="")  # empty = <hostname>-<pid>
+    lease_ttl: float = Field(default=300.0, gt=0)  # seconds
+
+    # Static partition "i/N": process only shard i of N into <output_dir>/shard-i-of-N
+    shard: str = Field(default="", pattern=r"^(\d+/\d+)?$")
+
+    # Knowledge/QA result files: "none" (indented .json), "gzip" (.json.gz)
+    # or "zstd" (.json.zst, needs zstandard); any of them are read back
+    storage_codec: str = Field(default="none", pattern="^(none|gzip|zstd)$")
 
 
 class QASettings(BaseModel):
@@ -39,10 +75,39 @@ class QASettings(BaseModel):
     cross_doc_sample_size: int = Field(default=50, gt=0)
 
 
+class ExtractionConfig(BaseModel):
+    """Stage 1 extraction settings."""
+
+    enable_chunking: bool = Field(default=False)
+    chunk_tokens: int = Field(default=12000, gt=0)
+    chunk_concurrency: int = Field(default=4, gt=0)
+
+
+class CacheConfig(BaseModel):
+    """LLM response cache configuration."""
+
+    enabled: bool = Field(default=True)
+    cache_dir: str = Field(default="")  # empty = <output_dir>/.cache
+    max_size_mb: int = Field(default=1024, gt=0)
+
+
 class MonitoringConfig(BaseModel):
     """Monitoring configuration."""
 
     show_live_log: bool = Field(default=True)
+    # tui: false replaces the live dashboard with JSON-lines events, written
+    # to events_file (appended) or stdout when it is empty
+    tui: bool = Field(default=True)
+    events_file: str = Field(default="")
+
+    # Prometheus metrics: served at http://metrics_host:metrics_port/metrics
+    # (0 = off) and/or rewritten to metrics_textfile every metrics_interval s
+    metrics_port: int = Field(default=0, ge=0, le=65535)
+    metrics_host: str = Field(default="127.0.0.1")
+    metrics_textfile: str = Field(default="")
+    metrics_interval: float = Field(default=15.0, gt=0)
+    # Chrome Trace Event timeline of the run, written when it ends (empty = off)
+    trace_file: str = Field(default="")
     log_file: str = Field(default="./output/qa_extractor.log")
     save_token_stats: bool = Field(default=True)
 
@@ -66,6 +131,8 @@ class Config(BaseModel):
     llm: LLMConfig = Field(default_factory=LLMConfig)
     pipeline: PipelineConfig = Field(default_factory=PipelineConfig)
     qa_settings: QASettings = Field(default_factory=QASettings)
+    extraction: ExtractionConfig = Field(default_factory=ExtractionConfig)
+    cache: CacheConfig = Field(default_factory=CacheConfig)
     monitoring: MonitoringConfig = Field(default_factory=MonitoringConfig)
     categories: list[str] = Field(default_factory=lambda: DEFAULT_CATEGORIES.copy())
 
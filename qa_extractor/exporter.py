@@ -1,125 +1,293 @@
-"""Export QA pairs to various formats."""
+"""Export QA pairs and knowledge points to various formats."""
 
 import json
+import shutil
+import tempfile
 import time
 from collections import Counter
+from contextlib import ExitStack
 from pathlib import Path
-from typing import Optional
+from typing import IO, Iterable, Iterator, Optional
 
+from .columnar import COLUMNAR_FORMATS, KNOWLEDGE_COLUMNS, QA_COLUMNS, ColumnarWriter
 from .config import Config
+from .loader import iter_loaded, result_files
+from .storage import atomic_open
+from .stage1_extractor import ExtractionResult
 from .stage2_generator import GenerationResult, QAPair
 
 
+def _indent(text: str, prefix: str) -> str:
+    """Indent every line after the first (json.dumps output nested in a container)."""
+    return text.replace("\n", "\n" + prefix)
+
+
+class JsonArrayWriter:
+    """Write {"meta": ..., "qa_pairs": [...]} one item at a time.
+
+    The output is byte-identical to json.dump(..., indent=2) of the whole
+    object, but only one item is ever encoded at once.
+    """
+
+    def __init__(self, f: IO[str], key: str = "qa_pairs"):
+        self.f = f
+        self.key = key
+        self.count = 0
+
+    def write_head(self, meta: Optional[dict] = None) -> None:
+        meta_json = _indent(json.dumps(meta or {}, indent=2, ensure_ascii=False), "  ")
+        self.f.write(f'{{\n  "meta": {meta_json},\n  "{self.key}": [')
+
+    def write_item(self, item: dict) -> None:
+        self.f.write(self.format_item(item, first=self.count == 0))
+        self.count += 1
+
+    @staticmethod
+    def format_item(item: dict, first: bool) -> str:
+        item_json = _indent(json.dumps(item, indent=2, ensure_ascii=False), "    ")
+        return ("\n    " if first else ",\n    ") + item_json
+
+    def write_tail(self) -> None:
+        self.f.write(("\n  ]" if self.count else "]") + "\n}")
+
+
+class JsonlWriter:
+    """Write one JSON object per line."""
+
+    def __init__(self, f: IO[str]):
+        self.f = f
+        self.count = 0
+
+    def write_item(self, item: dict) -> None:
+        self.f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def write_tail(self) -> None:
+        pass
+
+
+class ExportStats:
+    """Export statistics accumulated as items stream past."""
+
+    def __init__(
+        self,
+        total_key: str = "total_qa_pairs",
+        avg_key: str = "avg_qa_per_paper",
+        fields: tuple[str, ...] = ("category", "difficulty", "reasoning_type"),
+    ):
+        self.total_key = total_key
+        self.avg_key = avg_key
+        self.total_papers = 0
+        self.total_items = 0
+        self.distributions: dict[str, Counter] = {field: Counter() for field in fields}
+
+    @property
+    def total_qa_pairs(self) -> int:
+        return self.total_items
+
+    def add(self, item: dict) -> None:
+        self.total_items += 1
+        for field, counter in self.distributions.items():
+            counter[item[field]] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            self.total_key: self.total_items,
+            "total_papers": self.total_papers,
+            self.avg_key: self.total_items / self.total_papers if self.total_papers else 0,
+            **{f"{field}_distribution": dict(counter) for field, counter in self.distributions.items()},
+        }
+
+
 class QAExporter:
-    """Export QA pairs to various formats."""
+    """Export QA pairs and knowledge points to various formats.
 
-    def __init__(self, config: Config):
-        self.config = config
+    Results are streamed from disk one file at a time and written
+    incrementally, so memory stays flat however large the corpus is.
+    Formats are json, jsonl, and the columnar parquet and arrow (Arrow
+    IPC), which need pyarrow.
+    """
 
-    def _load_all_results(self, qa_dir: Path) -> list[GenerationResult]:
-        """Load all generation results from directory."""
-        results = []
-        for json_file in qa_dir.glob("*.json"):
-            try:
-                result = GenerationResult.load(json_file)
-                results.append(result)
-            except Exception:
-                continue
-        return results
-
-    def _collect_all_qa_pairs(
-        self, results: list[GenerationResult]
-    ) -> list[dict]:
-        """Collect all QA pairs with IDs."""
-        all_pairs = []
-        qa_id = 1
+    FORMATS = ("json", "jsonl") + COLUMNAR_FORMATS
 
+    def __init__(self, config: Config, compression: str = "zstd", row_group_size: int = 65536):
+        self.config = config
+        # Columnar formats only
+        self.compression = compression
+        self.row_group_size = row_group_size
+
+    def _iter_results(self, directory: Path, load) -> Iterator:
+        """Load results from directory, a few files ahead of the writer."""
+        for _, result in iter_loaded(result_files(directory), load):
+            if result is not None:
+                yield result
+
+    def _iter_qa_pairs(
+        self, results: Iterable[GenerationResult], stats: ExportStats
+    ) -> Iterator[dict]:
+        """QA pairs with sequential IDs, counted into stats on the way."""
+        qa_id = 1
         for result in results:
+            stats.total_papers += 1
             for qa in result.qa_pairs:
                 qa_dict = qa.to_dict()
                 qa_dict["id"] = f"qa_{qa_id:04d}"
-                all_pairs.append(qa_dict)
+                stats.add(qa_dict)
+                yield qa_dict
                 qa_id += 1
 
-        return all_pairs
+    def _iter_knowledge_points(
+        self, results: Iterable[ExtractionResult], stats: ExportStats
+    ) -> Iterator[dict]:
+        """Knowledge points with sequential IDs and their paper, counted into stats."""
+        kp_id = 1
+        for result in results:
+            stats.total_papers += 1
+            for kp in result.knowledge_points:
+                kp_dict = {
+                    "id": f"kp_{kp_id:04d}",
+                    "paper_id": result.paper_id,
+                    "paper_title": result.paper_title,
+                    "source_file": result.source_file,
+                    **kp.to_dict(),
+                }
+                stats.add(kp_dict)
+                yield kp_dict
+                kp_id += 1
+
+    def _open_writer(
+        self,
+        stack: ExitStack,
+        output_path: Path,
+        format: str,
+        key: str = "qa_pairs",
+        meta: Optional[dict] = None,
+    ):
+        """Open an atomically replaced output file and a writer for format on it."""
+        if format in COLUMNAR_FORMATS:
+            f = stack.enter_context(atomic_open(output_path, "wb"))
+            columns = QA_COLUMNS if key == "qa_pairs" else KNOWLEDGE_COLUMNS
+            return ColumnarWriter(f, columns, format, self.compression, self.row_group_size)
+
+        f = stack.enter_context(atomic_open(output_path))
+        if format == "jsonl":
+            return JsonlWriter(f)
+        writer = JsonArrayWriter(f, key)
+        writer.write_head(meta)
+        return writer
 
-    def _calculate_stats(
-        self, qa_pairs: list[dict], results: list[GenerationResult]
+    def _export(
+        self,
+        items: Iterable[dict],
+        output_path: Path,
+        format: str,
+        key: str,
+        category_dir: Optional[Path],
+        make_meta,
     ) -> dict:
-        """Calculate statistics for the export."""
-        category_counts = Counter(qa["category"] for qa in qa_pairs)
-        difficulty_counts = Counter(qa["difficulty"] for qa in qa_pairs)
-        reasoning_counts = Counter(qa["reasoning_type"] for qa in qa_pairs)
+        """Write items (and per-category files) as they stream past; returns the metadata.
+
+        The JSON format puts the metadata (which needs the final
+        statistics) first, so items are spooled to a temporary file and
+        copied in after it. Other formats get a .meta.json file alongside.
+        """
+        if format not in self.FORMATS:
+            raise ValueError(f"Unknown export format: {format}")
+        output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        return {
-            "total_qa_pairs": len(qa_pairs),
-            "total_papers": len(results),
-            "avg_qa_per_paper": len(qa_pairs) / len(results) if results else 0,
-            "category_distribution": dict(category_counts),
-            "difficulty_distribution": dict(difficulty_counts),
-            "reasoning_type_distribution": dict(reasoning_counts),
-        }
+        with ExitStack() as stack:
+            if format == "json":
+                spool = stack.enter_context(
+                    tempfile.TemporaryFile("w+", encoding="utf-8", dir=output_path.parent)
+                )
+            else:
+                main = self._open_writer(stack, output_path, format, key)
+
+            def tee() -> Iterator[dict]:
+                for index, item in enumerate(items):
+                    if format == "json":
+                        spool.write(JsonArrayWriter.format_item(item, first=index == 0))
+                    else:
+                        main.write_item(item)
+                    yield item
+
+            if category_dir is not None:
+                self.export_by_category(tee(), category_dir, format=format, key=key)
+            else:
+                for _ in tee():
+                    pass
+
+            meta = make_meta()
+
+            if format == "json":
+                with atomic_open(output_path) as f:
+                    writer = JsonArrayWriter(f, key)
+                    writer.write_head(meta)
+                    spool.seek(0)
+                    shutil.copyfileobj(spool, f)
+                    writer.count = meta["statistics"][f"total_{key}"]
+                    writer.write_tail()
+            else:
+                main.write_tail()
+                # Also save meta separately
+                meta_path = output_path.with_suffix(".meta.json")
+                with atomic_open(meta_path) as f:
+                    json.dump(meta, f, indent=2, ensure_ascii=False)
+
+        return meta
 
     def export_json(
         self,
-        qa_pairs: list[dict],
+        qa_pairs: Iterable[dict],
         output_path: Path,
         meta: Optional[dict] = None,
-    ) -> None:
-        """Export QA pairs to JSON format."""
-        output = {
-            "meta": meta or {},
-            "qa_pairs": qa_pairs,
-        }
-
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+    ) -> int:
+        """Export QA pairs to JSON format; returns the number written."""
+        with ExitStack() as stack:
+            writer = self._open_writer(stack, output_path, "json", meta=meta)
+            for qa in qa_pairs:
+                writer.write_item(qa)
+            writer.write_tail()
+        return writer.count
 
     def export_jsonl(
         self,
-        qa_pairs: list[dict],
+        qa_pairs: Iterable[dict],
         output_path: Path,
-    ) -> None:
+    ) -> int:
         """Export QA pairs to JSONL format (one JSON object per line)."""
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
+        with ExitStack() as stack:
+            writer = self._open_writer(stack, output_path, "jsonl")
             for qa in qa_pairs:
-                f.write(json.dumps(qa, ensure_ascii=False) + "\n")
+                writer.write_item(qa)
+        return writer.count
 
     def export_by_category(
         self,
-        qa_pairs: list[dict],
+        items: Iterable[dict],
         output_dir: Path,
         format: str = "json",
+        key: str = "qa_pairs",
     ) -> dict[str, int]:
-        """Export QA pairs split by category."""
+        """Export QA pairs (or knowledge points) split by category."""
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Group by category
-        by_category: dict[str, list[dict]] = {}
-        for qa in qa_pairs:
-            category = qa["category"]
-            if category not in by_category:
-                by_category[category] = []
-            by_category[category].append(qa)
-
-        # Export each category
-        category_counts = {}
-        for category, pairs in by_category.items():
-            # Sanitize category name for filename
-            filename = category.lower().replace(" & ", "_").replace(" ", "_")
-
-            if format == "jsonl":
-                output_path = output_dir / f"{filename}.jsonl"
-                self.export_jsonl(pairs, output_path)
-            else:
-                output_path = output_dir / f"{filename}.json"
-                self.export_json(pairs, output_path)
+        with ExitStack() as stack:
+            writers = {}
+            for item in items:
+                category = item["category"]
+                if category not in writers:
+                    # Sanitize category name for filename
+                    filename = category.lower().replace(" & ", "_").replace(" ", "_")
+                    writers[category] = self._open_writer(
+                        stack, output_dir / f"{filename}.{format}", format, key
+                    )
+                writers[category].write_item(item)
 
-            category_counts[category] = len(pairs)
+            for writer in writers.values():
+                writer.write_tail()
 
-        return category_counts
+        return {category: writer.count for category, writer in writers.items()}
 
     def export_all(
         self,
@@ -129,48 +297,68 @@ class QAExporter:
         split_by_category: bool = False,
     ) -> dict:
         """Export all QA pairs with optional category split."""
-        # Load all results
-        results = self._load_all_results(qa_dir)
-
-        if not results:
-            raise ValueError(f"No QA results found in {qa_dir}")
-
-        # Collect all QA pairs
-        qa_pairs = self._collect_all_qa_pairs(results)
-
-        # Calculate statistics
-        stats = self._calculate_stats(qa_pairs, results)
-
-        # Create metadata
-        meta = {
-            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
-            "model": self.config.llm.model,
-            "total_papers": len(results),
-            "total_qa_pairs": len(qa_pairs),
-            "categories": len(self.config.categories),
-            "statistics": stats,
+        stats = ExportStats()
+        qa_pairs = self._iter_qa_pairs(self._iter_results(qa_dir, GenerationResult.load), stats)
+
+        def make_meta() -> dict:
+            if stats.total_papers == 0:
+                raise ValueError(f"No QA results found in {qa_dir}")
+            return {
+                "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "model": self.config.llm.model,
+                "total_papers": stats.total_papers,
+                "total_qa_pairs": stats.total_items,
+                "categories": len(self.config.categories),
+                "statistics": stats.to_dict(),
+            }
+
+        category_dir = output_path.parent / "qa_by_category" if split_by_category else None
+        self._export(qa_pairs, output_path, format, "qa_pairs", category_dir, make_meta)
+
+        return {
+            "total_qa_pairs": stats.total_items,
+            "total_papers": stats.total_papers,
+            "output_path": str(output_path),
+            "statistics": stats.to_dict(),
         }
 
-        # Export main file
-        if format == "jsonl":
-            self.export_jsonl(qa_pairs, output_path)
-            # Also save meta separately for JSONL
-            meta_path = output_path.with_suffix(".meta.json")
-            with open(meta_path, "w", encoding="utf-8") as f:
-                json.dump(meta, f, indent=2, ensure_ascii=False)
-        else:
-            self.export_json(qa_pairs, output_path, meta=meta)
-
-        # Export by category if requested
-        if split_by_category:
-            category_dir = output_path.parent / "qa_by_category"
-            self.export_by_category(qa_pairs, category_dir, format=format)
+    def export_knowledge(
+        self,
+        knowledge_dir: Path,
+        output_path: Path,
+        format: str = "json",
+        split_by_category: bool = False,
+    ) -> dict:
+        """Export all knowledge points, each with its paper, with optional category split."""
+        stats = ExportStats(
+            total_key="total_knowledge_points",
+            avg_key="avg_points_per_paper",
+            fields=("category", "complexity"),
+        )
+        points = self._iter_knowledge_points(
+            self._iter_results(knowledge_dir, ExtractionResult.load), stats
+        )
+
+        def make_meta() -> dict:
+            if stats.total_papers == 0:
+                raise ValueError(f"No knowledge results found in {knowledge_dir}")
+            return {
+                "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "model": self.config.llm.model,
+                "total_papers": stats.total_papers,
+                "total_knowledge_points": stats.total_items,
+                "categories": len(self.config.categories),
+                "statistics": stats.to_dict(),
+            }
+
+        category_dir = output_path.parent / "knowledge_by_category" if split_by_category else None
+        self._export(points, output_path, format, "knowledge_points", category_dir, make_meta)
 
         return {
-            "total_qa_pairs": len(qa_pairs),
-            "total_papers": len(results),
+            "total_knowledge_points": stats.total_items,
+            "total_papers": stats.total_papers,
             "output_path": str(output_path),
-            "statistics": stats,
+            "statistics": stats.to_dict(),
         }
 
 
@@ -242,7 +430,7 @@ def create_summary_report(
 
     # Save report
     report_path = stats_dir / "summary_report.md"
-    with open(report_path, "w", encoding="utf-8") as f:
+    with atomic_open(report_path) as f:
         f.write(report)
 
     return str(report_path)
@@ -0,0 +1,102 @@
+"""Compact log-bucketed histograms for request latencies."""
+
+import math
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Bucket i holds values in [MIN_VALUE * GROWTH**i, MIN_VALUE * GROWTH**(i+1)),
+# so percentiles are within about 4.5% of the true value
+MIN_VALUE = 0.001  # seconds
+GROWTH = 2 ** 0.125
+_LOG_GROWTH = math.log(GROWTH)
+
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class Histogram:
+    """Counts of positive values in geometric buckets.
+
+    Only buckets that saw a value are stored, so a histogram of seconds
+    from 1 ms to an hour stays a few dozen entries however many values
+    it has counted. Histograms from several runs merge by adding counts.
+    """
+
+    count: int = 0
+    total: float = 0.0
+    min: Optional[float] = None
+    max: Optional[float] = None
+    buckets: dict[int, int] = field(default_factory=dict)
+
+    def add(self, value: float) -> None:
+        index = int(math.log(value / MIN_VALUE) / _LOG_GROWTH) if value > MIN_VALUE else 0
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "Histogram") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def copy(self) -> "Histogram":
+        return Histogram(self.count, self.total, self.min, self.max, dict(self.buckets))
+
+    def count_below(self, bound: float) -> int:
+        """Values in buckets that end at or below bound (a cumulative "le" count)."""
+        return sum(
+            count for index, count in self.buckets.items()
+            if MIN_VALUE * GROWTH ** (index + 1) <= bound
+        )
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100): the geometric middle of its bucket."""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                value = MIN_VALUE * GROWTH ** (index + 0.5)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """Count, mean, max and the usual percentiles, in seconds."""
+        return {
+            "count": self.count,
+            "mean": round(self.mean, 4),
+            **{f"p{q}": round(self.percentile(q), 4) for q in PERCENTILES},
+            "max": round(self.max or 0.0, 4),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            **self.summary(),
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "buckets": {str(index): count for index, count in sorted(self.buckets.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        return cls(
+            count=data.get("count", 0),
+            total=data.get("total", 0.0),
+            min=data.get("min"),
+            max=data.get("max"),
+            buckets={int(index): count for index, count in data.get("buckets", {}).items()},
+        )
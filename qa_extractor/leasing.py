@@ -0,0 +1,274 @@
+"""Expiring work leases for several workers sharing one output directory."""
+
+import json
+import logging
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger("qa_extractor")
+
+
+def default_worker_id() -> str:
+    """Host name plus process id, unique among live workers."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseManager:
+    """Per-paper leases held as lock files under a shared directory.
+
+    A lease is a file created with O_CREAT | O_EXCL (atomic on local disks
+    and NFSv3+) recording its owner and expiry time. A background thread
+    renews every held lease each ttl/3 seconds; a worker that dies stops
+    renewing, and once its leases expire any other worker may reclaim
+    them. Expiry uses wall-clock time, so machines sharing a directory
+    need clocks that agree to well within the ttl.
+
+    Workers running at the same time share a run ID (see join_run), and
+    finish() leaves a marker under it for every paper done in the run, so
+    whether another worker already handled a paper in this run never
+    depends on comparing file times with the local clock.
+    """
+
+    RUN_FILE = "run.json"
+
+    def __init__(
+        self,
+        lease_dir: str | Path,
+        worker_id: Optional[str] = None,
+        ttl: float = 300.0,
+    ):
+        self.lease_dir = Path(lease_dir)
+        self.worker_id = worker_id or default_worker_id()
+        self.ttl = ttl
+        self.lost = 0
+        self._held: set[str] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._renewer: Optional[threading.Thread] = None
+        self.run_id: Optional[str] = None
+
+    def _path(self, key: str) -> Path:
+        return self.lease_dir / f"{key}.lock"
+
+    def _record(self) -> bytes:
+        return json.dumps({
+            "worker": self.worker_id,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "expires": time.time() + self.ttl,
+        }).encode("utf-8")
+
+    @staticmethod
+    def _read(path: Path) -> Optional[dict]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError):
+            # Being written right now; treat as live
+            return {"worker": "", "expires": float("inf")}
+
+    def _create(self, path: Path) -> bool:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "wb") as f:
+            f.write(self._record())
+        return True
+
+    def claim(self, key: str) -> bool:
+        """Take the lease on key; False if another live worker holds it."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if not self._create(path):
+            lease = self._read(path)
+            if lease is not None and lease.get("expires", 0) > time.time():
+                return lease.get("worker") == self.worker_id and key in self._held
+            if lease is not None and not self._reclaim(path):
+                return False
+            if not self._create(path):
+                return False
+
+        with self._lock:
+            self._held.add(key)
+        self._start_renewer()
+        return True
+
+    def _reclaim(self, path: Path) -> bool:
+        """Remove an expired lease; False if it turned out to be live."""
+        # Rename is atomic, so only one of several reclaiming workers wins
+        tombstone = path.with_name(f"{path.name}.{self.worker_id}.stale")
+        try:
+            os.rename(path, tombstone)
+        except FileNotFoundError:
+            return True
+        lease = self._read(tombstone)
+        if lease is not None and lease.get("expires", 0) > time.time():
+            # Renewed between our read and the rename: put it back
+            try:
+                os.link(tombstone, path)
+            except OSError:
+                pass
+            tombstone.unlink(missing_ok=True)
+            return False
+        tombstone.unlink(missing_ok=True)
+        logger.info(f"Reclaimed expired lease {path.name} from {lease.get('worker') if lease else '?'}")
+        return True
+
+    def release(self, key: str) -> None:
+        """Give up a lease this worker holds."""
+        with self._lock:
+            if key not in self._held:
+                return
+            self._held.discard(key)
+        path = self._path(key)
+        lease = self._read(path)
+        if lease is not None and lease.get("worker") == self.worker_id:
+            path.unlink(missing_ok=True)
+
+    def _live_members(self) -> list[str]:
+        """Other workers holding a live membership lease."""
+        members = []
+        for path in self.lease_dir.glob("members/*.lock"):
+            lease = self._read(path)
+            if lease and lease.get("worker") != self.worker_id and lease.get("expires", 0) > time.time():
+                members.append(lease.get("worker", ""))
+        return members
+
+    def join_run(self, poll_interval: float = 0.2) -> str:
+        """Join the run of the workers already live, or start a new run.
+
+        The run ID is kept in run.json under the lease directory. A worker
+        that finds no other live member starts a new run, and the finished
+        markers of older runs are removed.
+        """
+        while not self.claim("run-setup"):
+            time.sleep(poll_interval)
+        try:
+            run_file = self.lease_dir / self.RUN_FILE
+            run = self._read(run_file) if self._live_members() else None
+            if run and run.get("run_id"):
+                self.run_id = run["run_id"]
+            else:
+                self.run_id = uuid.uuid4().hex
+                tmp = run_file.with_name(f"{run_file.name}.{self.worker_id}.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"run_id": self.run_id, "started_by": self.worker_id}, f)
+                os.replace(tmp, run_file)
+                for old in self.lease_dir.glob("finished/*"):
+                    if old.name != self.run_id:
+                        shutil.rmtree(old, ignore_errors=True)
+            self.claim(f"members/{self.worker_id}")
+        finally:
+            self.release("run-setup")
+        return self.run_id
+
+    def _finished_path(self, key: str) -> Path:
+        return self.lease_dir / "finished" / self.run_id / f"{key}.done"
+
+    def finish(self, key: str) -> None:
+        """Mark key as done in this run, then give up its lease."""
+        if self.run_id is not None:
+            path = self._finished_path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.touch()
+        self.release(key)
+
+    def finished(self, key: str) -> bool:
+        """Whether any worker finished key in this run."""
+        return self.run_id is not None and self._finished_path(key).exists()
+
+    def renew(self) -> None:
+        """Push back the expiry of every held lease."""
+        with self._lock:
+            keys = list(self._held)
+        for key in keys:
+            path = self._path(key)
+            lease = self._read(path)
+            if lease is None or lease.get("worker") != self.worker_id:
+                with self._lock:
+                    self._held.discard(key)
+                self.lost += 1
+                logger.warning(f"Lease on {key} was taken over by another worker")
+                continue
+            tmp = path.with_name(f"{path.name}.{self.worker_id}.tmp")
+            with open(tmp, "wb") as f:
+                f.write(self._record())
+            os.replace(tmp, path)
+
+    def _start_renewer(self) -> None:
+        if self._renewer is not None:
+            return
+        self._renewer = threading.Thread(target=self._renew_loop, name="lease-renewer", daemon=True)
+        self._renewer.start()
+
+    def _renew_loop(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                self.renew()
+            except OSError as e:
+                logger.warning(f"Lease renewal failed: {e}")
+
+    def _claim_pass(
+        self,
+        items: list[T],
+        key: Callable[[T], str],
+        done: Callable[[T], bool],
+        deferred: list[T],
+    ) -> Iterator[T]:
+        for item in items:
+            if done(item):
+                continue
+            if not self.claim(key(item)):
+                deferred.append(item)
+                continue
+            # Finished and released by another worker since done() was checked
+            if done(item):
+                self.release(key(item))
+                continue
+            yield item
+
+    def claim_rounds(
+        self,
+        items: Iterable[T],
+        key: Callable[[T], str],
+        done: Callable[[T], bool],
+        poll_interval: float = 5.0,
+    ) -> Iterator[Iterator[T]]:
+        """Yield rounds of items this worker should process, leased.
+
+        Each round is an iterator that claims items lazily, as the caller
+        asks for them; done(item) reports (and takes care of) items already
+        finished by any worker. Items leased by other workers come back in
+        a later round, every poll_interval seconds, until they are done or
+        their lease expires and is reclaimed, so every item is finished by
+        someone before the last round ends. The caller must finish each
+        round (and release each lease once its result is saved) before
+        asking for the next, which keeps waiting out of the in-flight path.
+        """
+        waiting = list(items)
+        while waiting:
+            deferred: list[T] = []
+            yield self._claim_pass(waiting, key, done, deferred)
+            waiting = deferred
+            if waiting:
+                time.sleep(poll_interval)
+
+    def close(self) -> None:
+        """Stop renewing and release every held lease."""
+        self._stop.set()
+        with self._lock:
+            keys = list(self._held)
+        for key in keys:
+            self.release(key)
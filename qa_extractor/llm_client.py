@@ -1,15 +1,24 @@
 """LLM API client with token tracking."""
 
 import json
+import threading
 import time
 from dataclasses import dataclass, field
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 import httpx
-import tiktoken
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from .cache import ResponseCache
 from .config import LLMConfig
+from .histogram import Histogram
+from .rate_limiter import ConcurrencyLimit, RateLimiter, parse_retry_after
+from .streaming import SSEAccumulator, StreamAborted, StreamWatcher
+from .tokenizer import Tokenizer
+from .tracing import instant, span
+
+# Validates one streamed array item (e.g. a knowledge point dict)
+ItemValidator = Callable[[dict], bool]
 
 
 @dataclass
@@ -41,12 +50,94 @@ class TokenStats:
 
     total_usage: TokenUsage = field(default_factory=TokenUsage)
     request_count: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    in_flight: int = 0
     start_time: float = field(default_factory=time.time)
+    # Successful request latencies by the stage that made them, and time to
+    # first token of streamed ones, in seconds
+    latency: dict[str, Histogram] = field(default_factory=dict)
+    ttft: Histogram = field(default_factory=Histogram)
+    retries: int = 0
+    retry_errors: dict[str, int] = field(default_factory=dict)  # retries by error class
+    retry_seconds: float = 0.0  # spent in failed attempts and backoff waits
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
 
     def add_usage(self, usage: TokenUsage) -> None:
-        """Add token usage from a request."""
-        self.total_usage = self.total_usage + usage
-        self.request_count += 1
+        """Add token usage from a request (safe to call from worker threads)."""
+        with self._lock:
+            self.total_usage = self.total_usage + usage
+            self.request_count += 1
+
+    def request_started(self) -> None:
+        """Mark an HTTP request as in flight."""
+        with self._lock:
+            self.in_flight += 1
+
+    def request_finished(self) -> None:
+        """Mark an in-flight HTTP request as done."""
+        with self._lock:
+            self.in_flight -= 1
+
+    def record_attempt(
+        self,
+        stage: str,
+        latency: float,
+        failed: bool = False,
+        time_to_first_token: Optional[float] = None,
+    ) -> None:
+        """Time one HTTP attempt; failed ones count as time lost to retries."""
+        with self._lock:
+            if failed:
+                self.retry_seconds += latency
+                return
+            histogram = self.latency.get(stage)
+            if histogram is None:
+                histogram = self.latency[stage] = Histogram()
+            histogram.add(latency)
+            if time_to_first_token is not None:
+                self.ttft.add(time_to_first_token)
+
+    def record_retry(self, error_class: str, wait: float) -> None:
+        """Count a retry and the backoff before it."""
+        with self._lock:
+            self.retries += 1
+            self.retry_errors[error_class] = self.retry_errors.get(error_class, 0) + 1
+            self.retry_seconds += wait
+
+    def snapshot(self) -> "TokenStats":
+        """A consistent copy of every counter and histogram, safe to read while requests run."""
+        with self._lock:
+            return TokenStats(
+                total_usage=self.total_usage,
+                request_count=self.request_count,
+                cache_hits=self.cache_hits,
+                cache_misses=self.cache_misses,
+                in_flight=self.in_flight,
+                start_time=self.start_time,
+                latency={stage: histogram.copy() for stage, histogram in self.latency.items()},
+                ttft=self.ttft.copy(),
+                retries=self.retries,
+                retry_errors=dict(self.retry_errors),
+                retry_seconds=self.retry_seconds,
+            )
+
+    def latency_summary(self) -> dict[str, dict]:
+        """Percentile summaries of request latency: "all", then each stage."""
+        combined = Histogram()
+        with self._lock:
+            for histogram in self.latency.values():
+                combined.merge(histogram)
+            stages = {stage: histogram.summary() for stage, histogram in self.latency.items()}
+        return {"all": combined.summary(), **stages}
+
+    def record_cache(self, hit: bool) -> None:
+        """Count a response cache lookup."""
+        with self._lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
 
     def get_rate(self) -> float:
         """Get tokens per minute rate."""
@@ -61,14 +152,46 @@ class TokenStats:
         output_cost = (self.total_usage.completion_tokens / 1000) * output_price
         return input_cost + output_cost
 
-    def to_dict(self) -> dict:
-        return {
-            "usage": self.total_usage.to_dict(),
-            "request_count": self.request_count,
-            "elapsed_seconds": time.time() - self.start_time,
-            "tokens_per_minute": self.get_rate(),
-            "estimated_cost_usd": self.estimate_cost(),
+    def to_dict(self, histograms: bool = True) -> dict:
+        """Snapshot of the stats, consistent even while requests are recorded.
+
+        histograms=False leaves out the latency and TTFT histograms, for
+        frequent small updates (e.g. checkpoint journal entries).
+        """
+        stats = self.snapshot()
+        data = {
+            "usage": stats.total_usage.to_dict(),
+            "request_count": stats.request_count,
+            "cache_hits": stats.cache_hits,
+            "cache_misses": stats.cache_misses,
+            "elapsed_seconds": time.time() - stats.start_time,
+            "tokens_per_minute": stats.get_rate(),
+            "estimated_cost_usd": stats.estimate_cost(),
+            "retries": stats.retries,
+            "retry_errors": stats.retry_errors,
+            "retry_seconds": stats.retry_seconds,
         }
+        if histograms:
+            data["latency"] = {stage: histogram.to_dict() for stage, histogram in stats.latency.items()}
+            data["ttft"] = stats.ttft.to_dict()
+        return data
+
+
+class RateLimitError(httpx.HTTPStatusError):
+    """HTTP 429 (or any error with Retry-After) carrying the server's hint."""
+
+    def __init__(self, message: str, *, request, response, retry_after: Optional[float]):
+        super().__init__(message, request=request, response=response)
+        self.retry_after = retry_after
+
+
+def _error_class(error: Optional[BaseException]) -> str:
+    """Short name of a failed attempt's error, for retry counts."""
+    if isinstance(error, RateLimitError):
+        return "rate_limit"
+    if isinstance(error, httpx.HTTPStatusError):
+        return f"http_{error.response.status_code}"
+    return type(error).__name__
 
 
 @dataclass
@@ -79,64 +202,199 @@ class LLMResponse:
     usage: TokenUsage
     model: str
     finish_reason: str
+    cached: bool = False
+    time_to_first_token: Optional[float] = None  # seconds, streaming only
 
 
-class LLMClient:
-    """LLM API client with token tracking."""
+class _BaseLLMClient:
+    """Transport-independent request building, parsing and accounting."""
 
-    def __init__(self, config: LLMConfig):
+    def __init__(self, config: LLMConfig, cache: Optional[ResponseCache] = None):
         self.config = config
+        self.cache = cache
         self.stats = TokenStats()
-        self._client: Optional[httpx.Client] = None
+        self._listeners: list[Callable[[float, Optional[BaseException]], None]] = []
+        self.rate_limiter = RateLimiter(
+            requests_per_minute=config.requests_per_minute,
+            tokens_per_minute=config.tokens_per_minute,
+        )
 
-        # Initialize tokenizer for fallback counting
-        try:
-            self._tokenizer = tiktoken.encoding_for_model(config.model)
-        except KeyError:
-            self._tokenizer = tiktoken.get_encoding("cl100k_base")
+        # Tokenizer for budgeting and fallback counting, loaded on first use
+        self.tokenizer = Tokenizer(
+            config.model,
+            mode=config.tokenizer,
+            cache_dir=config.tokenizer_cache_dir,
+        )
 
-    @property
-    def client(self) -> httpx.Client:
-        """Get or create HTTP client."""
-        if self._client is None:
-            self._client = httpx.Client(
-                base_url=self.config.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.config.api_key}",
-                    "Content-Type": "application/json",
-                },
-                timeout=self.config.timeout,
-            )
-        return self._client
+    def _client_kwargs(self) -> dict:
+        """Keyword arguments for the httpx client and its connection pool."""
+        return {
+            "base_url": self.config.base_url,
+            "headers": {
+                "Authorization": f"Bearer {self.config.api_key}",
+                "Content-Type": "application/json",
+            },
+            "timeout": self.config.timeout,
+            "limits": httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            "http2": self.config.http2,
+        }
 
     def count_tokens(self, text: str) -> int:
         """Count tokens in text."""
-        return len(self._tokenizer.encode(text))
+        return self.tokenizer.count(text)
 
     def _create_retry_decorator(self):
         """Create retry decorator based on config."""
+        backoff = wait_exponential(multiplier=1, min=self.config.retry_delay, max=60)
+
+        def wait(retry_state) -> float:
+            # A Retry-After already paused the shared limiter, which the next
+            # attempt waits on, so don't stack exponential backoff on top
+            error = retry_state.outcome.exception()
+            if isinstance(error, RateLimitError) and error.retry_after is not None:
+                return 0.0
+            return backoff(retry_state)
+
+        def before_sleep(retry_state) -> None:
+            error = retry_state.outcome.exception()
+            self.stats.record_retry(_error_class(error), retry_state.next_action.sleep)
+            instant("retry", "llm", error=_error_class(error), wait=round(retry_state.next_action.sleep, 3))
+
         return retry(
             stop=stop_after_attempt(self.config.retry_attempts),
-            wait=wait_exponential(multiplier=1, min=self.config.retry_delay, max=60),
+            wait=wait,
+            before_sleep=before_sleep,
         )
 
-    def _make_request(
+    def _estimate_prompt_tokens(self, messages: list[dict[str, str]]) -> int:
+        """Estimate prompt tokens to pre-charge against the TPM budget."""
+        if not self.rate_limiter.tracks_tokens:
+            return 0
+        return self.count_tokens(" ".join(m.get("content", "") for m in messages))
+
+    def _build_payload(
         self,
         messages: list[dict[str, str]],
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
-    ) -> LLMResponse:
-        """Make a request to the LLM API."""
+    ) -> dict:
+        """Build the chat completion request body."""
         payload = {
             "model": self.config.model,
             "messages": messages,
             "temperature": temperature or self.config.temperature,
             "max_tokens": max_tokens or self.config.max_tokens,
         }
+        if self.config.stream:
+            payload["stream"] = True
+            # Ask for a final usage chunk so streamed calls are still metered
+            payload["stream_options"] = {"include_usage": True}
+        return payload
 
-        response = self.client.post("/chat/completions", json=payload)
+    def _create_watcher(
+        self,
+        array_key: Optional[str] = None,
+        item_validator: Optional[ItemValidator] = None,
+    ) -> StreamWatcher:
+        """Fresh stream watcher for one request attempt."""
+        return StreamWatcher(
+            array_key=array_key,
+            item_validator=item_validator,
+            max_invalid=self.config.stream_max_invalid_items,
+        )
+
+    def _charge_aborted_stream(
+        self,
+        accumulator: SSEAccumulator,
+        messages: list[dict[str, str]],
+    ) -> int:
+        """Record the estimated cost of a stream that was cut off early; returns its tokens."""
+        prompt_tokens = self.count_tokens(" ".join(m.get("content", "") for m in messages))
+        completion_tokens = self.count_tokens(accumulator.content)
+        usage = TokenUsage(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+        self.stats.add_usage(usage)
+        return usage.total_tokens
+
+    def add_listener(self, listener: Callable[[float, Optional[BaseException]], None]) -> None:
+        """Register a callback invoked with (latency, error) after every HTTP attempt."""
+        self._listeners.append(listener)
+
+    def _notify(self, latency: float, error: Optional[BaseException] = None) -> None:
+        """Report one HTTP attempt to listeners."""
+        for listener in self._listeners:
+            listener(latency, error)
+
+    def _cache_key(
+        self,
+        messages: list[dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Optional[str]:
+        """Cache key for a request, or None when caching is disabled."""
+        if self.cache is None:
+            return None
+        payload = self._build_payload(messages, temperature, max_tokens)
+        return self.cache.make_key(
+            payload["model"], messages, payload["temperature"], payload["max_tokens"]
+        )
+
+    def _cache_lookup(self, key: Optional[str]) -> Optional[LLMResponse]:
+        """Return a cached response; cached calls cost no tokens."""
+        if key is None:
+            return None
+        with span("cache_lookup", "llm"):
+            entry = self.cache.get(key)
+        self.stats.record_cache(entry is not None)
+        if entry is None:
+            return None
+        return LLMResponse(
+            content=entry["content"],
+            usage=TokenUsage(**entry.get("usage", {})),
+            model=entry.get("model", self.config.model),
+            finish_reason=entry.get("finish_reason", "unknown"),
+            cached=True,
+        )
+
+    def _cache_store(self, key: Optional[str], response: LLMResponse) -> None:
+        """Persist a fresh response under its request key."""
+        if key is None:
+            return
+        with span("cache_store", "llm"):
+            self.cache.put(key, {
+                "content": response.content,
+                "usage": response.usage.to_dict(),
+                "model": response.model,
+                "finish_reason": response.finish_reason,
+            })
+
+    def _cache_discard(self, key: Optional[str]) -> None:
+        """Forget a response that could not be used (e.g. invalid JSON)."""
+        if key is not None:
+            self.cache.delete(key)
+
+    def _raise_for_status(self, response: httpx.Response) -> None:
+        """Raise with detailed information on HTTP errors."""
+        retry_after = parse_retry_after(response.headers) if response.status_code >= 400 else None
+        if response.status_code == 429 or retry_after is not None:
+            if retry_after is not None:
+                # Hold back every worker, not just this one
+                self.rate_limiter.pause(retry_after)
+            raise RateLimitError(
+                f"HTTP {response.status_code}: rate limited"
+                + (f", retry after {retry_after:.1f}s" if retry_after is not None else ""),
+                request=response.request,
+                response=response,
+                retry_after=retry_after,
+            )
 
-        # Handle HTTP errors with detailed information
         if response.status_code >= 400:
             error_detail = ""
             try:
@@ -149,8 +407,13 @@ class LLMClient:
                 response=response,
             )
 
-        data = response.json()
-
+    def _parse_response(
+        self,
+        data: dict,
+        messages: list[dict[str, str]],
+        time_to_first_token: Optional[float] = None,
+    ) -> LLMResponse:
+        """Parse a chat completion body and record its token usage."""
         # Check for error in response
         if "error" in data:
             error_msg = data.get("error", {})
@@ -224,28 +487,11 @@ class LLMClient:
             usage=usage,
             model=data.get("model", self.config.model),
             finish_reason=first_choice.get("finish_reason", "unknown"),
+            time_to_first_token=time_to_first_token,
         )
 
-    def chat(
-        self,
-        messages: list[dict[str, str]],
-        temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None,
-    ) -> LLMResponse:
-        """Send chat completion request with retry logic."""
-        retry_decorator = self._create_retry_decorator()
-        make_request_with_retry = retry_decorator(self._make_request)
-        return make_request_with_retry(messages, temperature, max_tokens)
-
-    def chat_json(
-        self,
-        messages: list[dict[str, str]],
-        temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None,
-    ) -> tuple[Any, LLMResponse]:
-        """Send chat request and parse JSON response."""
-        response = self.chat(messages, temperature, max_tokens)
-
+    def _parse_json_content(self, response: LLMResponse) -> Any:
+        """Extract a JSON value from a response, tolerating code fences."""
         # Try to extract JSON from response
         content = response.content.strip()
 
@@ -259,11 +505,11 @@ class LLMClient:
 
         content = content.strip()
 
-        try:
-            parsed = json.loads(content)
-            return parsed, response
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Failed to parse JSON response: {e}\nContent: {content[:500]}")
+        with span("parse_json", "llm", chars=len(content)):
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Failed to parse JSON response: {e}\nContent: {content[:500]}")
 
     def get_stats(self) -> TokenStats:
         """Get current token statistics."""
@@ -273,6 +519,179 @@ class LLMClient:
         """Reset token statistics."""
         self.stats = TokenStats()
 
+
+class LLMClient(_BaseLLMClient):
+    """LLM API client with token tracking."""
+
+    def __init__(self, config: LLMConfig, cache: Optional[ResponseCache] = None):
+        super().__init__(config, cache)
+        self._client: Optional[httpx.Client] = None
+        self._client_lock = threading.Lock()
+        # Requests in flight across all threads (chunks included); None = unlimited
+        self.concurrency_limit: Optional[ConcurrencyLimit] = None
+
+        # Build the retrying wrapper once; tenacity copies its state per call
+        self._request_with_retry = self._create_retry_decorator()(self._make_request)
+
+    def limit_concurrency(self, limit: Callable[[], int]) -> None:
+        """Keep at most limit() requests in flight, however many threads call."""
+        self.concurrency_limit = ConcurrencyLimit(limit)
+
+    @property
+    def client(self) -> httpx.Client:
+        """Get or create HTTP client (shared by all worker threads)."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_kwargs())
+        return self._client
+
+    def _make_request(
+        self,
+        messages: list[dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        array_key: Optional[str] = None,
+        item_validator: Optional[ItemValidator] = None,
+        stage: str = "other",
+    ) -> LLMResponse:
+        """Make a request to the LLM API."""
+        payload = self._build_payload(messages, temperature, max_tokens)
+        estimated_tokens = self._estimate_prompt_tokens(messages)
+        with span("rate_limit_wait", "llm"):
+            self.rate_limiter.acquire(estimated_tokens)
+
+        # The pre-charged estimate is corrected however the request ends:
+        # rejected, failed or unparseable requests give it back
+        actual_tokens = 0
+        try:
+            time_to_first_token = None
+            limit = self.concurrency_limit
+            if limit:
+                with span("concurrency_wait", "llm"):
+                    limit.acquire()
+            started = time.monotonic()
+            self.stats.request_started()
+            try:
+                with span("http", "llm", stage=stage, stream=self.config.stream) as args:
+                    if self.config.stream:
+                        watcher = self._create_watcher(array_key, item_validator)
+                        accumulator = self._stream_request(payload, watcher)
+                        data = accumulator.finish()
+                        time_to_first_token = accumulator.time_to_first_token
+                        if args is not None and time_to_first_token is not None:
+                            args["ttft"] = round(time_to_first_token, 4)
+                    else:
+                        response = self.client.post("/chat/completions", json=payload)
+                        self._raise_for_status(response)
+                        data = response.json()
+            except Exception as e:
+                if isinstance(e, StreamAborted):
+                    actual_tokens = e.tokens_used
+                latency = time.monotonic() - started
+                self.stats.record_attempt(stage, latency, failed=True)
+                self._notify(latency, e)
+                raise
+            finally:
+                self.stats.request_finished()
+                if limit:
+                    limit.release()
+            latency = time.monotonic() - started
+            self.stats.record_attempt(stage, latency, time_to_first_token=time_to_first_token)
+            self._notify(latency)
+
+            with span("parse_response", "llm"):
+                result = self._parse_response(data, messages, time_to_first_token)
+            actual_tokens = result.usage.total_tokens
+            return result
+        finally:
+            self.rate_limiter.reconcile(estimated_tokens, actual_tokens)
+
+    def _stream_request(
+        self,
+        payload: dict,
+        watcher: StreamWatcher,
+    ) -> SSEAccumulator:
+        """Consume a streamed completion, aborting as soon as it looks broken."""
+        accumulator = SSEAccumulator(watcher)
+        # Leaving the block early closes the connection, which stops generation
+        with self.client.stream("POST", "/chat/completions", json=payload) as response:
+            if response.status_code >= 400:
+                response.read()
+                self._raise_for_status(response)
+            try:
+                for line in response.iter_lines():
+                    accumulator.feed_line(line)
+                    if accumulator.done:
+                        break
+            except StreamAborted as e:
+                e.tokens_used = self._charge_aborted_stream(accumulator, payload["messages"])
+                raise
+        return accumulator
+
+    def chat(
+        self,
+        messages: list[dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        stage: str = "other",
+    ) -> LLMResponse:
+        """Send chat completion request with retry logic.
+
+        stage labels the request's latency in the stats (e.g. "extract").
+        """
+        key = self._cache_key(messages, temperature, max_tokens)
+        return self._chat(key, messages, temperature, max_tokens, stage=stage)
+
+    def _chat(
+        self,
+        key: Optional[str],
+        messages: list[dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        array_key: Optional[str] = None,
+        item_validator: Optional[ItemValidator] = None,
+        stage: str = "other",
+    ) -> LLMResponse:
+        """Serve from the cache, or request and cache the response."""
+        with span("llm_call", "llm", stage=stage) as args:
+            cached = self._cache_lookup(key)
+            if cached is not None:
+                if args is not None:
+                    args["cached"] = True
+                return cached
+            response = self._request_with_retry(
+                messages, temperature, max_tokens, array_key, item_validator, stage
+            )
+            self._cache_store(key, response)
+            if args is not None:
+                args["tokens"] = response.usage.total_tokens
+            return response
+
+    def chat_json(
+        self,
+        messages: list[dict[str, str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        array_key: Optional[str] = None,
+        item_validator: Optional[ItemValidator] = None,
+        stage: str = "other",
+    ) -> tuple[Any, LLMResponse]:
+        """Send chat request and parse JSON response.
+
+        When streaming is enabled, items of the array_key array are checked
+        with item_validator as they arrive and the request is aborted early
+        if too many in a row are invalid. stage labels the request's latency
+        in the stats.
+        """
+        key = self._cache_key(messages, temperature, max_tokens)
+        response = self._chat(key, messages, temperature, max_tokens, array_key, item_validator, stage)
+        try:
+            return self._parse_json_content(response), response
+        except ValueError:
+            self._cache_discard(key)
+            raise
+
     def close(self) -> None:
         """Close the HTTP client."""
         if self._client is not None:
@@ -0,0 +1,162 @@
+"""Concurrent loading of result files, with orjson when installed."""
+
+import json
+import os
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from .storage import codec_of, decompress, result_name
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib parser is 2-5x slower
+    orjson = None
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Reads are mostly waiting on the filesystem, so use more threads than cores
+DEFAULT_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+def read_json(path: str | Path):
+    """Parse a JSON file, decompressing it if its name has a codec suffix."""
+    with open(path, "rb") as f:
+        data = decompress(f.read(), codec_of(path))
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def map_ordered(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+) -> Iterator[tuple[T, R | Exception]]:
+    """Apply fn to items on a thread pool, yielding (item, result) in input order.
+
+    A failed call yields its exception instead of a result. Items go to
+    the pool in chunks (per-task overhead would otherwise outweigh reading
+    a small file) and only a few chunks are in flight at once, so the
+    input can be a lazy stream of any length.
+    """
+    workers = workers or DEFAULT_WORKERS
+
+    def call(item: T) -> R | Exception:
+        try:
+            return fn(item)
+        except Exception as e:
+            return e
+
+    def call_chunk(chunk: list[T]) -> list[tuple[T, R | Exception]]:
+        return [(item, call(item)) for item in chunk]
+
+    if workers <= 1:
+        for item in items:
+            yield item, call(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loader") as pool:
+        window: deque = deque()
+        chunk: list[T] = []
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                window.append(pool.submit(call_chunk, chunk))
+                chunk = []
+            if len(window) >= workers * 2:
+                yield from window.popleft().result()
+        if chunk:
+            window.append(pool.submit(call_chunk, chunk))
+        while window:
+            yield from window.popleft().result()
+
+
+def iter_loaded(
+    paths: Iterable[Path],
+    load: Callable[[Path], T],
+    workers: Optional[int] = None,
+) -> Iterator[tuple[Path, Optional[T]]]:
+    """Load result files concurrently; yields (path, result or None if unreadable)."""
+    for path, result in map_ordered(load, paths, workers):
+        yield path, None if isinstance(result, Exception) else result
+
+
+def result_files(directory: Path, include_cross_doc: bool = True) -> list[Path]:
+    """Sorted result files (of any storage codec) of a knowledge/ or qa_pairs/ directory."""
+    if not directory.exists():
+        return []
+    # Sorting names rather than Path objects matters at 100k files
+    names = sorted(
+        entry.name for entry in os.scandir(directory)
+        if codec_of(entry.name) and not entry.name.startswith(".")
+        and (include_cross_doc or result_name(entry.name) != "cross_doc")
+    )
+    return [directory / name for name in names]
+
+
+@dataclass
+class ResultRecord:
+    """What the summary commands need from one result file.
+
+    Items are reduced to counters as the file is parsed, so a record
+    stays small however many knowledge points or QA pairs it had.
+    """
+
+    path: Path
+    paper_id: str = ""
+    paper_title: str = ""
+    source_file: str = ""
+    item_count: int = 0
+    token_usage: dict = field(default_factory=dict)
+    load_error: Optional[str] = None  # set when the file could not be parsed
+    categories: Counter = field(default_factory=Counter)
+    difficulties: Counter = field(default_factory=Counter)
+    reasoning_types: Counter = field(default_factory=Counter)
+
+    @property
+    def error(self) -> Optional[str]:
+        """Load failure or the error the stage recorded."""
+        if self.load_error:
+            return self.load_error
+        if "error" in self.token_usage:
+            return str(self.token_usage.get("error") or "Unknown error")
+        return None
+
+    @classmethod
+    def from_file(cls, path: Path, items_key: str) -> "ResultRecord":
+        data = read_json(path)
+        items = data.get(items_key, [])
+        return cls(
+            path=path,
+            paper_id=data.get("paper_id") or result_name(path),
+            paper_title=data.get("paper_title", ""),
+            source_file=data.get("source_file", ""),
+            item_count=len(items),
+            token_usage=data.get("token_usage", {}),
+            categories=Counter(item.get("category", "") for item in items),
+            difficulties=Counter(item["difficulty"] for item in items if "difficulty" in item),
+            reasoning_types=Counter(item["reasoning_type"] for item in items if "reasoning_type" in item),
+        )
+
+
+def load_records(
+    paths: Iterable[Path],
+    items_key: str,
+    workers: Optional[int] = None,
+) -> list[ResultRecord]:
+    """Read result files concurrently into ResultRecords, in path order.
+
+    items_key is "knowledge_points" or "qa_pairs". Unreadable files get a
+    record with load_error set rather than being dropped.
+    """
+    records = []
+    for path, record in map_ordered(lambda p: ResultRecord.from_file(p, items_key), paths, workers):
+        if isinstance(record, Exception):
+            record = ResultRecord(path=path, paper_id=result_name(path), load_error=f"Failed to load: {str(record)[:50]}")
+        records.append(record)
+    return records
@@ -0,0 +1,98 @@
+"""Running totals of an output directory, kept current as papers finish."""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable
+
+# Per-item fields counted by the manifest
+FIELDS = ("category", "difficulty", "reasoning_type")
+
+TOKEN_KINDS = ("prompt", "completion", "total")
+
+
+def breakdown(title: str, items: Iterable) -> dict:
+    """Per-paper counters of a result's knowledge points or QA pairs.
+
+    Stored with the paper's state row; items may be dataclasses or dicts,
+    and fields an item type does not have are left out.
+    """
+    counters = {name: Counter() for name in FIELDS}
+    for item in items:
+        for name in FIELDS:
+            value = item.get(name) if isinstance(item, dict) else getattr(item, name, None)
+            if value is not None:
+                counters[name][value] += 1
+    return {"title": title, **{name: dict(counter) for name, counter in counters.items() if counter}}
+
+
+@dataclass
+class StageManifest:
+    """Totals of one stage."""
+
+    by_status: dict[str, int] = field(default_factory=dict)
+    items: int = 0  # of successful papers
+    tokens: dict[str, int] = field(default_factory=dict)
+    categories: dict[str, int] = field(default_factory=dict)
+    difficulties: dict[str, int] = field(default_factory=dict)
+    reasoning_types: dict[str, int] = field(default_factory=dict)
+    min_items: int = 0  # per successful paper
+    max_items: int = 0
+    # Successful papers' item counts, titles and categories, when asked for
+    sizes: dict[str, int] = field(default_factory=dict)
+    titles: dict[str, str] = field(default_factory=dict)
+    paper_categories: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    @property
+    def papers(self) -> int:
+        return sum(self.by_status.values())
+
+    def count(self, status: str) -> int:
+        return self.by_status.get(status, 0)
+
+    def to_dict(self) -> dict:
+        return {
+            "papers": self.papers,
+            "by_status": self.by_status,
+            "items": self.items,
+            "tokens": self.tokens,
+            "categories": self.categories,
+            "difficulties": self.difficulties,
+            "reasoning_types": self.reasoning_types,
+            "min_items": self.min_items,
+            "max_items": self.max_items,
+            "sizes": self.sizes,
+        }
+
+
+@dataclass
+class Manifest:
+    """Per-stage totals read from the state database."""
+
+    stages: dict[str, StageManifest] = field(default_factory=dict)
+
+    def stage(self, name: str) -> StageManifest:
+        """Totals of a stage (empty if nothing was recorded for it)."""
+        return self.stages.get(name) or StageManifest()
+
+    def add(self, stage: str, name: str, key: str, count: int) -> None:
+        """Fold in one counter row of the state database's manifest table."""
+        totals = self.stages.setdefault(stage, StageManifest())
+        if name == "status":
+            totals.by_status[key] = count
+        elif name == "items":
+            totals.items = count
+        elif name == "tokens":
+            totals.tokens[key] = count
+        elif name == "category":
+            totals.categories[key] = count
+        elif name == "difficulty":
+            totals.difficulties[key] = count
+        elif name == "reasoning_type":
+            totals.reasoning_types[key] = count
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(stage.tokens.get("total", 0) for stage in self.stages.values())
+
+    def to_dict(self) -> dict:
+        return {name: stage.to_dict() for name, stage in self.stages.items()}
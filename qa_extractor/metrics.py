@@ -0,0 +1,216 @@
+"""Prometheus metrics for long runs: a /metrics endpoint or a node-exporter textfile."""
+
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Optional
+
+from .histogram import Histogram
+from .llm_client import TokenStats
+from .manifest import Manifest
+from .storage import atomic_write
+
+logger = logging.getLogger("qa_extractor")
+
+PREFIX = "qa_extractor"
+
+# Upper bounds (seconds) of the exported histogram buckets; the recorded
+# histograms are finer, and are folded into these at export time
+LATENCY_BOUNDS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    """A label value, escaped for the text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class MetricsText:
+    """Build the Prometheus text exposition format, one metric family at a time."""
+
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help: str) -> str:
+        name = f"{PREFIX}_{name}"
+        self.lines.append(f"# HELP {name} {help}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def sample(self, name: str, value: float, **labels) -> None:
+        self.lines.append(f"{name}{_labels(labels)} {value!r}")
+
+    def histogram(self, name: str, histogram: Histogram, **labels) -> None:
+        for bound in LATENCY_BOUNDS:
+            self.sample(f"{name}_bucket", histogram.count_below(bound), **labels, le=f"{bound:g}")
+        self.sample(f"{name}_bucket", histogram.count, **labels, le="+Inf")
+        self.sample(f"{name}_sum", histogram.total, **labels)
+        self.sample(f"{name}_count", histogram.count, **labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def render_metrics(
+    stats: TokenStats,
+    manifest: Optional[Manifest] = None,
+    concurrency_target: Optional[int] = None,
+    start_time: Optional[float] = None,
+) -> str:
+    """Metrics of a run, from the client's stats and the state database's manifest."""
+    # One locked copy, so counters and histograms agree while workers record
+    stats = stats.snapshot()
+    text = MetricsText()
+
+    if start_time is not None:
+        name = text.family("start_time_seconds", "gauge", "Unix time the run started.")
+        text.sample(name, start_time)
+
+    if manifest is not None:
+        name = text.family("papers", "gauge", "Papers per stage by status (running, success, error, skipped).")
+        for stage, totals in manifest.stages.items():
+            for status, count in sorted(totals.by_status.items()):
+                text.sample(name, count, stage=stage, status=status)
+        name = text.family("items", "gauge", "Knowledge points or QA pairs produced per stage.")
+        for stage, totals in manifest.stages.items():
+            text.sample(name, totals.items, stage=stage)
+
+    name = text.family("requests_in_flight", "gauge", "LLM requests currently in flight.")
+    text.sample(name, stats.in_flight)
+    if concurrency_target is not None:
+        name = text.family("concurrency_target", "gauge", "Current in-flight request limit.")
+        text.sample(name, concurrency_target)
+
+    name = text.family("requests_total", "counter", "Completed LLM requests.")
+    text.sample(name, stats.request_count)
+    name = text.family("cache_lookups_total", "counter", "Response cache lookups by result.")
+    text.sample(name, stats.cache_hits, result="hit")
+    text.sample(name, stats.cache_misses, result="miss")
+
+    usage = stats.total_usage
+    name = text.family("tokens_total", "counter", "Tokens used by type.")
+    text.sample(name, usage.prompt_tokens, type="prompt")
+    text.sample(name, usage.completion_tokens, type="completion")
+    name = text.family("estimated_cost_usd", "gauge", "Estimated cost so far in USD.")
+    text.sample(name, stats.estimate_cost())
+
+    name = text.family("retries_total", "counter", "Retried LLM requests by error class.")
+    for error, count in sorted(stats.retry_errors.items()):
+        text.sample(name, count, error=error)
+    name = text.family("retry_seconds_total", "counter", "Seconds spent in failed attempts and retry backoff.")
+    text.sample(name, stats.retry_seconds)
+
+    name = text.family("request_duration_seconds", "histogram", "Latency of successful LLM requests by stage.")
+    for stage, histogram in sorted(stats.latency.items()):
+        text.histogram(name, histogram, stage=stage)
+    if stats.ttft.count:
+        name = text.family("time_to_first_token_seconds", "histogram", "Time to first token of streamed requests.")
+        text.histogram(name, stats.ttft)
+
+    return text.render()
+
+
+class MetricsExporter:
+    """Serve collect() at http://host:port/metrics and/or rewrite it to a textfile.
+
+    The textfile is atomically replaced every `interval` seconds (as the
+    node-exporter textfile collector expects) and once more on stop.
+    Collection happens on the exporter's threads, never on the run's.
+    """
+
+    def __init__(
+        self,
+        collect: Callable[[], str],
+        port: int = 0,
+        host: str = "127.0.0.1",
+        textfile: str = "",
+        interval: float = 15.0,
+    ):
+        self.collect = collect
+        self.port = port
+        self.host = host
+        self.textfile = Path(textfile) if textfile else None
+        self.interval = interval
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.port or self.textfile)
+
+    def start(self) -> None:
+        if self.port:
+            self._server = ThreadingHTTPServer((self.host, self.port), self._handler())
+            self._server.daemon_threads = True
+            self._spawn(self._server.serve_forever, "metrics-http")
+            logger.info(f"Serving metrics at http://{self.host}:{self._server.server_port}/metrics")
+        if self.textfile:
+            self._spawn(self._write_loop, "metrics-textfile")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.textfile:
+            self._write()
+
+    def _spawn(self, target: Callable[[], None], name: str) -> None:
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _write(self) -> None:
+        try:
+            atomic_write(self.textfile, self.collect(), durable=False)
+        except Exception as e:
+            logger.warning(f"Could not write metrics to {self.textfile}: {e}")
+
+    def _write_loop(self) -> None:
+        self._write()
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        collect = self.collect
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                try:
+                    body = collect().encode("utf-8")
+                except Exception as e:
+                    self.send_error(500, str(e))
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass  # scrapes would flood the dashboard
+
+        return Handler
+
+    def __enter__(self) -> "MetricsExporter":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
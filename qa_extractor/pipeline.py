@@ -1,7 +1,7 @@
 """Main pipeline orchestration."""
 
 import logging
-from collections import Counter
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -9,12 +9,19 @@ from rich.console import Console
 from rich.logging import RichHandler
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn, TimeElapsedColumn
 
+from .budget import TruncationStats
+from .cache import create_response_cache
 from .checkpoint import CheckpointManager
+from .concurrency import AdaptiveConcurrency, run_concurrently, run_pipelined
 from .config import Config
 from .llm_client import LLMClient
+from .loader import iter_loaded
+from .manifest import breakdown
 from .monitor import ProgressMonitor
-from .stage1_extractor import ExtractionResult, KnowledgeExtractor
+from .state_store import PaperState, StateStore, SUCCESS
+from .stage1_extractor import ExtractionResult, KnowledgeExtractor, load_extraction_results
 from .stage2_generator import GenerationResult, QAGenerator
+from .storage import check_codec, find_result
 
 
 def setup_logging(log_file: Optional[str] = None) -> logging.Logger:
@@ -57,24 +64,185 @@ class Pipeline:
         config.ensure_directories()
 
         # Initialize components
-        self.llm_client = LLMClient(config.llm)
+        self.llm_client = LLMClient(config.llm, cache=create_response_cache(config))
         self.extractor = KnowledgeExtractor(config, self.llm_client)
         self.generator = QAGenerator(config, self.llm_client)
         self.monitor = ProgressMonitor(config)
 
+        # Optional AIMD control of the in-flight window
+        self.controller: Optional[AdaptiveConcurrency] = None
+        if config.pipeline.adaptive_concurrency:
+            self.controller = AdaptiveConcurrency(
+                initial=config.pipeline.concurrency,
+                maximum=config.pipeline.max_concurrency,
+            )
+            self.llm_client.add_listener(self.controller.on_request)
+        # Chunk requests count against the same in-flight target as papers
+        self.llm_client.limit_concurrency(
+            lambda: self.controller.limit if self.controller else config.pipeline.concurrency
+        )
+
         # Paths
         self.input_dir = Path(config.pipeline.input_dir)
         self.output_dir = Path(config.pipeline.output_dir)
         self.knowledge_dir = self.output_dir / "knowledge"
         self.qa_dir = self.output_dir / "qa_pairs"
+        check_codec(config.pipeline.storage_codec)
 
         # Checkpoint manager
-        self.checkpoint_manager = CheckpointManager(self.output_dir)
+        self.checkpoint_manager = CheckpointManager(
+            self.output_dir,
+            commit_interval=config.pipeline.checkpoint_interval,
+            stats_source=lambda: self.llm_client.get_stats().to_dict(),
+        )
+
+        # Per-paper stage state, and submission times for latency
+        self.state_store = StateStore.for_output(self.output_dir)
+        self._started: dict[str, float] = {}
 
     def _get_md_files(self) -> list[Path]:
         """Get all markdown files from input directory."""
         return sorted(self.input_dir.rglob("*.md"))
 
+    def _finished(self, stage: str, resume: bool) -> dict[str, PaperState]:
+        """Papers already done in a stage, keyed by paper_id."""
+        if not resume:
+            self.state_store.clear(stage)
+            return {}
+
+        # Keep the checkpoint journal going from where it stopped
+        self.checkpoint_manager.get_current()
+        if self.state_store.is_empty():
+            # Output directories from before the state store: index them once
+            self.state_store.import_results(self.output_dir)
+        return self.state_store.finished(stage)
+
+    def _split_stage1(
+        self, md_files: list[Path], resume: bool
+    ) -> tuple[list[ExtractionResult], list[Path]]:
+        """Split input files into finished extractions and files still to process."""
+        finished = self._finished("extract", resume)
+
+        # Skip if extracted without errors AND the result file is present
+        done_paths = {}
+        for file_path in md_files:
+            state = finished.get(self.extractor._generate_paper_id(file_path))
+            if state and state.status == SUCCESS and Path(state.output_path).exists():
+                done_paths[file_path] = Path(state.output_path)
+        loaded = dict(iter_loaded(done_paths.values(), ExtractionResult.load))
+
+        results = []
+        pending_files = []
+        for file_path in md_files:
+            result = loaded.get(done_paths.get(file_path))
+            if result is not None:
+                results.append(result)
+                continue
+            if file_path in done_paths:
+                self.logger.info(f"Re-processing unreadable result: {file_path.name}")
+
+            pending_files.append(file_path)
+
+        return results, pending_files
+
+    def _split_stage2(
+        self, extraction_results: list[ExtractionResult], resume: bool
+    ) -> tuple[list[GenerationResult], list[ExtractionResult]]:
+        """Split extractions into finished QA results and papers still to generate."""
+        finished = self._finished("generate", resume)
+
+        # Skip if already processed
+        done_paths = {}
+        for extraction_result in extraction_results:
+            state = finished.get(extraction_result.paper_id)
+            if state and state.status == SUCCESS and Path(state.output_path).exists():
+                done_paths[extraction_result.paper_id] = Path(state.output_path)
+        loaded = dict(iter_loaded(done_paths.values(), GenerationResult.load))
+
+        results = []
+        to_generate = []
+        for extraction_result in extraction_results:
+            result = loaded.get(done_paths.get(extraction_result.paper_id))
+            if result is not None:
+                results.append(result)
+                continue
+            if extraction_result.paper_id in done_paths:
+                self.logger.info(f"Re-generating unreadable result: {extraction_result.paper_id}")
+
+            to_generate.append(extraction_result)
+
+        return results, to_generate
+
+    def _mark_started(self, paper_id: str, stage: str, source_file: str) -> None:
+        """Record that a paper was submitted to a stage."""
+        self._started[f"{stage}:{paper_id}"] = time.monotonic()
+        self.state_store.mark_started(paper_id, stage, source_file)
+
+    def _elapsed(self, paper_id: str, stage: str) -> Optional[float]:
+        """Seconds since a paper was submitted to a stage, if it was."""
+        start = self._started.pop(f"{stage}:{paper_id}", None)
+        return time.monotonic() - start if start is not None else None
+
+    def _record_extraction(
+        self, file_path: Path, result: ExtractionResult, stage: str = "extract"
+    ) -> None:
+        """Save a fresh extraction and checkpoint it."""
+        result_path = result.save(self.knowledge_dir, self.config.pipeline.storage_codec)
+
+        self.state_store.record(
+            paper_id=result.paper_id,
+            stage="extract",
+            token_usage=result.token_usage,
+            item_count=len(result.knowledge_points),
+            source_file=str(file_path),
+            output_path=str(result_path),
+            latency=self._elapsed(result.paper_id, "extract"),
+            breakdown=breakdown(result.paper_title, result.knowledge_points),
+        )
+
+        # Update checkpoint
+        self.checkpoint_manager.update(
+            stage=stage,
+            processed_file=str(file_path),
+            token_stats=self.llm_client.get_stats().to_dict(histograms=False),
+            knowledge_count=self.checkpoint_manager.get_current().knowledge_count
+            + len(result.knowledge_points),
+        )
+
+        self.logger.info(
+            f"  Extracted {len(result.knowledge_points)} knowledge points: {file_path.name}"
+        )
+        if result.truncation:
+            stats = TruncationStats.from_dict(result.truncation)
+            self.logger.warning(f"  Trimmed to fit context window: {file_path.name} ({stats.describe()})")
+
+    def _record_generation(
+        self, extraction_result: ExtractionResult, result: GenerationResult
+    ) -> None:
+        """Save fresh QA pairs and checkpoint them."""
+        result_path = result.save(self.qa_dir, self.config.pipeline.storage_codec)
+
+        self.state_store.record(
+            paper_id=result.paper_id,
+            stage="generate",
+            token_usage=result.token_usage,
+            item_count=len(result.qa_pairs),
+            source_file=extraction_result.source_file,
+            output_path=str(result_path),
+            latency=self._elapsed(result.paper_id, "generate"),
+            breakdown=breakdown(result.paper_title, result.qa_pairs),
+        )
+
+        # Update checkpoint
+        self.checkpoint_manager.update(
+            stage="generate",
+            token_stats=self.llm_client.get_stats().to_dict(histograms=False),
+            qa_count=self.checkpoint_manager.get_current().qa_count
+            + len(result.qa_pairs),
+        )
+
+        self.logger.info(f"  Generated {len(result.qa_pairs)} QA pairs: {extraction_result.paper_id}")
+
     def run_stage1(
         self,
         progress: Optional[Progress] = None,
@@ -90,63 +258,38 @@ class Pipeline:
             self.logger.warning(f"No markdown files found in {self.input_dir}")
             return []
 
-        # Check for resume
-        checkpoint = self.checkpoint_manager.load() if resume else None
-        processed_set = set(checkpoint.processed_files) if checkpoint else set()
-
-        results = []
         task_id = None
-
         if progress:
             task_id = progress.add_task(
                 "[cyan]Stage 1: Extracting Knowledge",
                 total=total_files,
             )
 
-        for i, file_path in enumerate(md_files):
-            file_key = str(file_path)
-
-            # Check if result file exists - always verify the output file is present
-            paper_id = self.extractor._generate_paper_id(file_path)
-            result_path = self.knowledge_dir / f"{paper_id}.json"
-
-            # Skip if already processed AND result file exists AND no errors
-            if file_key in processed_set and result_path.exists():
-                # Load existing result
-                result = ExtractionResult.load(result_path)
-
-                # Check if the result has an error - if so, re-process
-                if "error" in result.token_usage or len(result.knowledge_points) == 0:
-                    self.logger.info(f"Re-processing failed file: {file_path.name}")
-                else:
-                    results.append(result)
-                    if progress and task_id is not None:
-                        progress.update(task_id, advance=1)
-                    continue
+        results, pending_files = self._split_stage1(md_files, resume)
+        if progress and task_id is not None:
+            progress.update(task_id, advance=len(results))
 
-            # Extract knowledge
+        def on_submit(file_path: Path) -> None:
             self.logger.info(f"Processing: {file_path.name}")
-            result = self.extractor.extract_from_file(file_path)
-            result.save(self.knowledge_dir)
+            self._mark_started(self.extractor._generate_paper_id(file_path), "extract", str(file_path))
+
+        # Extract knowledge, keeping up to `concurrency` requests in flight
+        for file_path, result in run_concurrently(
+            self.extractor.extract_from_file,
+            pending_files,
+            max_workers=self.config.pipeline.concurrency,
+            on_submit=on_submit,
+            controller=self.controller,
+        ):
+            self._record_extraction(file_path, result)
             results.append(result)
 
-            # Update checkpoint
-            category_counts = Counter(kp.category for kp in result.knowledge_points)
-            self.checkpoint_manager.update(
-                stage="extract",
-                processed_file=file_key,
-                token_stats=self.llm_client.get_stats().to_dict(),
-                knowledge_count=self.checkpoint_manager.get_current().knowledge_count
-                + len(result.knowledge_points),
-            )
-
             # Update progress
             if progress and task_id is not None:
                 progress.update(task_id, advance=1)
 
-            self.logger.info(
-                f"  Extracted {len(result.knowledge_points)} knowledge points"
-            )
+        file_order = {str(path): index for index, path in enumerate(md_files)}
+        results.sort(key=lambda r: file_order.get(r.source_file, len(file_order)))
 
         self.logger.info(f"Stage 1 complete: {len(results)} papers processed")
         return results
@@ -162,67 +305,123 @@ class Pipeline:
 
         # Load extraction results if not provided
         if extraction_results is None:
-            extraction_results = []
-            for json_file in self.knowledge_dir.glob("*.json"):
-                extraction_results.append(ExtractionResult.load(json_file))
+            extraction_results = load_extraction_results(self.knowledge_dir)
 
         if not extraction_results:
             self.logger.warning("No extraction results found")
             return []
 
-        # Check for resume
-        checkpoint = self.checkpoint_manager.load() if resume else None
-        processed_set = set()
-        if checkpoint and checkpoint.stage in ["generate", "cross_doc", "complete"]:
-            # Get already generated paper IDs
-            for qa_file in self.qa_dir.glob("*.json"):
-                if qa_file.stem != "cross_doc":
-                    processed_set.add(qa_file.stem)
-
-        results = []
         task_id = None
-
         if progress:
             task_id = progress.add_task(
                 "[green]Stage 2: Generating QA Pairs",
                 total=len(extraction_results),
             )
 
-        for i, extraction_result in enumerate(extraction_results):
-            # Skip if already processed
-            if extraction_result.paper_id in processed_set:
-                result_path = self.qa_dir / f"{extraction_result.paper_id}.json"
-                if result_path.exists():
-                    result = GenerationResult.load(result_path)
-                    results.append(result)
-
-                if progress and task_id is not None:
-                    progress.update(task_id, advance=1)
-                continue
+        results, to_generate = self._split_stage2(extraction_results, resume)
+        if progress and task_id is not None:
+            progress.update(task_id, advance=len(extraction_results) - len(to_generate))
 
-            # Generate QA pairs
+        def on_submit(extraction_result: ExtractionResult) -> None:
             self.logger.info(f"Generating QA for: {extraction_result.paper_title[:50]}...")
-            result = self.generator.generate_from_extraction(extraction_result)
-            result.save(self.qa_dir)
+            self._mark_started(extraction_result.paper_id, "generate", extraction_result.source_file)
+
+        # Generate QA pairs, keeping up to `concurrency` requests in flight
+        for extraction_result, result in run_concurrently(
+            self.generator.generate_from_extraction,
+            to_generate,
+            max_workers=self.config.pipeline.concurrency,
+            on_submit=on_submit,
+            controller=self.controller,
+        ):
+            self._record_generation(extraction_result, result)
             results.append(result)
 
-            # Update checkpoint
-            self.checkpoint_manager.update(
-                stage="generate",
-                token_stats=self.llm_client.get_stats().to_dict(),
-                qa_count=self.checkpoint_manager.get_current().qa_count
-                + len(result.qa_pairs),
-            )
-
             # Update progress
             if progress and task_id is not None:
                 progress.update(task_id, advance=1)
 
-            self.logger.info(f"  Generated {len(result.qa_pairs)} QA pairs")
+        paper_order = {r.paper_id: index for index, r in enumerate(extraction_results)}
+        results.sort(key=lambda r: paper_order.get(r.paper_id, len(paper_order)))
 
         self.logger.info(f"Stage 2 complete: {len(results)} papers processed")
         return results
 
+    def run_pipelined(
+        self,
+        progress: Optional[Progress] = None,
+        resume: bool = True,
+    ) -> tuple[list[ExtractionResult], list[GenerationResult]]:
+        """Run Stages 1 and 2 together, generating QA for each paper once extracted."""
+        self.logger.info("Starting Stages 1+2: Knowledge Extraction and QA Generation (pipelined)")
+
+        md_files = self._get_md_files()
+        total_files = len(md_files)
+
+        if total_files == 0:
+            self.logger.warning(f"No markdown files found in {self.input_dir}")
+            return [], []
+
+        extract_task = generate_task = None
+        if progress:
+            extract_task = progress.add_task("[cyan]Stage 1: Extracting Knowledge", total=total_files)
+            generate_task = progress.add_task("[green]Stage 2: Generating QA Pairs", total=total_files)
+
+        extraction_results, pending_files = self._split_stage1(md_files, resume)
+        generation_results, ready = self._split_stage2(extraction_results, resume)
+        generated = {r.paper_id for r in generation_results}
+        if progress:
+            progress.update(extract_task, advance=len(extraction_results))
+            progress.update(generate_task, advance=len(extraction_results) - len(ready))
+
+        def forward(result: ExtractionResult) -> bool:
+            if result.paper_id in generated:
+                if progress:
+                    progress.update(generate_task, advance=1)
+                return False
+            return True
+
+        def on_submit(stage: str, item) -> None:
+            if stage == "first":
+                self.logger.info(f"Processing: {item.name}")
+                self._mark_started(self.extractor._generate_paper_id(item), "extract", str(item))
+            else:
+                self.logger.info(f"Generating QA for: {item.paper_title[:50]}...")
+                self._mark_started(item.paper_id, "generate", item.source_file)
+
+        for stage, item, result in run_pipelined(
+            self.extractor.extract_from_file,
+            self.generator.generate_from_extraction,
+            pending_files,
+            ready=ready,
+            forward=forward,
+            max_workers=self.config.pipeline.concurrency,
+            on_submit=on_submit,
+            controller=self.controller,
+        ):
+            if stage == "first":
+                # Both stages are active, so resume must look at Stage 2 output too
+                self._record_extraction(item, result, stage="generate")
+                extraction_results.append(result)
+                if progress:
+                    progress.update(extract_task, advance=1)
+            else:
+                self._record_generation(item, result)
+                generation_results.append(result)
+                if progress:
+                    progress.update(generate_task, advance=1)
+
+        file_order = {str(path): index for index, path in enumerate(md_files)}
+        extraction_results.sort(key=lambda r: file_order.get(r.source_file, len(file_order)))
+        paper_order = {r.paper_id: index for index, r in enumerate(extraction_results)}
+        generation_results.sort(key=lambda r: paper_order.get(r.paper_id, len(paper_order)))
+
+        self.logger.info(
+            f"Stages 1+2 complete: {len(extraction_results)} papers, "
+            f"{sum(len(r.qa_pairs) for r in generation_results)} QA pairs"
+        )
+        return extraction_results, generation_results
+
     def run_cross_doc(
         self,
         extraction_results: Optional[list[ExtractionResult]] = None,
@@ -237,16 +436,14 @@ class Pipeline:
 
         # Load extraction results if not provided
         if extraction_results is None:
-            extraction_results = []
-            for json_file in self.knowledge_dir.glob("*.json"):
-                extraction_results.append(ExtractionResult.load(json_file))
+            extraction_results = load_extraction_results(self.knowledge_dir)
 
         if len(extraction_results) < 2:
             self.logger.warning("Need at least 2 papers for cross-document QA")
             return None
 
         # Check if already done
-        cross_doc_path = self.qa_dir / "cross_doc.json"
+        cross_doc_path = find_result(self.qa_dir, "cross_doc", self.config.pipeline.storage_codec)
         if cross_doc_path.exists():
             self.logger.info("Cross-document QA already generated")
             return GenerationResult.load(cross_doc_path)
@@ -258,13 +455,22 @@ class Pipeline:
                 total=1,
             )
 
+        start = time.monotonic()
         result = self.generator.generate_cross_doc_qa(extraction_results)
-        result.save(self.qa_dir)
+        self.state_store.record(
+            paper_id=result.paper_id,
+            stage="cross_doc",
+            token_usage=result.token_usage,
+            item_count=len(result.qa_pairs),
+            output_path=str(result.save(self.qa_dir, self.config.pipeline.storage_codec)),
+            latency=time.monotonic() - start,
+            breakdown=breakdown(result.paper_title, result.qa_pairs),
+        )
 
         # Update checkpoint
         self.checkpoint_manager.update(
             stage="cross_doc",
-            token_stats=self.llm_client.get_stats().to_dict(),
+            token_stats=self.llm_client.get_stats().to_dict(histograms=False),
         )
 
         if progress and task_id is not None:
@@ -297,15 +503,21 @@ class Pipeline:
             TimeElapsedColumn(),
             console=self.console,
         ) as progress:
-            # Stage 1: Knowledge Extraction
-            extraction_results = self.run_stage1(progress=progress, resume=resume)
-
-            # Stage 2: QA Generation
-            generation_results = self.run_stage2(
-                extraction_results=extraction_results,
-                progress=progress,
-                resume=resume,
-            )
+            if self.config.pipeline.pipelined:
+                # Stages 1+2 overlapped: each paper is handed to Stage 2 once extracted
+                extraction_results, generation_results = self.run_pipelined(
+                    progress=progress, resume=resume
+                )
+            else:
+                # Stage 1: Knowledge Extraction
+                extraction_results = self.run_stage1(progress=progress, resume=resume)
+
+                # Stage 2: QA Generation
+                generation_results = self.run_stage2(
+                    extraction_results=extraction_results,
+                    progress=progress,
+                    resume=resume,
+                )
 
             # Cross-document QA
             cross_doc_result = self.run_cross_doc(
@@ -314,7 +526,7 @@ class Pipeline:
             )
 
         # Mark complete
-        self.checkpoint_manager.update(stage="complete")
+        self.checkpoint_manager.update(stage="complete", token_stats=self.llm_client.get_stats().to_dict())
 
         # Calculate statistics
         total_knowledge = sum(len(r.knowledge_points) for r in extraction_results)
@@ -344,4 +556,7 @@ class Pipeline:
 
     def close(self) -> None:
         """Clean up resources."""
+        self.extractor.close()
         self.llm_client.close()
+        self.checkpoint_manager.close()
+        self.state_store.close()
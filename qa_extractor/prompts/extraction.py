@@ -1,5 +1,7 @@
 """Prompts for Stage 1: Knowledge Point Extraction."""
 
+from typing import Optional
+
 EXTRACTION_SYSTEM_PROMPT = """You are an expert in optoelectronic polymer materials, including organic solar cells (OSCs), organic light-emitting diodes (OLEDs), organic field-effect transistors (OFETs), and related conjugated polymer systems.
 
 Your task is to extract key knowledge points from academic literature in this field. Each knowledge point should be a self-contained piece of information that could be used to generate question-answer pairs for a retrieval-augmented generation (RAG) evaluation benchmark.
@@ -100,9 +102,28 @@ EXTRACTION_USER_PROMPT = """Please extract knowledge points from the following a
 Extract knowledge points following the system instructions. Return a valid JSON object."""
 
 
-def format_extraction_prompt(paper_content: str) -> list[dict[str, str]]:
-    """Format the extraction prompt with paper content."""
+EXTRACTION_CHUNK_NOTE = """This is part {part} of {total_parts} of the paper "{paper_title}" (sections: {sections}). The other parts are processed separately, so extract only knowledge points supported by this part; fewer points are fine for a short part.
+
+"""
+
+
+def format_extraction_prompt(
+    paper_content: str,
+    part: Optional[int] = None,
+    total_parts: Optional[int] = None,
+    paper_title: str = "",
+    sections: Optional[list[str]] = None,
+) -> list[dict[str, str]]:
+    """Format the extraction prompt with paper content (or one part of it)."""
+    user_prompt = EXTRACTION_USER_PROMPT.format(paper_content=paper_content)
+    if part is not None:
+        user_prompt = EXTRACTION_CHUNK_NOTE.format(
+            part=part,
+            total_parts=total_parts,
+            paper_title=paper_title,
+            sections=", ".join(sections) if sections else "continued",
+        ) + user_prompt
     return [
         {"role": "system", "content": EXTRACTION_SYSTEM_PROMPT},
-        {"role": "user", "content": EXTRACTION_USER_PROMPT.format(paper_content=paper_content)},
+        {"role": "user", "content": user_prompt},
     ]
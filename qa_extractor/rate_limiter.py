@@ -0,0 +1,148 @@
+"""Client-side rate limiting for LLM API requests."""
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0  # units per second
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        """Add the units earned since the last refill."""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken (0 if available now).
+
+        Requests larger than the whole bucket only wait for a full bucket
+        and then drive the level negative, so they cannot block forever.
+        """
+        needed = min(amount, self.capacity)
+        if self.level >= needed:
+            return 0.0
+        return (needed - self.level) / self.rate
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limiter shared by all workers.
+
+    Prompt tokens are pre-charged from a local estimate before a request is
+    sent and reconciled against the usage the API reports afterwards. A
+    Retry-After from the server pauses every caller until it expires. A
+    limit of 0 disables that budget; pauses are honored regardless.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def tracks_tokens(self) -> bool:
+        """Whether callers need to supply token estimates."""
+        return self._tokens is not None
+
+    def _reserve(self, tokens: int) -> float:
+        """Take budget for one request, or return how long to wait first."""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._paused_until - now
+
+            if self._requests is not None:
+                self._requests.refill(now)
+                wait = max(wait, self._requests.wait_time(1))
+            if self._tokens is not None:
+                self._tokens.refill(now)
+                wait = max(wait, self._tokens.wait_time(tokens))
+
+            if wait > 0:
+                return wait
+
+            if self._requests is not None:
+                self._requests.level -= 1
+            if self._tokens is not None:
+                self._tokens.level -= tokens
+            return 0.0
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Block until a request costing `tokens` may be sent.
+
+        Returns the total time spent waiting.
+        """
+        waited = 0.0
+        while (wait := self._reserve(tokens)) > 0:
+            time.sleep(wait)
+            waited += wait
+        return waited
+
+    def reconcile(self, estimated: int, actual: int) -> None:
+        """Correct a pre-charged estimate once real usage is known."""
+        if self._tokens is None:
+            return
+        with self._lock:
+            self._tokens.level += estimated - actual
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all callers for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class ConcurrencyLimit:
+    """Cap on requests in flight across every thread, following a changing limit.
+
+    limit() is read on every acquire, so an AdaptiveConcurrency target
+    takes effect for the next request. Holders are never interrupted when
+    the limit drops; new requests wait until enough of them finish.
+    """
+
+    def __init__(self, limit: Callable[[], int]):
+        self.limit = limit
+        self.in_use = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until one more request may be in flight."""
+        with self._condition:
+            # Timed waits pick up a limit that grew without a release
+            while self.in_use >= max(1, self.limit()):
+                self._condition.wait(0.5)
+            self.in_use += 1
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_use -= 1
+            self._condition.notify()
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Parse Retry-After (seconds or HTTP date) into seconds to wait."""
+    # OpenAI-style millisecond hint is more precise when present
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
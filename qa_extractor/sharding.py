@@ -0,0 +1,236 @@
+"""Static corpus sharding and merging of shard outputs."""
+
+import hashlib
+import json
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from . import storage
+from .checkpoint import Checkpoint, CheckpointManager
+from .histogram import Histogram
+from .loader import result_files
+from .manifest import breakdown
+from .stage1_extractor import ExtractionResult
+from .stage2_generator import GenerationResult
+from .state_store import PaperState, StateStore, SUCCESS, classify
+
+STAGE_ORDER = ["extract", "generate", "cross_doc", "complete"]
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse "i/N" (1-based) into (i, N)."""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}': expected i/N, e.g. 3/16") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}': need 1 <= i <= N")
+    return index, count
+
+
+def shard_of(key: str, count: int) -> int:
+    """1-based shard a key belongs to; stable across machines and Python runs."""
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def select_shard(files: list[Path], root: Path, index: int, count: int) -> list[Path]:
+    """Files of shard index/count, hashed by path relative to the input root."""
+    return [
+        path for path in files
+        if shard_of(path.relative_to(root).as_posix(), count) == index
+    ]
+
+
+def shard_dir_name(index: int, count: int) -> str:
+    """Output subdirectory of a shard, e.g. shard-03-of-16."""
+    width = len(str(count))
+    return f"shard-{index:0{width}d}-of-{count}"
+
+
+def find_shard_dirs(paths: list[Path]) -> list[Path]:
+    """Expand directories holding shard-*-of-* subdirectories into those shards."""
+    shard_dirs = []
+    for path in paths:
+        nested = sorted(p for p in Path(path).glob("shard-*-of-*") if p.is_dir())
+        if nested and not (Path(path) / "knowledge").exists():
+            shard_dirs.extend(nested)
+        else:
+            shard_dirs.append(Path(path))
+    return shard_dirs
+
+
+@dataclass
+class MergeSummary:
+    """What merge_shards combined."""
+
+    shards: int = 0
+    knowledge_files: int = 0
+    qa_files: int = 0
+    cross_doc_qa: int = 0
+    duplicates: list[str] = field(default_factory=list)
+    token_stats: dict = field(default_factory=dict)
+
+
+def _merge_token_stats(stats: list[dict]) -> dict:
+    """Sum TokenStats.to_dict() outputs from several runs."""
+    usage_keys = ["prompt_tokens", "completion_tokens", "total_tokens"]
+    usage = {key: sum(s.get("usage", {}).get(key, 0) for s in stats) for key in usage_keys}
+    elapsed = max((s.get("elapsed_seconds", 0) for s in stats), default=0)
+
+    # Latency histograms merge by adding bucket counts
+    latency: dict[str, Histogram] = {}
+    ttft = Histogram()
+    retry_errors: Counter = Counter()
+    for s in stats:
+        for stage, data in s.get("latency", {}).items():
+            latency.setdefault(stage, Histogram()).merge(Histogram.from_dict(data))
+        ttft.merge(Histogram.from_dict(s.get("ttft", {})))
+        retry_errors.update(s.get("retry_errors", {}))
+
+    return {
+        "usage": usage,
+        "request_count": sum(s.get("request_count", 0) for s in stats),
+        "cache_hits": sum(s.get("cache_hits", 0) for s in stats),
+        "cache_misses": sum(s.get("cache_misses", 0) for s in stats),
+        # Shards run side by side, so the slowest one is the wall-clock time
+        "elapsed_seconds": elapsed,
+        "tokens_per_minute": usage["total_tokens"] / elapsed * 60 if elapsed > 0 else 0,
+        "estimated_cost_usd": sum(s.get("estimated_cost_usd", 0) for s in stats),
+        "latency": {stage: histogram.to_dict() for stage, histogram in latency.items()},
+        "ttft": ttft.to_dict(),
+        "retries": sum(s.get("retries", 0) for s in stats),
+        "retry_errors": dict(retry_errors),
+        "retry_seconds": sum(s.get("retry_seconds", 0) for s in stats),
+    }
+
+
+def merge_shards(shard_dirs: list[Path], output_dir: Path) -> MergeSummary:
+    """Fold shard output directories into one output directory.
+
+    Knowledge and QA files are copied over; a paper ID found in several
+    shards keeps its best result (successful, most items, newest).
+    Cross-document QA from each shard is concatenated into one
+    cross_doc.json, token stats are summed into the checkpoint, and the
+    state database is rebuilt from the shards' rows.
+    """
+    output_dir = Path(output_dir)
+    summary = MergeSummary(shards=len(shard_dirs))
+    states: dict[tuple[str, str, str], PaperState] = {}
+
+    # Shard state rows, to carry latency and attempts over
+    for shard in shard_dirs:
+        if (shard / StateStore.DB_FILE).exists():
+            store = StateStore.for_output(shard)
+            try:
+                for state in store.query():
+                    states[(str(shard), state.paper_id, state.stage)] = state
+            finally:
+                store.close()
+
+    merged = StateStore.for_output(output_dir)
+    merged.clear()
+    try:
+        for stage, subdir, load, items in (
+            ("extract", "knowledge", ExtractionResult.load, lambda r: r.knowledge_points),
+            ("generate", "qa_pairs", GenerationResult.load, lambda r: r.qa_pairs),
+        ):
+            candidates: dict[str, list[tuple[Path, Path]]] = {}
+            for shard in shard_dirs:
+                for path in result_files(shard / subdir, include_cross_doc=False):
+                    candidates.setdefault(storage.result_name(path), []).append((shard, path))
+
+            for paper_id, found in candidates.items():
+                shard, path = found[0]
+                if len(found) > 1:
+                    summary.duplicates.append(f"{subdir}/{paper_id}")
+                    shard, path = max(found, key=lambda c: _rank(c[1], load, items))
+
+                # Copied as is, so each file keeps the codec its shard wrote it with
+                target = output_dir / subdir / path.name
+                storage.atomic_write(target, path.read_bytes())
+                state = states.get((str(shard), paper_id, stage))
+                if state is not None and state.breakdown:
+                    merged.put(PaperState(**{**state.to_dict(), "output_path": str(target)}))
+                    continue
+
+                result = load(target)
+                totals = breakdown(result.paper_title, items(result))
+                if state is not None:
+                    # Shard state from before the manifest: fill in the breakdown
+                    merged.put(PaperState(**{
+                        **state.to_dict(),
+                        "output_path": str(target),
+                        "breakdown": json.dumps(totals, ensure_ascii=False),
+                    }))
+                else:
+                    merged.record(
+                        paper_id=paper_id,
+                        stage=stage,
+                        token_usage=result.token_usage,
+                        item_count=len(items(result)),
+                        source_file=getattr(result, "source_file", None),
+                        output_path=str(target),
+                        breakdown=totals,
+                    )
+
+            if stage == "extract":
+                summary.knowledge_files = len(candidates)
+            else:
+                summary.qa_files = len(candidates)
+
+        # One cross-document result holding every shard's pairs
+        cross_doc_paths = [storage.find_result(shard / "qa_pairs", "cross_doc") for shard in shard_dirs]
+        cross_doc_paths = [path for path in cross_doc_paths if path.exists()]
+        cross_docs = [GenerationResult.load(path) for path in cross_doc_paths]
+        if cross_docs:
+            usage_keys = ["prompt_tokens", "completion_tokens", "total_tokens"]
+            cross_doc = GenerationResult(
+                paper_id="cross_doc",
+                paper_title=cross_docs[0].paper_title,
+                qa_pairs=[qa for result in cross_docs for qa in result.qa_pairs],
+                token_usage={
+                    key: sum(r.token_usage.get(key, 0) for r in cross_docs) for key in usage_keys
+                },
+            )
+            path = cross_doc.save(output_dir / "qa_pairs", storage.codec_of(cross_doc_paths[0]))
+            merged.record(
+                paper_id="cross_doc",
+                stage="cross_doc",
+                token_usage=cross_doc.token_usage,
+                item_count=len(cross_doc.qa_pairs),
+                output_path=str(path),
+                breakdown=breakdown(cross_doc.paper_title, cross_doc.qa_pairs),
+            )
+            summary.cross_doc_qa = len(cross_doc.qa_pairs)
+    finally:
+        merged.close()
+
+    # Checkpoint with the summed token stats and the least advanced stage
+    checkpoints = [CheckpointManager(shard).load() for shard in shard_dirs]
+    checkpoints = [c for c in checkpoints if c is not None]
+    stage = min((c.stage for c in checkpoints), key=STAGE_ORDER.index, default="complete")
+    summary.token_stats = _merge_token_stats([c.token_stats for c in checkpoints if c.token_stats])
+    checkpoint_manager = CheckpointManager(output_dir)
+    checkpoint_manager.save(Checkpoint(
+        stage=stage,
+        processed_files=[f for c in checkpoints for f in c.processed_files],
+        token_stats=summary.token_stats,
+        knowledge_count=sum(c.knowledge_count for c in checkpoints),
+        qa_count=sum(c.qa_count for c in checkpoints),
+        errors=[e for c in checkpoints for e in c.errors],
+    ))
+    checkpoint_manager.close()
+    return summary
+
+
+def _rank(path: Path, load, items) -> tuple:
+    """Sort key preferring successful, larger, newer results."""
+    try:
+        result = load(path)
+    except Exception:
+        return (False, 0, 0.0)
+    count = len(items(result))
+    status, _ = classify(result.token_usage, count)
+    return (status == SUCCESS, count, path.stat().st_mtime)
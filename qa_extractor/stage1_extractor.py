@@ -1,14 +1,24 @@
 """Stage 1: Knowledge Point Extraction from academic papers."""
 
-import json
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
+from .budget import PromptBudget, TruncationStats
+from .chunking import Chunk, chunk_markdown
+from .concurrency import run_concurrently
 from .config import Config
-from .llm_client import LLMClient, LLMResponse
+from .llm_client import LLMClient, LLMResponse, TokenUsage
 from .prompts.extraction import format_extraction_prompt
+from .loader import iter_loaded, read_json, result_files
+from .storage import find_result, write_result
+from .tracing import span
+
+# Outcome of one extraction request: (parsed JSON, response) or the error
+ChunkOutcome = Union[tuple[dict, LLMResponse], Exception]
 
 
 @dataclass
@@ -50,15 +60,19 @@ class ExtractionResult:
     source_file: str
     knowledge_points: list[KnowledgePoint]
     token_usage: dict
+    truncation: Optional[dict] = None  # TruncationStats, when the paper was cut
 
     def to_dict(self) -> dict:
-        return {
+        data = {
             "paper_id": self.paper_id,
             "paper_title": self.paper_title,
             "source_file": self.source_file,
             "knowledge_points": [kp.to_dict() for kp in self.knowledge_points],
             "token_usage": self.token_usage,
         }
+        if self.truncation:
+            data["truncation"] = self.truncation
+        return data
 
     @classmethod
     def from_dict(cls, data: dict) -> "ExtractionResult":
@@ -70,21 +84,25 @@ class ExtractionResult:
                 KnowledgePoint.from_dict(kp) for kp in data.get("knowledge_points", [])
             ],
             token_usage=data.get("token_usage", {}),
+            truncation=data.get("truncation"),
         )
 
-    def save(self, output_dir: Path) -> Path:
-        """Save extraction result to JSON file."""
-        output_path = output_dir / f"{self.paper_id}.json"
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
-        return output_path
+    def save(self, output_dir: Path, codec: str = "none") -> Path:
+        """Save extraction result to a JSON file, compressed with a storage codec."""
+        return write_result(output_dir, self.paper_id, self.to_dict(), codec)
 
     @classmethod
     def load(cls, path: Path) -> "ExtractionResult":
-        """Load extraction result from JSON file."""
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return cls.from_dict(data)
+        """Load extraction result from a JSON file of any storage codec."""
+        return cls.from_dict(read_json(path))
+
+
+def load_extraction_results(knowledge_dir: Path) -> list[ExtractionResult]:
+    """Load every extraction result in a directory concurrently, skipping unreadable files."""
+    return [
+        result for _, result in iter_loaded(result_files(knowledge_dir), ExtractionResult.load)
+        if result is not None
+    ]
 
 
 class KnowledgeExtractor:
@@ -94,6 +112,31 @@ class KnowledgeExtractor:
         self.config = config
         self.llm_client = llm_client
         self.valid_categories = set(config.categories)
+        self.budget = PromptBudget(
+            context_window=config.llm.context_window,
+            max_tokens=config.llm.max_tokens,
+            count_tokens=llm_client.count_tokens,
+        )
+        # Chunk requests of every paper share one pool, sized to the request limit
+        self._chunk_executor: Optional[ThreadPoolExecutor] = None
+        self._chunk_executor_lock = threading.Lock()
+
+    def _chunk_pool(self) -> ThreadPoolExecutor:
+        with self._chunk_executor_lock:
+            if self._chunk_executor is None:
+                pipeline = self.config.pipeline
+                size = pipeline.max_concurrency if pipeline.adaptive_concurrency else pipeline.concurrency
+                self._chunk_executor = ThreadPoolExecutor(
+                    max_workers=max(size, 1), thread_name_prefix="qa-chunk"
+                )
+            return self._chunk_executor
+
+    def close(self) -> None:
+        """Shut down the shared chunk pool."""
+        with self._chunk_executor_lock:
+            if self._chunk_executor is not None:
+                self._chunk_executor.shutdown(wait=True, cancel_futures=True)
+                self._chunk_executor = None
 
     def _generate_paper_id(self, file_path: Path) -> str:
         """Generate a unique paper ID from file path."""
@@ -121,14 +164,13 @@ class KnowledgeExtractor:
         # Remove image references (keep alt text if informative)
         content = re.sub(r"!\[([^\]]*)\]\([^)]+\)", r"[Figure: \1]", content)
 
-        # Limit content length to avoid token limits
-        max_chars = 50000  # Approximately 12-15k tokens
-        if len(content) > max_chars:
-            # Try to keep introduction and results/conclusion sections
-            content = content[:max_chars]
-
         return content.strip()
 
+    @staticmethod
+    def _has_required_fields(kp: dict) -> bool:
+        """Whether a raw knowledge point is usable at all."""
+        return bool(kp.get("content")) and bool(kp.get("category"))
+
     def _validate_knowledge_points(
         self, knowledge_points: list[dict]
     ) -> list[KnowledgePoint]:
@@ -136,7 +178,7 @@ class KnowledgeExtractor:
         validated = []
         for kp in knowledge_points:
             # Check required fields
-            if not kp.get("content") or not kp.get("category"):
+            if not self._has_required_fields(kp):
                 continue
 
             # Validate category
@@ -167,11 +209,20 @@ class KnowledgeExtractor:
 
         return validated
 
-    def extract_from_file(self, file_path: Path) -> ExtractionResult:
-        """Extract knowledge points from a single markdown file."""
+    def _prepare_requests(
+        self, file_path: Path
+    ) -> tuple[str, str, list[list[dict[str, str]]], Optional[TruncationStats]]:
+        """Read a paper and build its extraction prompts.
+
+        Long papers are split into section-aligned chunks with one prompt
+        each, and every prompt is trimmed to fit the context window.
+        Returns (paper_id, paper_title, messages per chunk, truncation
+        stats or None if nothing was cut).
+        """
         # Read file content
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        with span("read_file"):
+            with open(file_path, "r", encoding="utf-8") as f:
+                content = f.read()
 
         # Generate paper ID
         paper_id = self._generate_paper_id(file_path)
@@ -180,42 +231,170 @@ class KnowledgeExtractor:
         paper_title = self._extract_title_from_content(content)
 
         # Preprocess content
-        processed_content = self._preprocess_content(content)
-
-        # Generate extraction prompt
-        messages = format_extraction_prompt(processed_content)
-
-        # Call LLM
-        try:
-            parsed_response, response = self.llm_client.chat_json(messages)
-        except Exception as e:
-            # Return empty result on error
-            return ExtractionResult(
-                paper_id=paper_id,
-                paper_title=paper_title,
-                source_file=str(file_path),
-                knowledge_points=[],
-                token_usage={"error": str(e)},
+        with span("preprocess"):
+            processed_content = self._preprocess_content(content)
+
+        if not self.config.extraction.enable_chunking:
+            with span("build_prompts"):
+                content, stats = self.budget.fit(processed_content, format_extraction_prompt)
+                truncation = stats if stats.truncated else None
+                return paper_id, paper_title, [format_extraction_prompt(content)], truncation
+
+        with span("chunk"):
+            chunk_tokens = min(
+                self.config.extraction.chunk_tokens,
+                self.budget.available(format_extraction_prompt),
             )
+            chunks = chunk_markdown(processed_content, chunk_tokens, self.llm_client.count_tokens)
+
+        with span("build_prompts", chunks=len(chunks)):
+            return self._build_chunk_requests(paper_id, paper_title, chunks)
+
+    def _build_chunk_requests(
+        self, paper_id: str, paper_title: str, chunks: list[Chunk]
+    ) -> tuple[str, str, list[list[dict[str, str]]], Optional[TruncationStats]]:
+        """One extraction prompt per chunk, each trimmed to the budget."""
+        requests = []
+        total_stats = TruncationStats()
+        for chunk in chunks:
+            if len(chunks) == 1:
+                build = format_extraction_prompt
+            else:
+                def build(text: str, chunk=chunk) -> list[dict[str, str]]:
+                    return format_extraction_prompt(
+                        text,
+                        part=chunk.index + 1,
+                        total_parts=len(chunks),
+                        paper_title=paper_title,
+                        sections=chunk.headings,
+                    )
+            content, stats = self.budget.fit(chunk.text, build)
+            total_stats = total_stats + stats
+            requests.append(build(content))
+
+        truncation = total_stats if total_stats.truncated else None
+        return paper_id, paper_title, requests, truncation
+
+    def _dedupe_knowledge_points(
+        self, knowledge_points: list[KnowledgePoint]
+    ) -> list[KnowledgePoint]:
+        """Drop points repeated across chunks (same category, near-identical wording)."""
+        kept: list[KnowledgePoint] = []
+        kept_words: list[tuple[str, set[str]]] = []
+        for kp in knowledge_points:
+            words = set(re.findall(r"\w+", kp.content.lower()))
+            duplicate = None
+            for index, (category, other) in enumerate(kept_words):
+                if category != kp.category or not words or not other:
+                    continue
+                if len(words & other) / len(words | other) >= 0.8:
+                    duplicate = kept[index]
+                    break
 
-        # Extract knowledge points from response
-        raw_knowledge_points = parsed_response.get("knowledge_points", [])
-
-        # Use title from response if available
-        if parsed_response.get("paper_title"):
-            paper_title = parsed_response["paper_title"]
+            if duplicate is None:
+                kept.append(kp)
+                kept_words.append((kp.category, words))
+            else:
+                # Keep the first occurrence, but don't lose retrieval keywords
+                for keyword in kp.keywords:
+                    if keyword not in duplicate.keywords:
+                        duplicate.keywords.append(keyword)
+        return kept
 
-        # Validate knowledge points
-        knowledge_points = self._validate_knowledge_points(raw_knowledge_points)
+    def _build_result(
+        self,
+        file_path: Path,
+        paper_id: str,
+        paper_title: str,
+        outcomes: list[ChunkOutcome],
+        truncation: Optional[TruncationStats] = None,
+    ) -> ExtractionResult:
+        """Merge per-chunk LLM responses into one validated ExtractionResult."""
+        errors = [(i, o) for i, o in enumerate(outcomes) if isinstance(o, Exception)]
+        if len(errors) == len(outcomes):
+            return self._error_result(file_path, paper_id, paper_title, errors[0][1])
+
+        knowledge_points = []
+        usage = TokenUsage()
+        title_found = False
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                continue
+            parsed_response, response = outcome
+
+            # Use title from response if available
+            if not title_found and parsed_response.get("paper_title"):
+                paper_title = parsed_response["paper_title"]
+                title_found = True
+
+            # Extract and validate knowledge points from response
+            raw_knowledge_points = parsed_response.get("knowledge_points", [])
+            with span("validate", items=len(raw_knowledge_points)):
+                knowledge_points.extend(self._validate_knowledge_points(raw_knowledge_points))
+            usage = usage + response.usage
+
+        token_usage = usage.to_dict()
+        if len(outcomes) > 1:
+            with span("dedupe", items=len(knowledge_points)):
+                knowledge_points = self._dedupe_knowledge_points(knowledge_points)
+            token_usage["chunks"] = len(outcomes)
+        if errors:
+            # Partial coverage is kept; only a total failure counts as an error
+            token_usage["chunk_errors"] = [f"chunk {i + 1}: {e}" for i, e in errors]
 
         return ExtractionResult(
             paper_id=paper_id,
             paper_title=paper_title,
             source_file=str(file_path),
             knowledge_points=knowledge_points,
-            token_usage=response.usage.to_dict(),
+            token_usage=token_usage,
+            truncation=truncation.to_dict() if truncation else None,
+        )
+
+    def _error_result(
+        self, file_path: Path, paper_id: str, paper_title: str, error: Exception
+    ) -> ExtractionResult:
+        """Empty result recording a failed extraction."""
+        return ExtractionResult(
+            paper_id=paper_id,
+            paper_title=paper_title,
+            source_file=str(file_path),
+            knowledge_points=[],
+            token_usage={"error": str(error)},
         )
 
+    def _extract_chunk(self, messages: list[dict[str, str]]) -> ChunkOutcome:
+        """Run one extraction request, returning the error instead of raising."""
+        try:
+            return self.llm_client.chat_json(
+                messages,
+                array_key="knowledge_points",
+                item_validator=self._has_required_fields,
+                stage="extract",
+            )
+        except Exception as e:
+            return e
+
+    def extract_from_file(self, file_path: Path) -> ExtractionResult:
+        """Extract knowledge points from a single markdown file."""
+        paper_id, paper_title, requests, truncation = self._prepare_requests(file_path)
+
+        # Map: extract from chunks in parallel, keeping chunk order for the merge.
+        # The shared pool and the client's concurrency limit keep chunk
+        # requests within the run's in-flight target
+        outcomes: list[ChunkOutcome] = [None] * len(requests)
+        chunk_workers = min(self.config.extraction.chunk_concurrency, len(requests))
+        for index, outcome in run_concurrently(
+            lambda index: self._extract_chunk(requests[index]),
+            range(len(requests)),
+            max_workers=chunk_workers,
+            executor=self._chunk_pool() if chunk_workers > 1 else None,
+        ):
+            outcomes[index] = outcome
+
+        # Reduce: merge and dedupe into one result
+        return self._build_result(file_path, paper_id, paper_title, outcomes, truncation)
+
     def extract_from_directory(
         self,
         input_dir: Path,
@@ -230,7 +409,8 @@ class KnowledgeExtractor:
         for i, file_path in enumerate(md_files):
             # Check if already processed
             paper_id = self._generate_paper_id(file_path)
-            output_path = output_dir / f"{paper_id}.json"
+            codec = self.config.pipeline.storage_codec
+            output_path = find_result(output_dir, paper_id, codec)
 
             if output_path.exists():
                 # Load existing result
@@ -238,7 +418,7 @@ class KnowledgeExtractor:
             else:
                 # Extract and save
                 result = self.extract_from_file(file_path)
-                result.save(output_dir)
+                result.save(output_dir, codec)
 
             results.append(result)
 
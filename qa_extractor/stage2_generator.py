@@ -1,15 +1,17 @@
 """Stage 2: QA Pair Generation from knowledge points."""
 
-import json
 import random
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
 from .config import Config
-from .llm_client import LLMClient
+from .llm_client import LLMClient, LLMResponse
 from .prompts.generation import format_generation_prompt, format_cross_doc_prompt
 from .stage1_extractor import ExtractionResult
+from .loader import read_json, result_files
+from .storage import find_result, write_result
+from .tracing import span
 
 
 @dataclass
@@ -75,19 +77,14 @@ class GenerationResult:
             token_usage=data.get("token_usage", {}),
         )
 
-    def save(self, output_dir: Path) -> Path:
-        """Save generation result to JSON file."""
-        output_path = output_dir / f"{self.paper_id}.json"
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
-        return output_path
+    def save(self, output_dir: Path, codec: str = "none") -> Path:
+        """Save generation result to a JSON file, compressed with a storage codec."""
+        return write_result(output_dir, self.paper_id, self.to_dict(), codec)
 
     @classmethod
     def load(cls, path: Path) -> "GenerationResult":
-        """Load generation result from JSON file."""
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return cls.from_dict(data)
+        """Load generation result from a JSON file of any storage codec."""
+        return cls.from_dict(read_json(path))
 
 
 class QAGenerator:
@@ -100,6 +97,11 @@ class QAGenerator:
         self.valid_difficulties = {"easy", "medium", "hard"}
         self.valid_reasoning_types = {"single-hop", "multi-hop", "cross-doc"}
 
+    @staticmethod
+    def _has_required_fields(qa: dict) -> bool:
+        """Whether a raw QA pair is usable at all."""
+        return bool(qa.get("question")) and bool(qa.get("answer"))
+
     def _validate_qa_pairs(
         self, qa_pairs: list[dict], source_title: str
     ) -> list[QAPair]:
@@ -107,7 +109,7 @@ class QAGenerator:
         validated = []
         for qa in qa_pairs:
             # Check required fields
-            if not qa.get("question") or not qa.get("answer"):
+            if not self._has_required_fields(qa):
                 continue
 
             # Validate category
@@ -148,43 +150,30 @@ class QAGenerator:
 
         return validated
 
-    def generate_from_extraction(
-        self, extraction_result: ExtractionResult
+    def _empty_result(
+        self, paper_id: str, paper_title: str, error: str
     ) -> GenerationResult:
-        """Generate QA pairs from an extraction result."""
-        if not extraction_result.knowledge_points:
-            return GenerationResult(
-                paper_id=extraction_result.paper_id,
-                paper_title=extraction_result.paper_title,
-                qa_pairs=[],
-                token_usage={"error": "No knowledge points available"},
-            )
-
-        # Prepare knowledge points for prompt
-        knowledge_points = [kp.to_dict() for kp in extraction_result.knowledge_points]
-
-        # Generate prompt
-        messages = format_generation_prompt(
-            paper_title=extraction_result.paper_title,
-            knowledge_points=knowledge_points,
+        """Empty result recording why no QA pairs were generated."""
+        return GenerationResult(
+            paper_id=paper_id,
+            paper_title=paper_title,
+            qa_pairs=[],
+            token_usage={"error": error},
         )
 
-        # Call LLM
-        try:
-            parsed_response, response = self.llm_client.chat_json(messages)
-        except Exception as e:
-            return GenerationResult(
-                paper_id=extraction_result.paper_id,
-                paper_title=extraction_result.paper_title,
-                qa_pairs=[],
-                token_usage={"error": str(e)},
-            )
-
+    def _build_result(
+        self,
+        extraction_result: ExtractionResult,
+        parsed_response: dict,
+        response: LLMResponse,
+    ) -> GenerationResult:
+        """Turn a parsed LLM response into a validated GenerationResult."""
         # Extract and validate QA pairs
         raw_qa_pairs = parsed_response.get("qa_pairs", [])
-        qa_pairs = self._validate_qa_pairs(
-            raw_qa_pairs, extraction_result.paper_title
-        )
+        with span("validate", items=len(raw_qa_pairs)):
+            qa_pairs = self._validate_qa_pairs(
+                raw_qa_pairs, extraction_result.paper_title
+            )
 
         # Ensure we have the target number of QA pairs
         min_qa = self.config.qa_settings.min_qa_per_paper
@@ -200,12 +189,51 @@ class QAGenerator:
             token_usage=response.usage.to_dict(),
         )
 
-    def generate_cross_doc_qa(
+    def generate_from_extraction(
+        self, extraction_result: ExtractionResult
+    ) -> GenerationResult:
+        """Generate QA pairs from an extraction result."""
+        if not extraction_result.knowledge_points:
+            return self._empty_result(
+                extraction_result.paper_id,
+                extraction_result.paper_title,
+                "No knowledge points available",
+            )
+
+        # Prepare knowledge points for prompt
+        knowledge_points = [kp.to_dict() for kp in extraction_result.knowledge_points]
+
+        # Generate prompt
+        with span("build_prompts"):
+            messages = format_generation_prompt(
+                paper_title=extraction_result.paper_title,
+                knowledge_points=knowledge_points,
+            )
+
+        # Call LLM
+        try:
+            parsed_response, response = self.llm_client.chat_json(
+                messages,
+                array_key="qa_pairs",
+                item_validator=self._has_required_fields,
+                stage="generate",
+            )
+        except Exception as e:
+            return self._empty_result(
+                extraction_result.paper_id, extraction_result.paper_title, str(e)
+            )
+
+        return self._build_result(extraction_result, parsed_response, response)
+
+    def _prepare_cross_doc(
         self,
         extraction_results: list[ExtractionResult],
         sample_size: Optional[int] = None,
-    ) -> GenerationResult:
-        """Generate cross-document QA pairs from multiple extraction results."""
+    ) -> Optional[list[dict[str, str]]]:
+        """Sample papers and build the cross-document prompt.
+
+        Returns None when fewer than two papers have knowledge points.
+        """
         if sample_size is None:
             sample_size = self.config.qa_settings.cross_doc_sample_size
 
@@ -222,27 +250,15 @@ class QAGenerator:
                 ]
 
         if len(knowledge_by_paper) < 2:
-            return GenerationResult(
-                paper_id="cross_doc",
-                paper_title="Cross-Document QA",
-                qa_pairs=[],
-                token_usage={"error": "Not enough papers for cross-document QA"},
-            )
+            return None
 
         # Generate prompt
-        messages = format_cross_doc_prompt(knowledge_by_paper)
-
-        # Call LLM
-        try:
-            parsed_response, response = self.llm_client.chat_json(messages)
-        except Exception as e:
-            return GenerationResult(
-                paper_id="cross_doc",
-                paper_title="Cross-Document QA",
-                qa_pairs=[],
-                token_usage={"error": str(e)},
-            )
+        return format_cross_doc_prompt(knowledge_by_paper)
 
+    def _build_cross_doc_result(
+        self, parsed_response: dict, response: LLMResponse
+    ) -> GenerationResult:
+        """Validate cross-document QA pairs from a parsed LLM response."""
         # Extract and validate QA pairs
         raw_qa_pairs = parsed_response.get("qa_pairs", [])
 
@@ -273,6 +289,31 @@ class QAGenerator:
             token_usage=response.usage.to_dict(),
         )
 
+    def generate_cross_doc_qa(
+        self,
+        extraction_results: list[ExtractionResult],
+        sample_size: Optional[int] = None,
+    ) -> GenerationResult:
+        """Generate cross-document QA pairs from multiple extraction results."""
+        messages = self._prepare_cross_doc(extraction_results, sample_size)
+        if messages is None:
+            return self._empty_result(
+                "cross_doc", "Cross-Document QA", "Not enough papers for cross-document QA"
+            )
+
+        # Call LLM
+        try:
+            parsed_response, response = self.llm_client.chat_json(
+                messages,
+                array_key="qa_pairs",
+                item_validator=self._has_required_fields,
+                stage="cross_doc",
+            )
+        except Exception as e:
+            return self._empty_result("cross_doc", "Cross-Document QA", str(e))
+
+        return self._build_cross_doc_result(parsed_response, response)
+
     def generate_from_directory(
         self,
         knowledge_dir: Path,
@@ -281,7 +322,7 @@ class QAGenerator:
     ) -> list[GenerationResult]:
         """Generate QA pairs from all extraction results in a directory."""
         # Find all extraction result files
-        json_files = list(knowledge_dir.glob("*.json"))
+        json_files = result_files(knowledge_dir)
 
         results = []
         for i, file_path in enumerate(json_files):
@@ -289,7 +330,8 @@ class QAGenerator:
             extraction_result = ExtractionResult.load(file_path)
 
             # Check if already processed
-            output_path = output_dir / f"{extraction_result.paper_id}.json"
+            codec = self.config.pipeline.storage_codec
+            output_path = find_result(output_dir, extraction_result.paper_id, codec)
 
             if output_path.exists():
                 # Load existing result
@@ -297,7 +339,7 @@ class QAGenerator:
             else:
                 # Generate and save
                 result = self.generate_from_extraction(extraction_result)
-                result.save(output_dir)
+                result.save(output_dir, codec)
 
             results.append(result)
 
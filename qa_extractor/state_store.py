@@ -0,0 +1,551 @@
+"""SQLite-backed per-paper run state."""
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from .loader import map_ordered, read_json, result_files
+from .manifest import FIELDS, TOKEN_KINDS, Manifest, StageManifest, breakdown
+from .storage import result_name
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS paper_state (
+    paper_id          TEXT NOT NULL,
+    stage             TEXT NOT NULL,
+    status            TEXT NOT NULL,
+    source_file       TEXT,
+    error             TEXT,
+    prompt_tokens     INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    total_tokens      INTEGER NOT NULL DEFAULT 0,
+    latency           REAL,
+    attempts          INTEGER NOT NULL DEFAULT 0,
+    item_count        INTEGER NOT NULL DEFAULT 0,
+    output_path       TEXT,
+    updated_at        REAL NOT NULL,
+    breakdown         TEXT,             -- manifest.breakdown() of the result, as JSON
+    PRIMARY KEY (paper_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_paper_state_status ON paper_state (stage, status);
+CREATE INDEX IF NOT EXISTS idx_paper_state_source ON paper_state (source_file);
+
+CREATE TABLE IF NOT EXISTS manifest (
+    stage TEXT NOT NULL,
+    field TEXT NOT NULL,                -- status, items, tokens or a manifest.FIELDS name
+    key   TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (stage, field, key)
+);
+"""
+
+# Bumped when the schema changes in a way existing databases must migrate to
+SCHEMA_VERSION = 1
+
+
+def _manifest_sql(rows: str, sign: str) -> list[str]:
+    """Statements adding (sign "+") or removing ("-") rows' share of the manifest.
+
+    rows is a table or subquery with paper_state's columns.
+    """
+    upsert = "ON CONFLICT (stage, field, key) DO UPDATE SET count = count + excluded.count"
+    statements = [
+        f"""INSERT INTO manifest SELECT r.stage, 'status', r.status, {sign}COUNT(*)
+            FROM {rows} AS r WHERE 1 GROUP BY r.stage, r.status {upsert}""",
+        f"""INSERT INTO manifest SELECT r.stage, 'items', '', {sign}SUM(r.item_count)
+            FROM {rows} AS r WHERE r.status = 'success' GROUP BY r.stage {upsert}""",
+    ]
+    for kind in TOKEN_KINDS:
+        statements.append(
+            f"""INSERT INTO manifest SELECT r.stage, 'tokens', '{kind}', {sign}SUM(r.{kind}_tokens)
+            FROM {rows} AS r WHERE 1 GROUP BY r.stage {upsert}"""
+        )
+    for name in FIELDS:
+        statements.append(
+            f"""INSERT INTO manifest SELECT r.stage, '{name}', j.key, {sign}SUM(j.value)
+            FROM {rows} AS r, json_each(r.breakdown, '$.{name}') AS j
+            WHERE r.status = 'success' GROUP BY r.stage, j.key {upsert}"""
+        )
+    statements.append("DELETE FROM manifest WHERE count = 0")
+    return statements
+
+
+def _row(ref: str) -> str:
+    """Subquery exposing a trigger's NEW or OLD row under paper_state's column names."""
+    columns = ["stage", "status", "item_count", "prompt_tokens", "completion_tokens", "total_tokens", "breakdown"]
+    return "(SELECT " + ", ".join(f"{ref}.{column} AS {column}" for column in columns) + ")"
+
+
+def _trigger(name: str, event: str, statements: list[str]) -> str:
+    body = "".join(f"{statement};\n" for statement in statements)
+    return f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON paper_state BEGIN\n{body}END"
+
+
+# Keep the manifest in step with paper_state in the same transaction as every write
+TRIGGERS = {
+    "manifest_insert": _trigger("manifest_insert", "INSERT", _manifest_sql(_row("NEW"), "+")),
+    "manifest_delete": _trigger("manifest_delete", "DELETE", _manifest_sql(_row("OLD"), "-")),
+    "manifest_update": _trigger(
+        "manifest_update", "UPDATE", _manifest_sql(_row("OLD"), "-") + _manifest_sql(_row("NEW"), "+")
+    ),
+}
+
+# Recount the manifest from scratch
+REBUILD_MANIFEST = ["DELETE FROM manifest"] + _manifest_sql("paper_state", "+")
+
+
+# Status values
+RUNNING = "running"
+SUCCESS = "success"
+ERROR = "error"
+SKIPPED = "skipped"
+
+
+@dataclass
+class PaperState:
+    """State of one paper in one stage."""
+
+    paper_id: str
+    stage: str
+    status: str
+    source_file: Optional[str] = None
+    error: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    latency: Optional[float] = None
+    attempts: int = 0
+    item_count: int = 0
+    output_path: Optional[str] = None
+    updated_at: float = 0.0
+    breakdown: Optional[str] = None  # JSON, see manifest.breakdown()
+
+    def to_dict(self) -> dict:
+        return {
+            "paper_id": self.paper_id,
+            "stage": self.stage,
+            "status": self.status,
+            "source_file": self.source_file,
+            "error": self.error,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens,
+            "latency": self.latency,
+            "attempts": self.attempts,
+            "item_count": self.item_count,
+            "output_path": self.output_path,
+            "updated_at": self.updated_at,
+            "breakdown": self.breakdown,
+        }
+
+
+def classify(token_usage: dict, item_count: int) -> tuple[str, Optional[str]]:
+    """Derive (status, error) from a result's token_usage and item count."""
+    if "error" in token_usage:
+        return ERROR, str(token_usage["error"])
+    if "skipped" in token_usage:
+        return SKIPPED, str(token_usage["skipped"])
+    if item_count == 0:
+        return ERROR, "no items produced"
+    return SUCCESS, None
+
+
+class StateStore:
+    """One row per (paper, stage) in a WAL-mode SQLite database.
+
+    The run loop records each paper as it starts and finishes, so resume
+    decisions and status summaries are indexed queries instead of a scan
+    over every result file. Triggers keep a manifest table of per-stage
+    totals (papers by status, items, tokens and per-category, difficulty
+    and reasoning-type counts) current with every write, so `status` and
+    `stats` read a few dozen rows however large the run is.
+    """
+
+    DB_FILE = ".state.db"
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._listeners: list[Callable[[dict], None]] = []
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        for trigger in TRIGGERS.values():
+            self._conn.execute(trigger)
+
+    def _migrate(self) -> None:
+        """Bring a database written by an older version up to SCHEMA_VERSION."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(paper_state)")}
+        if "breakdown" not in columns:
+            self._conn.execute("ALTER TABLE paper_state ADD COLUMN breakdown TEXT")
+        # Rows from before the manifest: totals without the per-field counts
+        self._conn.execute("BEGIN IMMEDIATE")
+        for statement in REBUILD_MANIFEST:
+            self._conn.execute(statement)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.execute("COMMIT")
+
+    @classmethod
+    def for_output(cls, output_dir: str | Path) -> "StateStore":
+        """Open the state database of an output directory."""
+        return cls(Path(output_dir) / cls.DB_FILE)
+
+    @classmethod
+    def exists_for(cls, output_dir: str | Path) -> bool:
+        """Whether an output directory already has a state database."""
+        return bool(cls.databases(output_dir))
+
+    @classmethod
+    def databases(cls, output_dir: str | Path) -> list[Path]:
+        """State databases of an output directory, including distributed workers'."""
+        output_dir = Path(output_dir)
+        paths = [output_dir / cls.DB_FILE] if (output_dir / cls.DB_FILE).exists() else []
+        return paths + sorted(output_dir.glob(f"workers/*/{cls.DB_FILE}"))
+
+    @classmethod
+    def in_memory(cls) -> "StateStore":
+        """A throwaway database, for totals nothing needs to keep."""
+        return cls(":memory:")
+
+    @classmethod
+    def combined_manifest(cls, output_dir: str | Path, papers: bool = False) -> Manifest:
+        """manifest() over every state database, keeping each paper's latest row."""
+        paths = cls.databases(output_dir)
+        if len(paths) == 1:
+            store = cls(paths[0])
+            try:
+                return store.manifest(papers)
+            finally:
+                store.close()
+
+        latest: dict[tuple[str, str], PaperState] = {}
+        for path in paths:
+            store = cls(path)
+            try:
+                for state in store.query():
+                    key = (state.paper_id, state.stage)
+                    if key not in latest or state.updated_at > latest[key].updated_at:
+                        latest[key] = state
+            finally:
+                store.close()
+
+        combined = cls.in_memory()
+        try:
+            for state in latest.values():
+                combined.put(state)
+            return combined.manifest(papers)
+        finally:
+            combined.close()
+
+    @classmethod
+    def load_manifest(cls, output_dir: str | Path, rebuild: bool = False, papers: bool = False) -> Manifest:
+        """Totals of an output directory, for `status` and `stats`.
+
+        Read from the state databases when there are any; otherwise (or
+        with rebuild=True) the result files are indexed first, into
+        .state.db when rebuilding and into a throwaway database when not.
+        """
+        if rebuild:
+            store = cls.for_output(output_dir)
+            try:
+                store.rebuild(output_dir)
+            finally:
+                store.close()
+
+        if cls.exists_for(output_dir):
+            return cls.combined_manifest(output_dir, papers)
+
+        store = cls.in_memory()
+        try:
+            store.import_results(output_dir)
+            return store.manifest(papers)
+        finally:
+            store.close()
+
+    def add_listener(self, listener: Callable[[dict], None]) -> None:
+        """Register a callback invoked with each transition mark_started/record write.
+
+        It gets a dict with paper_id, stage and status, plus error, latency,
+        tokens and item_count once the stage finished.
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, transition: dict) -> None:
+        for listener in self._listeners:
+            listener(transition)
+
+    def mark_started(self, paper_id: str, stage: str, source_file: Optional[str] = None) -> None:
+        """Record that a paper entered a stage, counting the attempt."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO paper_state (paper_id, stage, status, source_file, attempts, updated_at)
+                VALUES (?, ?, ?, ?, 1, ?)
+                ON CONFLICT (paper_id, stage) DO UPDATE SET
+                    status = excluded.status,
+                    source_file = COALESCE(excluded.source_file, paper_state.source_file),
+                    attempts = paper_state.attempts + 1,
+                    updated_at = excluded.updated_at
+                """,
+                (paper_id, stage, RUNNING, source_file, time.time()),
+            )
+        if self._listeners:
+            self._notify({"paper_id": paper_id, "stage": stage, "status": RUNNING})
+
+    def record(
+        self,
+        paper_id: str,
+        stage: str,
+        token_usage: dict,
+        item_count: int,
+        source_file: Optional[str] = None,
+        output_path: Optional[str] = None,
+        latency: Optional[float] = None,
+        breakdown: Optional[dict] = None,
+    ) -> None:
+        """Record the outcome of a stage for a paper in one transaction.
+
+        breakdown is manifest.breakdown() of the result, for the per-field
+        totals.
+        """
+        status, error = classify(token_usage, item_count)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO paper_state (
+                    paper_id, stage, status, source_file, error, prompt_tokens,
+                    completion_tokens, total_tokens, latency, attempts, item_count,
+                    output_path, updated_at, breakdown
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?, ?)
+                ON CONFLICT (paper_id, stage) DO UPDATE SET
+                    status = excluded.status,
+                    source_file = COALESCE(excluded.source_file, paper_state.source_file),
+                    error = excluded.error,
+                    prompt_tokens = excluded.prompt_tokens,
+                    completion_tokens = excluded.completion_tokens,
+                    total_tokens = excluded.total_tokens,
+                    latency = excluded.latency,
+                    attempts = MAX(paper_state.attempts, 1),
+                    item_count = excluded.item_count,
+                    output_path = excluded.output_path,
+                    updated_at = excluded.updated_at,
+                    breakdown = excluded.breakdown
+                """,
+                (
+                    paper_id,
+                    stage,
+                    status,
+                    source_file,
+                    error,
+                    token_usage.get("prompt_tokens", 0),
+                    token_usage.get("completion_tokens", 0),
+                    token_usage.get("total_tokens", 0),
+                    latency,
+                    item_count,
+                    output_path,
+                    time.time(),
+                    json.dumps(breakdown, ensure_ascii=False) if breakdown else None,
+                ),
+            )
+        if self._listeners:
+            self._notify({
+                "paper_id": paper_id,
+                "stage": stage,
+                "status": status,
+                "error": error,
+                "latency": latency,
+                "tokens": {kind: token_usage.get(f"{kind}_tokens", 0) for kind in TOKEN_KINDS},
+                "item_count": item_count,
+            })
+
+    def put(self, state: PaperState) -> None:
+        """Insert or replace a row as-is (e.g. copied from another database)."""
+        row = state.to_dict()
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" for _ in row)
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete skips the triggers
+        updates = ", ".join(f"{column} = excluded.{column}" for column in row)
+        with self._lock:
+            self._conn.execute(
+                f"""
+                INSERT INTO paper_state ({columns}) VALUES ({placeholders})
+                ON CONFLICT (paper_id, stage) DO UPDATE SET {updates}
+                """,
+                list(row.values()),
+            )
+
+    def get(self, paper_id: str, stage: str) -> Optional[PaperState]:
+        """State of one paper in one stage."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM paper_state WHERE paper_id = ? AND stage = ?",
+                (paper_id, stage),
+            ).fetchone()
+        return PaperState(**dict(row)) if row else None
+
+    def query(self, stage: Optional[str] = None, status: Optional[str] = None) -> list[PaperState]:
+        """Rows filtered by stage and/or status."""
+        clauses, params = [], []
+        if stage is not None:
+            clauses.append("stage = ?")
+            params.append(stage)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM paper_state {where} ORDER BY paper_id", params
+            ).fetchall()
+        return [PaperState(**dict(row)) for row in rows]
+
+    def finished(self, stage: str) -> dict[str, PaperState]:
+        """Successful or skipped rows of a stage, keyed by paper_id."""
+        return {
+            state.paper_id: state
+            for state in self.query(stage)
+            if state.status in (SUCCESS, SKIPPED)
+        }
+
+    def summary(self) -> dict[str, dict]:
+        """Per-stage counts, items and tokens by status."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT stage, status, COUNT(*) AS papers, SUM(item_count) AS items,
+                       SUM(total_tokens) AS tokens, MAX(updated_at) AS updated_at
+                FROM paper_state GROUP BY stage, status
+                """
+            ).fetchall()
+
+        summary: dict[str, dict] = {}
+        for row in rows:
+            stage = summary.setdefault(row["stage"], {"papers": 0, "items": 0, "tokens": 0, "by_status": {}})
+            stage["by_status"][row["status"]] = row["papers"]
+            stage["papers"] += row["papers"]
+            stage["tokens"] += row["tokens"] or 0
+            if row["status"] == SUCCESS:
+                stage["items"] += row["items"] or 0
+        return summary
+
+    def manifest(self, papers: bool = False) -> Manifest:
+        """Per-stage totals; with papers=True also each successful paper's size, title and categories."""
+        manifest = Manifest()
+        with self._lock:
+            rows = self._conn.execute("SELECT stage, field, key, count FROM manifest").fetchall()
+            size_rows = self._conn.execute(
+                """
+                SELECT stage, MIN(item_count) AS min_items, MAX(item_count) AS max_items
+                FROM paper_state WHERE status = ? GROUP BY stage
+                """,
+                (SUCCESS,),
+            ).fetchall()
+            paper_rows = self._conn.execute(
+                """
+                SELECT stage, paper_id, item_count, json_extract(breakdown, '$.title') AS title,
+                       json_extract(breakdown, '$.category') AS categories
+                FROM paper_state WHERE status = ? ORDER BY paper_id
+                """,
+                (SUCCESS,),
+            ).fetchall() if papers else []
+
+        for row in rows:
+            manifest.add(row["stage"], row["field"], row["key"], row["count"])
+        for row in size_rows:
+            stage = manifest.stages.setdefault(row["stage"], StageManifest())
+            stage.min_items, stage.max_items = row["min_items"], row["max_items"]
+        for row in paper_rows:
+            stage = manifest.stages.setdefault(row["stage"], StageManifest())
+            stage.sizes[row["paper_id"]] = row["item_count"]
+            stage.titles[row["paper_id"]] = row["title"] or ""
+            stage.paper_categories[row["paper_id"]] = json.loads(row["categories"] or "{}")
+        return manifest
+
+    def rebuild(self, output_dir: str | Path) -> int:
+        """Forget recorded state and re-index it from the result files on disk."""
+        self.clear()
+        return self.import_results(output_dir)
+
+    def is_empty(self) -> bool:
+        """Whether nothing has been recorded yet."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM paper_state LIMIT 1").fetchone() is None
+
+    def delete(self, paper_id: str, stage: str) -> bool:
+        """Forget one paper's state in one stage (e.g. once its result file is removed)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM paper_state WHERE paper_id = ? AND stage = ?", (paper_id, stage)
+            )
+        return cursor.rowcount > 0
+
+    def clear(self, stage: Optional[str] = None) -> None:
+        """Forget recorded state, for one stage or all of them."""
+        with self._lock:
+            if stage is None:
+                self._conn.execute("DELETE FROM paper_state")
+            else:
+                self._conn.execute("DELETE FROM paper_state WHERE stage = ?", (stage,))
+
+    def import_results(self, output_dir: str | Path) -> int:
+        """Backfill state from existing result files (one-time, for older output dirs)."""
+        output_dir = Path(output_dir)
+        imported = 0
+        with self._lock:
+            # One transaction, and one manifest recount at the end instead of per-row triggers
+            self._conn.execute("BEGIN")
+            for name in TRIGGERS:
+                self._conn.execute(f"DROP TRIGGER {name}")
+        try:
+            for stage, directory, items_key in (
+                ("extract", output_dir / "knowledge", "knowledge_points"),
+                ("generate", output_dir / "qa_pairs", "qa_pairs"),
+            ):
+                for path, data in map_ordered(read_json, result_files(directory)):
+                    row_stage = "cross_doc" if result_name(path) == "cross_doc" else stage
+                    if isinstance(data, Exception):
+                        # Counted as an error, so resuming redoes the paper
+                        self.record(
+                            paper_id=result_name(path),
+                            stage=row_stage,
+                            token_usage={"error": f"Unreadable result file: {str(data)[:50]}"},
+                            item_count=0,
+                            output_path=str(path),
+                        )
+                        imported += 1
+                        continue
+                    self.record(
+                        paper_id=data.get("paper_id") or result_name(path),
+                        stage=row_stage,
+                        token_usage=data.get("token_usage", {}),
+                        item_count=len(data.get(items_key, [])),
+                        source_file=data.get("source_file"),
+                        output_path=str(path),
+                        breakdown=breakdown(data.get("paper_title", ""), data.get(items_key, [])),
+                    )
+                    imported += 1
+        except BaseException:
+            with self._lock:
+                self._conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            for statement in REBUILD_MANIFEST + list(TRIGGERS.values()):
+                self._conn.execute(statement)
+            self._conn.execute("COMMIT")
+        return imported
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,289 @@
+"""Crash-safe file writes with batched background fsync, and result file codecs."""
+
+import atexit
+import gzip
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+
+class BackgroundSyncer:
+    """Fsync written files from a background thread, in batches.
+
+    Writers only rename a finished temp file into place, which is already
+    safe against the process being killed. Making the data survive a power
+    loss takes an fsync of the file and its directory; that is queued here
+    and done every `interval` seconds (or once `max_batch` paths are
+    waiting) for everything written meanwhile, so the hot path never
+    blocks on the disk. flush() waits for everything queued so far.
+    """
+
+    def __init__(self, interval: float = 1.0, max_batch: int = 256):
+        self.interval = interval
+        self.max_batch = max_batch
+        self._pending: dict[str, None] = {}  # insertion-ordered set
+        self._queued = 0
+        self._synced = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._flush_requested = False
+        self._closed = False
+
+    def submit(self, path: str | Path) -> None:
+        """Queue a file (and its directory) for fsync."""
+        with self._cond:
+            if self._closed:
+                _fsync_paths([str(path)])
+                return
+            self._pending[str(path)] = None
+            self._queued += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="fsync", daemon=True)
+                self._thread.start()
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Block until every file queued so far is on disk."""
+        with self._cond:
+            target = self._queued
+            if self._thread is None or self._synced >= target:
+                return
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._synced < target and self._thread.is_alive():
+                self._cond.wait()
+
+    def close(self) -> None:
+        """Sync everything still queued and stop the thread."""
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not (self._flush_requested or self._closed or len(self._pending) >= self.max_batch):
+                    # Let more writes accumulate into this batch
+                    self._cond.wait(self.interval)
+                if self._closed and not self._pending:
+                    return
+                batch = list(self._pending)
+                batch_end = self._queued
+                self._pending.clear()
+                self._flush_requested = False
+
+            _fsync_paths(batch)
+
+            with self._cond:
+                self._synced = batch_end
+                self._cond.notify_all()
+
+
+def _fsync_paths(paths: list[str]) -> None:
+    """Fsync files, then each distinct parent directory once."""
+    directories = {}
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            # Replaced or deleted since; its successor is queued separately
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+        directories[os.path.dirname(path) or "."] = None
+
+    for directory in directories:
+        # Persists the rename; directories can't be opened on Windows
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+# mkstemp creates 0600 files; give results the usual permissions instead
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+_syncer = BackgroundSyncer()
+atexit.register(_syncer.close)
+
+
+def sync(path: str | Path) -> None:
+    """Queue a file for background fsync."""
+    _syncer.submit(path)
+
+
+def flush() -> None:
+    """Wait until every queued file is on disk."""
+    _syncer.flush()
+
+
+@contextmanager
+def atomic_open(
+    path: str | Path,
+    mode: str = "w",
+    encoding: Optional[str] = "utf-8",
+    durable: bool = True,
+) -> Iterator[IO]:
+    """Open a temp file that replaces `path` only if the block completes.
+
+    Readers see either the old file or the complete new one, never a
+    partial write. With durable=True the new file is queued for a
+    background fsync.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if durable:
+        sync(path)
+
+
+def atomic_write(path: str | Path, data: str | bytes, durable: bool = True) -> Path:
+    """Atomically replace a file with `data`."""
+    mode = "wb" if isinstance(data, bytes) else "w"
+    with atomic_open(path, mode, durable=durable) as f:
+        f.write(data)
+    return Path(path)
+
+
+# Result file suffix of each storage codec; readers go by the suffix
+CODEC_SUFFIXES = {
+    "none": ".json",
+    "gzip": ".json.gz",
+    "zstd": ".json.zst",
+}
+
+# Longest first, so ".json" doesn't match the compressed names
+_SUFFIXES = sorted(CODEC_SUFFIXES.items(), key=lambda item: -len(item[1]))
+
+
+def _import_zstandard():
+    """Import zstandard, which only the zstd codec needs."""
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError(
+            "The zstd storage codec needs zstandard, which is not installed (pip install zstandard)"
+        ) from None
+    return zstandard
+
+
+def check_codec(codec: str) -> None:
+    """Fail before a run starts if a codec's library is missing."""
+    if codec not in CODEC_SUFFIXES:
+        raise ValueError(f"Unknown storage codec: {codec} (expected one of {', '.join(CODEC_SUFFIXES)})")
+    if codec == "zstd":
+        _import_zstandard()
+
+
+def codec_of(path: str | Path) -> Optional[str]:
+    """Storage codec of a result file name, or None if it isn't one."""
+    name = os.fspath(path)
+    for codec, suffix in _SUFFIXES:
+        if name.endswith(suffix):
+            return codec
+    return None
+
+
+def result_name(path: str | Path) -> str:
+    """A result file's name without its codec suffix (the paper ID)."""
+    name = Path(path).name
+    codec = codec_of(name)
+    return name[: -len(CODEC_SUFFIXES[codec])] if codec else Path(name).stem
+
+
+def result_path(directory: Path, name: str, codec: str = "none") -> Path:
+    """Where a result is written with a codec."""
+    return directory / f"{name}{CODEC_SUFFIXES[codec]}"
+
+
+def find_result(directory: Path, name: str, codec: str = "none") -> Path:
+    """An existing result file of any codec, preferring `codec`.
+
+    Falls back to the `codec` path (which does not exist) when none is
+    found, so callers can still stat or report it.
+    """
+    preferred = result_path(directory, name, codec)
+    if preferred.exists():
+        return preferred
+    for other in CODEC_SUFFIXES:
+        path = result_path(directory, name, other)
+        if other != codec and path.exists():
+            return path
+    return preferred
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        # mtime=0 keeps identical results byte-identical
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if codec == "zstd":
+        return _import_zstandard().ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decompress(data: bytes, codec: Optional[str]) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        return _import_zstandard().ZstdDecompressor().decompress(data)
+    return data
+
+
+def write_json(path: str | Path, data, indent: Optional[int] = 2, durable: bool = True) -> Path:
+    """Atomically write `data` as JSON, compressed if the name has a codec suffix.
+
+    Compressed files are written compact; indentation is only for people
+    reading the plain files.
+    """
+    codec = codec_of(path)
+    if codec in (None, "none"):
+        return atomic_write(path, json.dumps(data, indent=indent, ensure_ascii=False), durable=durable)
+    text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return atomic_write(path, compress(text.encode("utf-8"), codec), durable=durable)
+
+
+def write_result(directory: Path, name: str, data, codec: str = "none") -> Path:
+    """Write a knowledge/QA result file with a codec.
+
+    A copy saved earlier with another codec is removed, so a directory
+    never holds two results for one paper.
+    """
+    path = write_json(result_path(directory, name, codec), data)
+    for other in CODEC_SUFFIXES:
+        if other != codec:
+            try:
+                os.unlink(result_path(directory, name, other))
+            except FileNotFoundError:
+                pass
+    return path
@@ -0,0 +1,240 @@
+"""Server-sent event consumption and incremental JSON parsing."""
+
+import json
+import re
+import time
+from typing import Callable, Optional
+
+
+class StreamAborted(ValueError):
+    """Raised when a streamed completion is clearly unusable."""
+
+    # Estimated tokens the cut-off request consumed, set by the client
+    tokens_used: int = 0
+
+
+class IncrementalArrayParser:
+    """Yield the objects of a top-level JSON array as they complete.
+
+    Feed raw completion text in arbitrary chunks. Once `"<key>": [` has
+    been seen, every object closed at the array's top level is decoded and
+    returned by feed(), so items can be validated long before the whole
+    completion has arrived.
+    """
+
+    def __init__(self, key: str):
+        self._opening = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self._buffer = ""
+        self._pos = 0
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start: Optional[int] = None
+
+    def feed(self, text: str) -> list[dict]:
+        """Add text and return any array items completed by it."""
+        self._buffer += text
+        items = []
+
+        if self._done:
+            return items
+
+        if not self._in_array:
+            match = self._opening.search(self._buffer)
+            if not match:
+                return items
+            self._in_array = True
+            self._pos = match.end()
+
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            char = buffer[self._pos]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0 and char == "{":
+                    self._item_start = self._pos
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the array itself
+                    self._done = True
+                    self._pos += 1
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start is not None:
+                    fragment = buffer[self._item_start:self._pos + 1]
+                    self._item_start = None
+                    try:
+                        item = json.loads(fragment)
+                    except json.JSONDecodeError:
+                        item = None
+                    items.append(item)
+
+            self._pos += 1
+
+        return items
+
+
+class StreamWatcher:
+    """Validate a streamed JSON completion as it arrives.
+
+    Aborts when the output does not start like a JSON object, or when
+    max_invalid consecutive array items fail the validator.
+    """
+
+    # Optional markdown fence ("```" or "```json", any case), then the opening
+    # brace; group 2 is the first character after them, once it has arrived
+    _JSON_START = re.compile(r"\s*(```([A-Za-z]*)\s*)?(\S?)")
+
+    def __init__(
+        self,
+        array_key: Optional[str] = None,
+        item_validator: Optional[Callable[[dict], bool]] = None,
+        max_invalid: int = 5,
+    ):
+        self._parser = IncrementalArrayParser(array_key) if array_key else None
+        self._validator = item_validator
+        self._max_invalid = max_invalid
+        self._prefix_checked = False
+        self._head = ""
+        self._invalid_run = 0
+        self.valid_items = 0
+
+    @classmethod
+    def _starts_like_json(cls, head: str) -> Optional[bool]:
+        """Whether the output so far opens a JSON object; None until it can tell.
+
+        Undecided while the head could still be (part of) a code fence, its
+        language tag or the whitespace after it, however it is split into
+        chunks: the decision waits for the first character after them.
+        """
+        stripped = head.lstrip()
+        if not stripped:
+            return None
+        if not stripped.startswith("```"):
+            if "```".startswith(stripped):
+                return None  # a fence still arriving
+            return stripped[0] == "{"
+        match = cls._JSON_START.match(head)
+        fence, tag, first = match.group(1), match.group(2), match.group(3)
+        if tag and tag.lower() != "json":
+            if "json".startswith(tag.lower()) and not first and head.endswith(tag):
+                return None  # the tag is still arriving
+            return False
+        if not first:
+            return None
+        return first == "{" and fence is not None
+
+    def feed(self, text: str) -> None:
+        """Check newly received completion text; raise StreamAborted if broken."""
+        if not self._prefix_checked:
+            self._head += text
+            starts_like_json = self._starts_like_json(self._head)
+            if starts_like_json is False:
+                raise StreamAborted(
+                    f"Streamed output is not a JSON object: {self._head.lstrip()[:80]!r}"
+                )
+            self._prefix_checked = starts_like_json is True
+
+        if self._parser is None:
+            return
+
+        for item in self._parser.feed(text):
+            valid = isinstance(item, dict) and (
+                self._validator is None or self._validator(item)
+            )
+            if valid:
+                self.valid_items += 1
+                self._invalid_run = 0
+                continue
+
+            self._invalid_run += 1
+            if self._invalid_run >= self._max_invalid:
+                raise StreamAborted(
+                    f"{self._invalid_run} consecutive invalid items in streamed output"
+                )
+
+
+class SSEAccumulator:
+    """Assemble an OpenAI-style chat completion from server-sent events."""
+
+    def __init__(self, watcher: Optional[StreamWatcher] = None):
+        self.watcher = watcher
+        self.started = time.monotonic()
+        self.time_to_first_token: Optional[float] = None
+        self._parts: list[str] = []
+        self._data_lines: list[str] = []
+        self._finish_reason = "unknown"
+        self._usage: dict = {}
+        self._model: Optional[str] = None
+        self.done = False
+
+    def feed_line(self, line: str) -> None:
+        """Consume one line of the event stream."""
+        if line.startswith("data:"):
+            self._data_lines.append(line[5:].lstrip())
+        elif line == "" and self._data_lines:
+            # Blank line terminates an event
+            payload = "\n".join(self._data_lines)
+            self._data_lines = []
+            self._handle_event(payload)
+
+    def _handle_event(self, payload: str) -> None:
+        if payload.strip() == "[DONE]":
+            self.done = True
+            return
+
+        event = json.loads(payload)
+        if "error" in event:
+            error = event["error"]
+            if isinstance(error, dict):
+                error = error.get("message", str(error))
+            raise ValueError(f"API returned error: {error}")
+
+        if event.get("model"):
+            self._model = event["model"]
+        if event.get("usage"):
+            self._usage = event["usage"]
+
+        for choice in event.get("choices", [])[:1]:
+            delta = choice.get("delta") or choice.get("message") or {}
+            text = delta.get("content") or choice.get("text") or ""
+            if text:
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.monotonic() - self.started
+                self._parts.append(text)
+                if self.watcher:
+                    self.watcher.feed(text)
+            if choice.get("finish_reason"):
+                self._finish_reason = choice["finish_reason"]
+
+    @property
+    def content(self) -> str:
+        """Completion text received so far."""
+        return "".join(self._parts)
+
+    def finish(self) -> dict:
+        """Flush any trailing event and return a non-streaming style body."""
+        if self._data_lines:
+            self.feed_line("")
+        data = {
+            "choices": [{
+                "message": {"content": "".join(self._parts)},
+                "finish_reason": self._finish_reason,
+            }],
+            "usage": self._usage,
+        }
+        if self._model:
+            data["model"] = self._model
+        return data
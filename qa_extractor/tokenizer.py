@@ -0,0 +1,122 @@
+"""Lazy token counting with an offline fallback."""
+
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from .utils import estimate_tokens
+
+logger = logging.getLogger("qa_extractor")
+
+_environ_lock = threading.Lock()
+
+
+@contextmanager
+def _environ(name: str, value: Optional[str]) -> Iterator[None]:
+    """Set an environment variable for the duration of the block (None leaves it alone)."""
+    if value is None:
+        yield
+        return
+    with _environ_lock:
+        previous = os.environ.get(name)
+        os.environ[name] = value
+        try:
+            yield
+        finally:
+            if previous is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = previous
+
+
+class Tokenizer:
+    """Count tokens with tiktoken, loaded on first use.
+
+    Modes:
+        auto: use tiktoken, falling back to estimate_tokens if the encoding
+            cannot be loaded within load_timeout (e.g. no network to fetch
+            the BPE file on an air-gapped worker)
+        tiktoken: use tiktoken and raise if it cannot be loaded
+        estimate: never load tiktoken
+    """
+
+    MODES = ("auto", "tiktoken", "estimate")
+
+    def __init__(
+        self,
+        model: str,
+        mode: str = "auto",
+        cache_dir: str = "",
+        load_timeout: float = 10.0,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown tokenizer mode: {mode} (expected one of {', '.join(self.MODES)})")
+        self.model = model
+        self.mode = mode
+        self.cache_dir = cache_dir
+        self.load_timeout = load_timeout
+        self._encoding = None
+        self._loaded = mode == "estimate"
+        self._lock = threading.Lock()
+
+    def _load_encoding(self):
+        """Import tiktoken and load the model's encoding (may hit the network)."""
+        import tiktoken
+
+        # tiktoken reads BPE files from TIKTOKEN_CACHE_DIR before trying to
+        # download them; it is set only while loading, so the rest of the
+        # process keeps its own setting
+        with _environ("TIKTOKEN_CACHE_DIR", os.path.expanduser(self.cache_dir) if self.cache_dir else None):
+            try:
+                return tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                return tiktoken.get_encoding("cl100k_base")
+
+    def _load(self) -> None:
+        if self.mode == "tiktoken":
+            self._encoding = self._load_encoding()
+            return
+
+        # Load in a daemon thread so a download that never completes
+        # cannot hang the run
+        result: dict = {}
+
+        def target() -> None:
+            try:
+                result["encoding"] = self._load_encoding()
+            except Exception as e:
+                result["error"] = e
+
+        thread = threading.Thread(target=target, name="qa-tokenizer", daemon=True)
+        thread.start()
+        thread.join(self.load_timeout)
+
+        if "encoding" in result:
+            self._encoding = result["encoding"]
+            return
+        reason = result.get("error", f"timed out after {self.load_timeout:.0f}s")
+        logger.warning(f"tiktoken unavailable ({reason}); using approximate token counts")
+
+    @property
+    def encoding(self) -> Optional[object]:
+        """The tiktoken encoding, or None when estimating."""
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+        return self._encoding
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the real tokenizer."""
+        return self.encoding is not None
+
+    def count(self, text: str) -> int:
+        """Count tokens in text."""
+        encoding = self.encoding
+        if encoding is None:
+            return estimate_tokens(text)
+        return len(encoding.encode(text, disallowed_special=()))
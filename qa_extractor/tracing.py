@@ -0,0 +1,132 @@
+"""Span timelines of a run in Chrome Trace Event format (open in Perfetto or chrome://tracing)."""
+
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .storage import write_json
+
+# The tracer spans are recorded into, if any; instrumented code calls the
+# module-level span()/instant(), which cost one global lookup when off
+_active: Optional["Tracer"] = None
+
+_NULL_SPAN = nullcontext()
+
+
+class Tracer:
+    """Collect complete ("X") events, one timeline row per thread.
+
+    Spans on a thread nest by time, so a worker's row reads paper ->
+    stage -> prompt building, LLM call -> attempts -> network wait, JSON
+    parsing, validation. Timestamps are wall-clock microseconds, so the
+    traces of several workers line up when loaded together.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self._wall_start = time.time()
+        self._perf_start = time.perf_counter()
+        self._events: list[dict] = []
+        self._threads: dict[int, int] = {}  # thread ident -> row number
+        self._lock = threading.Lock()
+        self._events.append(self._metadata("process_name", 0, "qa_extractor"))
+
+    def _now(self) -> float:
+        """Microseconds since the epoch, from the monotonic clock."""
+        return (self._wall_start + time.perf_counter() - self._perf_start) * 1e6
+
+    def _metadata(self, name: str, tid: int, value: str) -> dict:
+        return {"name": name, "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": value}}
+
+    def _tid(self) -> int:
+        """Small row number of the calling thread, named after it on first use."""
+        ident = threading.get_ident()
+        tid = self._threads.get(ident)
+        if tid is None:
+            with self._lock:
+                tid = self._threads[ident] = len(self._threads) + 1
+                self._events.append(self._metadata("thread_name", tid, threading.current_thread().name))
+        return tid
+
+    @contextmanager
+    def span(self, name: str, category: str, args: dict) -> Iterator[dict]:
+        """Record the time spent in the block; args may be filled in inside it."""
+        tid = self._tid()
+        start = self._now()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round(start, 1),
+                "dur": round(self._now() - start, 1),
+                "pid": self.pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            with self._lock:
+                self._events.append(event)
+
+    def instant(self, name: str, category: str, args: dict) -> None:
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "i",
+            "s": "t",
+            "ts": round(self._now(), 1),
+            "pid": self.pid,
+            "tid": self._tid(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self._events.append(event)
+
+    @property
+    def event_count(self) -> int:
+        return len(self._events)
+
+    def save(self, path: str | Path) -> Path:
+        """Write the trace as JSON (gzipped if the name ends in .gz, e.g. trace.json.gz)."""
+        with self._lock:
+            events = list(self._events)
+        return write_json(path, {"traceEvents": events, "displayTimeUnit": "ms"}, indent=None, durable=False)
+
+    def start(self) -> "Tracer":
+        """Make this the tracer that span() and instant() record into."""
+        global _active
+        _active = self
+        return self
+
+    def stop(self) -> None:
+        global _active
+        if _active is self:
+            _active = None
+
+
+def span(name: str, category: str = "pipeline", **args):
+    """Context manager timing a block as a span of the active tracer (a no-op without one).
+
+    Yields the span's args dict (or None when tracing is off), so results
+    known only at the end, like an item count, can be attached.
+    """
+    tracer = _active
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, category, args)
+
+
+def instant(name: str, category: str = "pipeline", **args) -> None:
+    """Mark a point in time (e.g. a retry) on the calling thread's row."""
+    tracer = _active
+    if tracer is not None:
+        tracer.instant(name, category, args)
@@ -10,8 +10,10 @@ from .panels import (
     ActivityLog,
     ResultsSummary,
     CategoryChart,
+    LatencyTable,
 )
 from .dashboard import Dashboard
+from .events import EventDashboard, EventWriter
 
 __all__ = [
     "print_banner",
@@ -25,5 +27,8 @@ __all__ = [
     "ActivityLog",
     "ResultsSummary",
     "CategoryChart",
+    "LatencyTable",
     "Dashboard",
+    "EventDashboard",
+    "EventWriter",
 ]
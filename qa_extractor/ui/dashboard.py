@@ -1,5 +1,8 @@
 """Live dashboard for QA Extractor pipeline."""
 
+import copy
+import threading
+from collections import deque
 from dataclasses import dataclass, field
 from typing import Optional, Callable
 
@@ -9,6 +12,7 @@ from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
 
+from ..tracing import span
 from .themes import Theme, get_theme, Icons
 from .panels import (
     ConfigPanel,
@@ -18,22 +22,38 @@ from .panels import (
     ActivityLog,
     ResultsSummary,
     CategoryChart,
+    LatencyTable,
 )
 from .banner import print_banner, print_completion_banner
 
+# Dashboard stage keys -> progress panel rows
+STAGE_NAMES = {
+    "extract": "Stage 1: Extract Knowledge",
+    "generate": "Stage 2: Generate QA",
+    "cross_doc": "Stage 3: Cross-Doc QA",
+}
+
 
 class Dashboard:
-    """Live dashboard for pipeline execution."""
+    """Live dashboard for pipeline execution.
+
+    Update methods only change panel state under a lock and mark the
+    dashboard dirty, so they cost microseconds on the worker path. A
+    render thread redraws at most refresh_per_second times, and only when
+    something changed, from a copy of the panels taken under the lock.
+    """
 
     def __init__(
         self,
         console: Console,
         theme: Theme | None = None,
         config_info: dict | None = None,
+        refresh_per_second: float = 4,
     ):
         self.console = console
         self.theme = theme or get_theme()
         self.config_info = config_info or {}
+        self.refresh_per_second = refresh_per_second
 
         # Initialize panels
         self.config_panel = ConfigPanel(
@@ -42,9 +62,15 @@ class Dashboard:
             output_dir=config_info.get("output", ""),
             resume=config_info.get("resume", True),
             file_count=config_info.get("file_count", 0),
+            concurrency=config_info.get("concurrency", 1),
+            adaptive=config_info.get("adaptive_concurrency", False),
+            pipelined=config_info.get("pipelined", False),
         )
 
-        self.token_panel = TokenPanel()
+        self.token_panel = TokenPanel(
+            concurrency_target=config_info.get("concurrency", 1),
+            adaptive=config_info.get("adaptive_concurrency", False),
+        )
         self.progress_panel = ProgressPanel(stages={
             "Stage 1: Extract Knowledge": {"current": 0, "total": 0, "status": "pending"},
             "Stage 2: Generate QA": {"current": 0, "total": 0, "status": "pending"},
@@ -54,26 +80,48 @@ class Dashboard:
         self.activity_log = ActivityLog(max_lines=5)
 
         self._live: Optional[Live] = None
+        self._lock = threading.Lock()  # guards panel state and _dirty
+        self._dirty = False
+        self._stop_rendering = threading.Event()
+        self._render_thread: Optional[threading.Thread] = None
+
+    def _snapshot(self) -> tuple:
+        """Copies of the panels, safe to render while updates continue."""
+        progress = copy.copy(self.progress_panel)
+        progress.stages = {name: dict(stage) for name, stage in self.progress_panel.stages.items()}
+        activity = copy.copy(self.activity_log)
+        activity.entries = deque(self.activity_log.entries, maxlen=self.activity_log.max_lines)
+        return (
+            copy.copy(self.config_panel),
+            copy.copy(self.token_panel),
+            progress,
+            copy.copy(self.task_panel),
+            activity,
+        )
 
     def _build_layout(self) -> Layout:
-        """Build the dashboard layout."""
+        """Build the dashboard layout from a snapshot of the panels."""
+        with self._lock:
+            config_panel, token_panel, progress_panel, task_panel, activity_log = self._snapshot()
+            self._dirty = False
+
         layout = Layout()
 
         # Top row: Config and Token panels side by side
         top_row = Layout(name="top")
         top_row.split_row(
-            Layout(self.config_panel, name="config"),
-            Layout(self.token_panel, name="tokens"),
+            Layout(config_panel, name="config"),
+            Layout(token_panel, name="tokens"),
         )
 
         # Middle: Progress
-        progress_row = Layout(self.progress_panel, name="progress", size=6)
+        progress_row = Layout(progress_panel, name="progress", size=6)
 
         # Current task
-        task_row = Layout(self.task_panel, name="task", size=6)
+        task_row = Layout(task_panel, name="task", size=6)
 
         # Activity log
-        log_row = Layout(self.activity_log, name="log", size=9)
+        log_row = Layout(activity_log, name="log", size=9)
 
         layout.split_column(
             top_row,
@@ -81,31 +129,53 @@ class Dashboard:
             task_row,
             log_row,
         )
-        layout["top"].size = 7
+        # Tall enough for every optional token panel row
+        layout["top"].size = 10
 
         return layout
 
+    def _render_loop(self) -> None:
+        """Redraw whenever the panels changed, at most refresh_per_second times."""
+        interval = 1 / self.refresh_per_second
+        while not self._stop_rendering.wait(interval):
+            if self._dirty:
+                self._render()
+
+    def _render(self) -> None:
+        live = self._live
+        if live:
+            with span("render", "ui"):
+                live.update(self._build_layout(), refresh=True)
+
     def start(self) -> None:
         """Start the live dashboard."""
         print_banner(self.console, self.theme)
+        # Redraws are driven by the render thread, not Live's own timer
         self._live = Live(
             self._build_layout(),
             console=self.console,
-            refresh_per_second=4,
+            auto_refresh=False,
             transient=False,
         )
-        self._live.start()
+        self._live.start(refresh=True)
+        self._stop_rendering.clear()
+        self._render_thread = threading.Thread(target=self._render_loop, name="dashboard", daemon=True)
+        self._render_thread.start()
 
     def stop(self) -> None:
-        """Stop the live dashboard."""
+        """Stop the live dashboard, after drawing its final state."""
+        if self._render_thread:
+            self._stop_rendering.set()
+            self._render_thread.join()
+            self._render_thread = None
         if self._live:
+            self._render()
             self._live.stop()
             self._live = None
 
     def refresh(self) -> None:
-        """Refresh the dashboard display."""
-        if self._live:
-            self._live.update(self._build_layout())
+        """Have the render thread redraw the dashboard on its next tick."""
+        self._dirty = True
 
     # Update methods
     def update_tokens(
@@ -115,14 +185,38 @@ class Dashboard:
         total_tokens: int,
         estimated_cost: float,
         request_count: int = 0,
+        cache_hits: int = 0,
+        cache_misses: int = 0,
+        latency: dict | None = None,
+        retries: int = 0,
+        retry_seconds: float = 0.0,
     ) -> None:
-        """Update token usage panel."""
-        self.token_panel.prompt_tokens = prompt_tokens
-        self.token_panel.completion_tokens = completion_tokens
-        self.token_panel.total_tokens = total_tokens
-        self.token_panel.estimated_cost = estimated_cost
-        self.token_panel.request_count = request_count
-        self.refresh()
+        """Update token usage panel.
+
+        latency is a Histogram.summary() of request latencies.
+        """
+        with self._lock:
+            self.token_panel.prompt_tokens = prompt_tokens
+            self.token_panel.completion_tokens = completion_tokens
+            self.token_panel.total_tokens = total_tokens
+            self.token_panel.estimated_cost = estimated_cost
+            self.token_panel.request_count = request_count
+            self.token_panel.cache_hits = cache_hits
+            self.token_panel.cache_misses = cache_misses
+            if latency:
+                self.token_panel.latency_p50 = latency["p50"]
+                self.token_panel.latency_p95 = latency["p95"]
+                self.token_panel.latency_p99 = latency["p99"]
+            self.token_panel.retries = retries
+            self.token_panel.retry_seconds = retry_seconds
+            self._dirty = True
+
+    def update_concurrency(self, in_flight: int, target: int) -> None:
+        """Update in-flight requests and the current concurrency target."""
+        with self._lock:
+            self.token_panel.in_flight = in_flight
+            self.token_panel.concurrency_target = target
+            self._dirty = True
 
     def update_progress(
         self,
@@ -132,20 +226,16 @@ class Dashboard:
         status: str = "in_progress",
     ) -> None:
         """Update progress for a stage."""
-        stage_map = {
-            "extract": "Stage 1: Extract Knowledge",
-            "generate": "Stage 2: Generate QA",
-            "cross_doc": "Stage 3: Cross-Doc QA",
-        }
-        stage_name = stage_map.get(stage, stage)
-
-        if stage_name in self.progress_panel.stages:
-            self.progress_panel.stages[stage_name] = {
-                "current": current,
-                "total": total,
-                "status": status,
-            }
-        self.refresh()
+        stage_name = STAGE_NAMES.get(stage, stage)
+
+        with self._lock:
+            if stage_name in self.progress_panel.stages:
+                self.progress_panel.stages[stage_name] = {
+                    "current": current,
+                    "total": total,
+                    "status": status,
+                }
+            self._dirty = True
 
     def update_task(
         self,
@@ -155,29 +245,27 @@ class Dashboard:
         status_message: str = "",
     ) -> None:
         """Update current task panel."""
-        self.task_panel.filename = filename
-        self.task_panel.title = title
-        self.task_panel.status = status
-        self.task_panel.status_message = status_message
-        self.refresh()
+        with self._lock:
+            self.task_panel.filename = filename
+            self.task_panel.title = title
+            self.task_panel.status = status
+            self.task_panel.status_message = status_message
+            self._dirty = True
 
     def log(self, message: str, level: str = "info") -> None:
         """Add an entry to the activity log."""
-        self.activity_log.add(message, level)
-        self.refresh()
+        with self._lock:
+            self.activity_log.add(message, level)
+            self._dirty = True
 
     def set_stage_total(self, stage: str, total: int) -> None:
         """Set the total count for a stage."""
-        stage_map = {
-            "extract": "Stage 1: Extract Knowledge",
-            "generate": "Stage 2: Generate QA",
-            "cross_doc": "Stage 3: Cross-Doc QA",
-        }
-        stage_name = stage_map.get(stage, stage)
+        stage_name = STAGE_NAMES.get(stage, stage)
 
-        if stage_name in self.progress_panel.stages:
-            self.progress_panel.stages[stage_name]["total"] = total
-        self.refresh()
+        with self._lock:
+            if stage_name in self.progress_panel.stages:
+                self.progress_panel.stages[stage_name]["total"] = total
+            self._dirty = True
 
     def __enter__(self) -> "Dashboard":
         self.start()
@@ -199,8 +287,16 @@ def print_results_summary(
     category_data: dict[str, int] | None = None,
     difficulty_data: dict[str, int] | None = None,
     theme: Theme | None = None,
+    latency: dict[str, dict] | None = None,
+    retries: int = 0,
+    retry_seconds: float = 0.0,
+    retry_errors: dict[str, int] | None = None,
 ) -> None:
-    """Print the final results summary."""
+    """Print the final results summary.
+
+    latency maps "all", each stage and optionally "ttft" to
+    Histogram.summary() dicts.
+    """
     theme = theme or get_theme()
 
     # Completion banner
@@ -253,3 +349,8 @@ def print_results_summary(
         padding=(0, 1),
     ))
     console.print()
+
+    # Request latency
+    if latency and latency.get("all", {}).get("count"):
+        console.print(LatencyTable(latency, retries, retry_seconds, retry_errors))
+        console.print()
@@ -0,0 +1,99 @@
+"""Headless progress reporting as JSON-lines events."""
+
+import json
+import sys
+import threading
+import time
+from typing import IO, Optional
+
+from .dashboard import STAGE_NAMES
+
+
+class EventWriter:
+    """Write one JSON object per line, each stamped with a Unix time.
+
+    Lines are written whole under a lock and flushed straight away, so
+    events from concurrent workers never interleave and a consumer
+    tailing the stream sees them as they happen.
+    """
+
+    def __init__(self, stream: IO[str], close: bool = False):
+        self.stream = stream
+        self._close = close
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: Optional[str]) -> "EventWriter":
+        """Events to a file (appended), or to stdout for None or "-"."""
+        if not path or path == "-":
+            return cls(sys.stdout)
+        return cls(open(path, "a", encoding="utf-8", buffering=1), close=True)
+
+    def emit(self, event: str, **fields) -> None:
+        line = json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def paper(self, transition: dict) -> None:
+        """A paper entering or finishing a stage (a StateStore listener)."""
+        self.emit("paper", **transition)
+
+    def close(self) -> None:
+        if self._close:
+            self.stream.close()
+
+
+class EventDashboard:
+    """Stand-in for Dashboard that reports through an EventWriter.
+
+    Takes the same update calls but draws nothing. Stage status changes
+    and activity log messages become events; per-paper progress comes
+    from the state store (see EventWriter.paper), so success messages,
+    which only repeat it, and the token and task panels' frequent updates
+    are dropped.
+    """
+
+    def __init__(self, events: EventWriter, config_info: dict | None = None):
+        self.events = events
+        self.config_info = config_info or {}
+        self._stages: dict[str, str] = {}
+
+    def start(self) -> None:
+        self.events.emit("run_start", **self.config_info)
+
+    def stop(self) -> None:
+        pass
+
+    def refresh(self) -> None:
+        pass
+
+    def update_tokens(self, *args, **kwargs) -> None:
+        pass
+
+    def update_concurrency(self, in_flight: int, target: int) -> None:
+        pass
+
+    def update_task(self, *args, **kwargs) -> None:
+        pass
+
+    def update_progress(self, stage: str, current: int, total: int, status: str = "in_progress") -> None:
+        """Emit a stage event when a stage's status changes."""
+        if stage not in STAGE_NAMES or self._stages.get(stage) == status:
+            return
+        self._stages[stage] = status
+        self.events.emit("stage", stage=stage, status=status, current=current, total=total)
+
+    def set_stage_total(self, stage: str, total: int) -> None:
+        pass
+
+    def log(self, message: str, level: str = "info") -> None:
+        if level != "success":
+            self.events.emit("log", level=level, message=message)
+
+    def __enter__(self) -> "EventDashboard":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
@@ -23,6 +23,9 @@ class ConfigPanel:
     output_dir: str = ""
     resume: bool = True
     file_count: int = 0
+    concurrency: int = 1
+    adaptive: bool = False
+    pipelined: bool = False
 
     def __rich__(self) -> Panel:
         """Render as Rich Panel."""
@@ -36,6 +39,12 @@ class ConfigPanel:
         table.add_row("Input:", f"{self.input_dir} ({self.file_count} files)")
         table.add_row("Output:", self.output_dir)
         table.add_row("Resume:", f"[{theme.success}]enabled[/]" if self.resume else f"[{theme.warning}]disabled[/]")
+        if self.adaptive:
+            table.add_row("Workers:", f"adaptive (starting at {self.concurrency})")
+        elif self.concurrency > 1:
+            table.add_row("Workers:", f"{self.concurrency} concurrent requests")
+        if self.pipelined:
+            table.add_row("Mode:", "pipelined (Stage 1 → Stage 2)")
 
         return Panel(
             table,
@@ -54,6 +63,17 @@ class TokenPanel:
     total_tokens: int = 0
     estimated_cost: float = 0.0
     request_count: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    in_flight: int = 0
+    concurrency_target: int = 1
+    adaptive: bool = False
+    # Request latency percentiles (seconds) and retries
+    latency_p50: float = 0.0
+    latency_p95: float = 0.0
+    latency_p99: float = 0.0
+    retries: int = 0
+    retry_seconds: float = 0.0
 
     def __rich__(self) -> Panel:
         """Render as Rich Panel."""
@@ -67,6 +87,27 @@ class TokenPanel:
         table.add_row(f"{Icons.ARROW_RIGHT} Completion:", f"{self.completion_tokens:,} tokens")
         table.add_row(f"{Icons.ARROW_RIGHT} Total:", f"[{theme.primary}]{self.total_tokens:,}[/] tokens")
         table.add_row(f"{Icons.ARROW_RIGHT} Est. Cost:", f"[{theme.success}]${self.estimated_cost:.2f}[/]")
+        if self.cache_hits or self.cache_misses:
+            table.add_row(
+                f"{Icons.ARROW_RIGHT} Cache:",
+                f"[{theme.success}]{self.cache_hits:,}[/] hits / {self.cache_misses:,} misses",
+            )
+        if self.adaptive or self.concurrency_target > 1:
+            label = "target" if self.adaptive else "max"
+            table.add_row(
+                f"{Icons.ARROW_RIGHT} In Flight:",
+                f"{self.in_flight} / [{theme.primary}]{self.concurrency_target}[/] {label}",
+            )
+        if self.latency_p50:
+            table.add_row(
+                f"{Icons.ARROW_RIGHT} Latency:",
+                f"p50 {self.latency_p50:.1f}s / p95 {self.latency_p95:.1f}s / p99 [{theme.primary}]{self.latency_p99:.1f}s[/]",
+            )
+        if self.retries:
+            table.add_row(
+                f"{Icons.ARROW_RIGHT} Retries:",
+                f"[{theme.warning}]{self.retries:,}[/] ({self.retry_seconds:.0f}s lost)",
+            )
 
         return Panel(
             table,
@@ -353,3 +394,66 @@ class CategoryChart:
             border_style=theme.border,
             padding=(0, 1),
         )
+
+
+class LatencyTable:
+    """Request latency percentiles by stage, with retry counts."""
+
+    STAGE_LABELS = {
+        "all": "All requests",
+        "extract": "Stage 1: Extract",
+        "generate": "Stage 2: Generate",
+        "cross_doc": "Stage 3: Cross-Doc",
+        "ttft": "Time to first token",
+    }
+
+    def __init__(
+        self,
+        latency: dict[str, dict],
+        retries: int = 0,
+        retry_seconds: float = 0.0,
+        retry_errors: dict[str, int] | None = None,
+    ):
+        self.latency = latency  # label -> Histogram.summary()
+        self.retries = retries
+        self.retry_seconds = retry_seconds
+        self.retry_errors = retry_errors or {}
+
+    def __rich__(self) -> Panel:
+        """Render as Rich Panel."""
+        theme = get_theme()
+
+        table = Table(box=None, padding=(0, 2), header_style=theme.text_dim)
+        table.add_column("")
+        for column in ("Requests", "Mean", "p50", "p95", "p99", "Max"):
+            table.add_column(column, justify="right")
+
+        for label, summary in self.latency.items():
+            if not summary.get("count"):
+                continue
+            table.add_row(
+                f"[{theme.text}]{self.STAGE_LABELS.get(label, label)}[/]",
+                f"{summary['count']:,}",
+                f"{summary['mean']:.2f}s",
+                f"{summary['p50']:.2f}s",
+                f"{summary['p95']:.2f}s",
+                f"[{theme.primary}]{summary['p99']:.2f}s[/]",
+                f"{summary['max']:.2f}s",
+            )
+
+        parts: list[RenderableType] = [table]
+        if self.retries:
+            by_class = ", ".join(
+                f"{name} {count:,}" for name, count in sorted(self.retry_errors.items(), key=lambda x: -x[1])
+            )
+            parts.append(Text.from_markup(
+                f"\n[{theme.text_dim}]Retries:[/] [{theme.warning}]{self.retries:,}[/] "
+                f"[{theme.text_dim}]({self.retry_seconds:.1f}s in failed attempts and backoff; {by_class})[/]"
+            ))
+
+        return Panel(
+            Group(*parts),
+            title=f"[{theme.title}]Request Latency[/]",
+            border_style=theme.border,
+            padding=(0, 1),
+        )
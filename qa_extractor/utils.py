@@ -62,9 +62,29 @@ def clean_markdown_content(content: str) -> str:
     return content.strip()
 
 
+_WORDS = re.compile(r"[A-Za-z]+")
+_DIGITS = re.compile(r"\d+")
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+_SYMBOLS = re.compile(r"[^\sA-Za-z\d\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+_LINE_BREAKS = re.compile(r"\n+")
+
+
 def estimate_tokens(text: str) -> int:
-    """Rough estimate of token count (approximately 4 chars per token)."""
-    return len(text) // 4
+    """Estimate BPE token count from character classes, without a tokenizer.
+
+    Words cost one token per 5 letters (at least one), numbers one per 3 digits
+    (BPE vocabularies group digits in threes), CJK characters one each, and
+    punctuation, symbols and other scripts one per character, which keeps
+    SMILES, units and LaTeX from being badly underestimated. Errs high.
+    """
+    if not text:
+        return 0
+    words = sum((len(w) + 4) // 5 for w in _WORDS.findall(text))
+    digits = sum((len(d) + 2) // 3 for d in _DIGITS.findall(text))
+    cjk = len(_CJK.findall(text))
+    symbols = len(_SYMBOLS.findall(text))
+    line_breaks = len(_LINE_BREAKS.findall(text))
+    return words + digits + cjk + symbols + line_breaks
 
 
 def format_number(num: int) -> str:
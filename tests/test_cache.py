@@ -0,0 +1,62 @@
+"""Tests for the on-disk LLM response cache."""
+
+import os
+
+from qa_extractor.cache import ResponseCache
+
+
+def entry(size: int) -> dict:
+    return {"content": "x" * size}
+
+
+def small_cache(tmp_path, entries: int) -> ResponseCache:
+    cache = ResponseCache(tmp_path, max_size_mb=1)
+    # Room for `entries` values of about 100 bytes
+    cache.max_bytes = entries * 120
+    return cache
+
+
+def test_key_depends_on_every_request_field():
+    messages = [{"role": "user", "content": "hi"}]
+    key = ResponseCache.make_key("m", messages, 0.2, 100)
+    assert key == ResponseCache.make_key("m", [dict(m) for m in messages], 0.2, 100)
+    assert key != ResponseCache.make_key("m2", messages, 0.2, 100)
+    assert key != ResponseCache.make_key("m", messages, 0.3, 100)
+    assert key != ResponseCache.make_key("m", messages, 0.2, 200)
+
+
+def test_put_get_delete(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("ab12", entry(10))
+    assert cache.get("ab12") == entry(10)
+    cache.delete("ab12")
+    assert cache.get("ab12") is None
+    assert len(cache) == 0 and cache.size_bytes == 0
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = small_cache(tmp_path, 3)
+    for key in ("aa1", "bb2", "cc3"):
+        cache.put(key, entry(100))
+    cache.get("aa1")  # now bb2 is the least recently used
+    cache.put("dd4", entry(100))
+
+    assert cache.get("bb2") is None
+    assert not (tmp_path / "bb" / "bb2.json").exists()
+    assert all(cache.get(key) is not None for key in ("aa1", "cc3", "dd4"))
+    assert cache.size_bytes <= cache.max_bytes
+
+
+def test_recency_survives_a_restart(tmp_path):
+    cache = small_cache(tmp_path, 3)
+    for age, key in enumerate(("aa1", "bb2", "cc3")):
+        cache.put(key, entry(100))
+        # Modification times carry the LRU order across runs
+        os.utime(cache._path(key), (1000 + age, 1000 + age))
+    os.utime(cache._path("aa1"), (2000, 2000))
+
+    reopened = small_cache(tmp_path, 3)
+    assert len(reopened) == 3
+    reopened.put("dd4", entry(100))
+    assert reopened.get("bb2") is None
+    assert reopened.get("aa1") is not None
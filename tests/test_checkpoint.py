@@ -0,0 +1,59 @@
+"""Tests for checkpoint journal replay and compaction."""
+
+import json
+
+from qa_extractor.checkpoint import Checkpoint, CheckpointManager
+
+
+def test_journal_replays_on_top_of_snapshot(tmp_path):
+    manager = CheckpointManager(tmp_path)
+    manager.save(Checkpoint(processed_files=["a.md"]))
+    manager.update(processed_file="b.md")
+    manager.update(processed_file="c.md")
+
+    loaded = CheckpointManager(tmp_path).load()
+    assert loaded.processed_files == ["a.md", "b.md", "c.md"]
+
+
+def test_torn_line_is_dropped_and_later_appends_survive(tmp_path):
+    manager = CheckpointManager(tmp_path)
+    manager.save(Checkpoint())
+    manager.update(processed_file="a.md")
+    manager.update(processed_file="b.md")
+    # A crash mid-write leaves a torn line followed by a later good one
+    with open(manager.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"processed_file":"c.m\n')
+        f.write(json.dumps({"processed_file": "d.md"}) + "\n")
+
+    resumed = CheckpointManager(tmp_path)
+    assert resumed.load().processed_files == ["a.md", "b.md"]
+    resumed.update(processed_file="e.md")
+
+    assert CheckpointManager(tmp_path).load().processed_files == ["a.md", "b.md", "e.md"]
+
+
+def test_unterminated_last_line_counts_as_torn(tmp_path):
+    manager = CheckpointManager(tmp_path)
+    manager.save(Checkpoint())
+    manager.update(processed_file="a.md")
+    with open(manager.journal_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"processed_file": "b.md"}))
+
+    resumed = CheckpointManager(tmp_path)
+    resumed.load()
+    resumed.update(processed_file="c.md")
+    assert CheckpointManager(tmp_path).load().processed_files == ["a.md", "c.md"]
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path):
+    manager = CheckpointManager(tmp_path, compact_interval=3, stats_source=lambda: {"requests": 7})
+    manager.save(Checkpoint())
+    for name in ("a.md", "b.md"):
+        manager.update(processed_file=name)
+    assert manager.journal_path.exists()
+
+    manager.update(processed_file="c.md")
+    assert not manager.journal_path.exists()
+    snapshot = json.loads(manager.checkpoint_path.read_text(encoding="utf-8"))
+    assert snapshot["processed_files"] == ["a.md", "b.md", "c.md"]
+    assert snapshot["token_stats"] == {"requests": 7}
@@ -0,0 +1,78 @@
+"""Tests for section-aware chunking and prompt budgeting of papers."""
+
+from qa_extractor.budget import PromptBudget
+from qa_extractor.chunking import chunk_markdown, split_sections
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def section(heading: str, words: int) -> str:
+    return f"## {heading}\n\n" + " ".join(f"{heading.lower()}{i}" for i in range(words))
+
+
+def test_split_sections_ignores_headings_in_code_fences():
+    text = "# Title\nintro\n```\n# not a heading\n```\n## Methods\nsteps\n### Detail\nmore"
+    sections = split_sections(text)
+    assert [s.heading for s in sections] == ["Title", "Methods"]
+    assert "# not a heading" in sections[0].text
+    assert "### Detail" in sections[1].text
+
+
+def test_paper_within_budget_is_one_unchanged_chunk():
+    text = section("Intro", 10)
+    chunks = chunk_markdown(text, max_tokens=100, count_tokens=count_words)
+    assert len(chunks) == 1
+    assert chunks[0].text == text
+
+
+def test_sections_are_packed_in_order_within_budget():
+    text = "\n\n".join(section(h, 30) for h in ("Intro", "Methods", "Results", "Discussion"))
+    chunks = chunk_markdown(text, max_tokens=70, count_tokens=count_words)
+
+    assert [c.headings for c in chunks] == [["Intro", "Methods"], ["Results", "Discussion"]]
+    assert [c.index for c in chunks] == [0, 1]
+    assert all(c.tokens <= 70 for c in chunks)
+    assert " ".join(c.text for c in chunks).split() == text.split()
+
+
+def test_oversized_section_is_split_on_paragraphs():
+    paragraphs = "\n\n".join(" ".join(["w"] * 20) for _ in range(5))
+    chunks = chunk_markdown(f"## Big\n\n{paragraphs}", max_tokens=45, count_tokens=count_words)
+    assert len(chunks) > 1
+    assert all(count_words(c.text) <= 45 for c in chunks)
+    assert sum(count_words(c.text) for c in chunks) == count_words(paragraphs) + 2
+
+
+def build(content: str) -> list[dict[str, str]]:
+    return [{"role": "system", "content": "extract facts"}, {"role": "user", "content": content}]
+
+
+def test_budget_leaves_fitting_papers_alone():
+    budget = PromptBudget(context_window=1000, max_tokens=200, count_tokens=count_words)
+    text = section("Intro", 50)
+    fitted, stats = budget.fit(text, build)
+    assert fitted == text
+    assert not stats.truncated
+
+
+def test_budget_drops_low_value_sections_first():
+    budget = PromptBudget(context_window=300, max_tokens=100, count_tokens=count_words)
+    text = "\n\n".join([section("Intro", 80), section("Results", 80), section("References", 80)])
+    fitted, stats = budget.fit(text, build)
+
+    assert stats.dropped_sections == ["References"]
+    assert stats.trimmed_sections == []
+    assert "references0" not in fitted and "results79" in fitted
+    assert budget.count_messages(build(fitted)) <= 300 - 100
+
+
+def test_budget_shortens_the_largest_section_from_its_end():
+    budget = PromptBudget(context_window=300, max_tokens=100, count_tokens=count_words)
+    text = "\n\n".join([section("Intro", 40), section("Results", 200)])
+    fitted, stats = budget.fit(text, build)
+
+    assert stats.trimmed_sections == ["Results"]
+    assert stats.truncated and stats.final_tokens <= stats.budget_tokens
+    assert "intro39" in fitted and "results0" in fitted and "results199" not in fitted
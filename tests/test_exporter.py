@@ -0,0 +1,35 @@
+"""Tests for streaming export writers."""
+
+import io
+import json
+
+import pytest
+
+from qa_extractor.exporter import JsonArrayWriter
+
+ITEMS = [
+    {"question": "Wie schnell?", "answer": "Sehr \"schnell\"\nwirklich", "tags": ["a", "b"], "n": 1.5},
+    {"question": "Empty", "answer": "", "tags": [], "meta": {"nested": {"x": None}}},
+]
+
+
+def written(meta, items, key="qa_pairs") -> str:
+    f = io.StringIO()
+    writer = JsonArrayWriter(f, key)
+    writer.write_head(meta)
+    for item in items:
+        writer.write_item(item)
+    writer.write_tail()
+    return f.getvalue()
+
+
+@pytest.mark.parametrize("items", [ITEMS, ITEMS[:1], []])
+@pytest.mark.parametrize("meta", [{"exported": "2024-01-01", "counts": {"qa": 2}}, {}])
+def test_output_matches_json_dump(meta, items):
+    expected = json.dumps({"meta": meta, "qa_pairs": items}, indent=2, ensure_ascii=False)
+    assert written(meta, items) == expected
+
+
+def test_custom_key():
+    expected = json.dumps({"meta": {}, "knowledge_points": ITEMS}, indent=2, ensure_ascii=False)
+    assert written(None, ITEMS, key="knowledge_points") == expected
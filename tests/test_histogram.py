@@ -0,0 +1,54 @@
+"""Tests for log-bucketed latency histograms."""
+
+import random
+
+import pytest
+
+from qa_extractor.histogram import Histogram
+
+
+def histogram_of(values) -> Histogram:
+    histogram = Histogram()
+    for value in values:
+        histogram.add(value)
+    return histogram
+
+
+def test_empty_histogram():
+    assert Histogram().percentile(50) == 0.0
+    assert Histogram().summary()["count"] == 0
+
+
+@pytest.mark.parametrize("q", [50, 90, 95, 99])
+def test_percentiles_are_within_bucket_error(q):
+    rng = random.Random(42)
+    values = sorted(rng.lognormvariate(0, 1) for _ in range(5000))
+    exact = values[max(0, int(len(values) * q / 100) - 1)]
+    assert histogram_of(values).percentile(q) == pytest.approx(exact, rel=0.06)
+
+
+def test_percentiles_stay_within_observed_range():
+    histogram = histogram_of([0.0001, 0.5, 2.0])
+    assert histogram.percentile(0) >= 0.0001
+    assert histogram.percentile(100) <= 2.0
+    assert histogram.percentile(100) == pytest.approx(2.0, rel=0.05)
+    assert histogram.min == 0.0001 and histogram.max == 2.0
+
+
+def test_merge_equals_histogram_of_all_values():
+    rng = random.Random(7)
+    first = [rng.uniform(0.01, 5) for _ in range(300)]
+    second = [rng.uniform(0.5, 30) for _ in range(200)]
+    merged = histogram_of(first)
+    merged.merge(histogram_of(second))
+    combined = histogram_of(first + second)
+    assert merged.buckets == combined.buckets
+    assert (merged.count, merged.min, merged.max) == (combined.count, combined.min, combined.max)
+    assert merged.percentile(99) == combined.percentile(99)
+
+
+def test_round_trips_through_dict():
+    histogram = histogram_of([0.1, 0.2, 3.0])
+    restored = Histogram.from_dict(histogram.to_dict())
+    assert restored.buckets == histogram.buckets
+    assert restored.summary() == histogram.summary()
@@ -0,0 +1,73 @@
+"""Tests for LLMClient request accounting against a mocked transport."""
+
+import httpx
+import pytest
+
+from qa_extractor.config import LLMConfig
+from qa_extractor.llm_client import LLMClient, RateLimitError
+from qa_extractor.streaming import StreamAborted
+
+TPM = 100_000
+PROMPT = [{"role": "user", "content": "word " * 4000}]
+
+
+def client_for(handler, stream: bool = False) -> LLMClient:
+    config = LLMConfig(
+        api_key="x",
+        base_url="http://llm.test/v1",
+        tokenizer="estimate",
+        tokens_per_minute=TPM,
+        stream=stream,
+    )
+    client = LLMClient(config)
+    client._client = httpx.Client(base_url=config.base_url, transport=httpx.MockTransport(handler))
+    return client
+
+
+def completion(total_tokens: int) -> dict:
+    return {
+        "choices": [{"message": {"content": "{}"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": total_tokens - 10, "completion_tokens": 10, "total_tokens": total_tokens},
+    }
+
+
+def tokens_left(client: LLMClient) -> float:
+    return client.rate_limiter._tokens.level
+
+
+def raise_timeout(request):
+    raise httpx.ReadTimeout("timed out", request=request)
+
+
+@pytest.mark.parametrize(
+    "handler, error",
+    [
+        (lambda request: httpx.Response(500, text="boom"), httpx.HTTPStatusError),
+        (lambda request: httpx.Response(429), RateLimitError),
+        (raise_timeout, httpx.ReadTimeout),
+        (lambda request: httpx.Response(200, text="not json"), ValueError),
+        (lambda request: httpx.Response(200, json={"error": {"message": "overloaded"}}), ValueError),
+    ],
+)
+def test_failed_requests_give_back_their_token_estimate(handler, error):
+    client = client_for(handler)
+    with pytest.raises(error):
+        client._make_request(PROMPT)
+    # Only the refill during the call can separate it from a full bucket
+    assert tokens_left(client) == pytest.approx(TPM, abs=100)
+
+
+def test_successful_request_is_charged_its_reported_usage():
+    client = client_for(lambda request: httpx.Response(200, json=completion(250)))
+    client._make_request(PROMPT)
+    assert tokens_left(client) == pytest.approx(TPM - 250, abs=100)
+    assert client.get_stats().total_usage.total_tokens == 250
+
+
+def test_aborted_stream_is_charged_what_it_consumed():
+    chunk = '{"choices": [{"delta": {"content": "Sorry, I cannot help with that."}}]}'
+    client = client_for(lambda request: httpx.Response(200, text=f"data: {chunk}\n\n"), stream=True)
+    with pytest.raises(StreamAborted) as aborted:
+        client._make_request(PROMPT, array_key="knowledge_points")
+    assert aborted.value.tokens_used > 0
+    assert tokens_left(client) == pytest.approx(TPM - aborted.value.tokens_used, abs=100)
@@ -0,0 +1,47 @@
+"""Tests for the Prometheus rendering of run stats."""
+
+import threading
+
+from qa_extractor.llm_client import TokenStats, TokenUsage
+from qa_extractor.metrics import render_metrics
+
+
+def test_snapshot_is_independent_of_later_updates():
+    stats = TokenStats()
+    stats.add_usage(TokenUsage(prompt_tokens=10, completion_tokens=5, total_tokens=15))
+    stats.record_attempt("extract", 0.2)
+    stats.record_retry("ReadTimeout", 1.0)
+
+    snapshot = stats.snapshot()
+    stats.add_usage(TokenUsage(prompt_tokens=1, completion_tokens=1, total_tokens=2))
+    stats.record_attempt("extract", 0.3)
+    stats.record_retry("ReadTimeout", 1.0)
+
+    assert snapshot.request_count == 1
+    assert snapshot.total_usage.total_tokens == 15
+    assert snapshot.latency["extract"].count == 1
+    assert snapshot.retry_errors == {"ReadTimeout": 1}
+
+
+def test_render_metrics_while_workers_record():
+    stats = TokenStats()
+    stop = threading.Event()
+
+    def record():
+        i = 0
+        while not stop.is_set():
+            i += 1
+            stats.add_usage(TokenUsage(prompt_tokens=1, completion_tokens=1, total_tokens=2))
+            stats.record_attempt(f"stage{i % 50}", 0.01 * (i % 7 + 1))
+            stats.record_retry(f"Error{i % 30}", 0.0)
+
+    worker = threading.Thread(target=record)
+    worker.start()
+    try:
+        for _ in range(200):
+            text = render_metrics(stats)
+    finally:
+        stop.set()
+        worker.join()
+    assert "qa_extractor_requests_total" in text
+    assert 'qa_extractor_tokens_total{type="prompt"}' in text
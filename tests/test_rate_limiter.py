@@ -0,0 +1,75 @@
+"""Tests for the RPM/TPM token buckets and Retry-After parsing."""
+
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from qa_extractor.rate_limiter import RateLimiter, TokenBucket, parse_retry_after
+
+
+def test_bucket_refills_at_its_per_minute_rate():
+    bucket = TokenBucket(60)  # one unit per second
+    bucket.level, bucket.updated = 0.0, 100.0
+    bucket.refill(102.5)
+    assert bucket.level == pytest.approx(2.5)
+    assert bucket.wait_time(4) == pytest.approx(1.5)
+    assert bucket.wait_time(2) == 0.0
+
+
+def test_bucket_refill_is_capped_at_capacity():
+    bucket = TokenBucket(60)
+    bucket.level, bucket.updated = 0.0, 0.0
+    bucket.refill(3600.0)
+    assert bucket.level == 60
+
+
+def test_oversized_request_waits_only_for_a_full_bucket():
+    bucket = TokenBucket(60)
+    bucket.level = 30.0
+    assert bucket.wait_time(1000) == pytest.approx(30.0)
+
+
+def test_limiter_charges_requests_and_tokens():
+    limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=1000)
+    assert limiter._reserve(400) == 0.0
+    assert limiter._reserve(400) == 0.0
+    # Out of requests: the next one waits about half a minute for a refill
+    assert limiter._reserve(10) == pytest.approx(30.0, abs=0.5)
+
+
+def test_reconcile_returns_overestimated_tokens():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    assert limiter._reserve(900) == 0.0
+    assert limiter._reserve(900) > 0
+    limiter.reconcile(900, 100)
+    assert limiter._reserve(900) == 0.0
+
+
+def test_pause_holds_back_callers_even_without_limits():
+    limiter = RateLimiter()
+    assert limiter._reserve(0) == 0.0
+    limiter.pause(5)
+    assert limiter._reserve(0) == pytest.approx(5.0, abs=0.5)
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"retry-after": "7"}, 7.0),
+        ({"retry-after": "1.5"}, 1.5),
+        ({"retry-after": "-3"}, 0.0),
+        ({"retry-after-ms": "250", "retry-after": "9"}, 0.25),
+        ({"retry-after-ms": "soon", "retry-after": "9"}, 9.0),
+        ({"retry-after": "whenever"}, None),
+        ({}, None),
+    ],
+)
+def test_parse_retry_after(headers, expected):
+    assert parse_retry_after(httpx.Headers(headers)) == expected
+
+
+def test_parse_retry_after_http_date():
+    headers = httpx.Headers({"retry-after": formatdate(time.time() + 30, usegmt=True)})
+    assert parse_retry_after(headers) == pytest.approx(30, abs=2)
@@ -0,0 +1,91 @@
+"""Tests for corpus sharding and merging shard outputs."""
+
+from pathlib import Path
+
+import pytest
+
+from qa_extractor.checkpoint import Checkpoint, CheckpointManager
+from qa_extractor.sharding import merge_shards, parse_shard, select_shard, shard_of
+from qa_extractor.stage1_extractor import ExtractionResult, KnowledgePoint
+from qa_extractor.stage2_generator import GenerationResult, QAPair
+from qa_extractor.state_store import StateStore
+
+USAGE = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+
+
+def test_shard_of_is_stable():
+    # Fixed values: shard assignment must not change between machines or releases
+    assert [shard_of(key, 16) for key in ("a.md", "papers/b.md", "c/d/e.md")] == [7, 4, 9]
+
+
+def test_shards_partition_the_corpus(tmp_path):
+    files = [tmp_path / f"dir{i % 3}" / f"paper_{i}.md" for i in range(200)]
+    shards = [select_shard(files, tmp_path, index, 4) for index in range(1, 5)]
+
+    assert sorted(sum(shards, []), key=str) == sorted(files, key=str)
+    assert all(30 <= len(shard) <= 70 for shard in shards)
+
+
+@pytest.mark.parametrize("spec", ["0/4", "5/4", "1/0", "a/b", "3"])
+def test_parse_shard_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        parse_shard(spec)
+
+
+def knowledge(paper_id: str, count: int, error: str = "") -> ExtractionResult:
+    return ExtractionResult(
+        paper_id=paper_id,
+        paper_title=f"Title {paper_id}",
+        source_file=f"{paper_id}.md",
+        knowledge_points=[
+            KnowledgePoint("Synthesis", f"fact {i}", "quote", "single-hop", []) for i in range(count)
+        ],
+        token_usage={"error": error} if error else USAGE,
+    )
+
+
+def qa(paper_id: str, count: int) -> GenerationResult:
+    pairs = [QAPair(f"q{i}", f"a{i}", "Synthesis", f"Title {paper_id}") for i in range(count)]
+    return GenerationResult(paper_id, f"Title {paper_id}", pairs, USAGE)
+
+
+def make_shard(root: Path, name: str, papers: dict[str, int], stats: dict) -> Path:
+    shard = root / name
+    for paper_id, count in papers.items():
+        knowledge(paper_id, count, error="" if count else "timeout").save(shard / "knowledge")
+        if count:
+            qa(paper_id, count).save(shard / "qa_pairs")
+    qa("cross_doc", 1).save(shard / "qa_pairs")
+    manager = CheckpointManager(shard)
+    manager.save(Checkpoint(stage="complete", processed_files=list(papers), token_stats=stats))
+    return shard
+
+
+def test_merge_keeps_best_duplicate_and_sums_stats(tmp_path):
+    shard1 = make_shard(tmp_path, "s1", {"p1": 2, "p2": 0}, {"usage": {"total_tokens": 100}, "request_count": 3})
+    shard2 = make_shard(tmp_path, "s2", {"p2": 3, "p3": 1}, {"usage": {"total_tokens": 50}, "request_count": 2})
+    output = tmp_path / "merged"
+
+    summary = merge_shards([shard1, shard2], output)
+
+    assert summary.shards == 2
+    assert summary.knowledge_files == 3
+    assert summary.qa_files == 3
+    assert summary.duplicates == ["knowledge/p2"]
+    assert summary.cross_doc_qa == 2
+    # The failed copy of p2 loses to the successful one
+    assert len(ExtractionResult.load(output / "knowledge" / "p2.json").knowledge_points) == 3
+
+    checkpoint = CheckpointManager(output).load()
+    assert checkpoint.token_stats["usage"]["total_tokens"] == 150
+    assert checkpoint.token_stats["request_count"] == 5
+    assert sorted(checkpoint.processed_files) == ["p1", "p2", "p2", "p3"]
+
+    store = StateStore.for_output(output)
+    try:
+        manifest = store.manifest()
+    finally:
+        store.close()
+    assert manifest.stage("extract").items == 6
+    assert manifest.stage("generate").items == 6
+    assert manifest.stage("cross_doc").items == 2
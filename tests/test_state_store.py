@@ -0,0 +1,63 @@
+"""Tests for the SQLite state store and its trigger-maintained manifest."""
+
+from qa_extractor.manifest import breakdown
+from qa_extractor.state_store import ERROR, SUCCESS, PaperState, StateStore
+
+USAGE = {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}
+ITEMS = [{"category": "Synthesis", "difficulty": "easy"}, {"category": "Properties", "difficulty": "easy"}]
+
+
+def record(store: StateStore, paper_id: str, items=ITEMS, token_usage=USAGE) -> None:
+    store.record(
+        paper_id=paper_id,
+        stage="generate",
+        token_usage=token_usage,
+        item_count=len(items),
+        breakdown=breakdown(f"Title {paper_id}", items),
+    )
+
+
+def test_manifest_counts_inserted_rows():
+    store = StateStore.in_memory()
+    record(store, "p1")
+    record(store, "p2", items=ITEMS[:1])
+
+    stage = store.manifest().stage("generate")
+    assert stage.by_status == {SUCCESS: 2}
+    assert stage.items == 3
+    assert stage.tokens["total"] == 240
+    assert stage.categories == {"Synthesis": 2, "Properties": 1}
+    assert stage.difficulties == {"easy": 3}
+
+
+def test_manifest_follows_updates_and_deletes():
+    store = StateStore.in_memory()
+    record(store, "p1")
+    record(store, "p2")
+    # A re-run that failed replaces the paper's share of the totals
+    record(store, "p2", items=[], token_usage={"error": "timeout"})
+    store.delete("p1", "generate")
+
+    stage = store.manifest().stage("generate")
+    assert stage.by_status == {ERROR: 1}
+    assert stage.items == 0
+    assert stage.categories == {}
+    assert stage.tokens == {}
+
+
+def test_put_upserts_through_the_triggers():
+    store = StateStore.in_memory()
+    record(store, "p1")
+    state = store.get("p1", "generate")
+    store.put(PaperState(**{**state.to_dict(), "item_count": 5}))
+
+    assert store.manifest().stage("generate").items == 5
+    assert store.manifest().stage("generate").by_status == {SUCCESS: 1}
+
+
+def test_clear_empties_the_manifest():
+    store = StateStore.in_memory()
+    record(store, "p1")
+    store.clear()
+    assert store.is_empty()
+    assert store.manifest().to_dict() == {}
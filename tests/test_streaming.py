@@ -0,0 +1,76 @@
+"""Tests for incremental parsing of streamed completions."""
+
+import pytest
+
+from qa_extractor.streaming import IncrementalArrayParser, StreamAborted, StreamWatcher
+
+
+def feed_all(watcher: StreamWatcher, chunks: list[str]) -> StreamWatcher:
+    for chunk in chunks:
+        watcher.feed(chunk)
+    return watcher
+
+
+def test_parser_yields_items_split_across_chunks():
+    text = '{"qa_pairs": [{"q": "a [b]", "n": 1}, {"q": "\\"}\\"", "n": {"x": 2}}], "done": true}'
+    parser = IncrementalArrayParser("qa_pairs")
+    items = []
+    for i in range(0, len(text), 3):
+        items.extend(parser.feed(text[i:i + 3]))
+    assert items == [{"q": "a [b]", "n": 1}, {"q": '"}"', "n": {"x": 2}}]
+
+
+def test_parser_ignores_text_before_the_array():
+    parser = IncrementalArrayParser("items")
+    assert parser.feed('{"note": {"a": 1}, "items": [') == []
+    assert parser.feed('{"a": 1},') == [{"a": 1}]
+    assert parser.feed(' {"b": 2}] } {"c": 3}') == [{"b": 2}]
+
+
+def test_parser_reports_undecodable_items_as_none():
+    parser = IncrementalArrayParser("items")
+    assert parser.feed('{"items": [{"a": 1,}, {"b": 2}]}') == [None, {"b": 2}]
+
+
+def test_watcher_counts_valid_items_and_aborts_on_invalid_run():
+    watcher = StreamWatcher("items", item_validator=lambda item: "q" in item, max_invalid=2)
+    watcher.feed('{"items": [{"q": 1}, {"x": 1},')
+    assert watcher.valid_items == 1
+    with pytest.raises(StreamAborted):
+        watcher.feed(' {"x": 2}]}')
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        ['{"knowledge_points": []}'],
+        ["  \n", '{"a": 1}'],
+        ["```", "json", "\n", '{"knowledge_points": [', "]}"],
+        ["``", "`js", "on", "\n\n", "  ", "{"],
+        ["```JSON\n", "{"],
+        ["```\n", "{"],
+    ],
+)
+def test_watcher_accepts_fenced_and_bare_json(chunks):
+    watcher = feed_all(StreamWatcher(), chunks)
+    assert watcher._prefix_checked
+
+
+@pytest.mark.parametrize("chunks", [["```"], ["```", "json"], ["```", "json", "\n"], ["  "]])
+def test_watcher_waits_while_fence_is_incomplete(chunks):
+    watcher = feed_all(StreamWatcher(), chunks)
+    assert not watcher._prefix_checked
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        ["I'm sorry, ", "I can't help"],
+        ["```", "json\n", "Here you go"],
+        ["```python\n", "{"],
+        ["`x"],
+    ],
+)
+def test_watcher_aborts_on_non_json_output(chunks):
+    with pytest.raises(StreamAborted):
+        feed_all(StreamWatcher(), chunks)